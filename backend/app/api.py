@@ -1,23 +1,31 @@
 from fastapi import APIRouter, HTTPException
 from .models import IngestRequest, IngestResponse, ChatRequest, ChatResponse, Citation, ToolInfo
 from .canonical import canonicalize_url
-from .embeddings import embed_texts
+from .embeddings import embed_texts_cached
+from .mmr import mmr
+from .retrieval import hybrid_search
+from .vector_cache import vector_cache
 from .config import settings
+from .metrics import CHAT_STAGE_SECONDS, FLOWS_IN_FLIGHT, chat_completion
 from .db import db
 from typing import List
 import json
-from .flow import run_ingest_flow
+import numpy as np
+from .flow import link_user_to_latest
+from .singleflight import flight_key, ingest_flights
+from .jobs import enqueue_ingest, get_job
 from fastapi import Query
 from fastapi.responses import StreamingResponse
 import asyncio
 from typing import AsyncGenerator, Optional, Dict, Any
-from .flow import resolve_tool as node_resolve_tool, ingest as node_ingest, augment_sources as node_augment_sources, research as node_research, juror as node_juror, dbwrite as node_dbwrite
+from .flow import resolve_tool as node_resolve_tool, ingest as node_ingest, augment_sources as node_augment_sources, classify_intent as node_classify_intent, research as node_research, juror as node_juror, dbwrite as node_dbwrite
 from pydantic import BaseModel
 from fastapi import status, Query
 from fastapi import UploadFile, File, Form
 from fastapi import Request
 from .validators import is_plausible_product_name, fallback_name_from_ocr
 import logging
+import time
 import uuid
 logger = logging.getLogger(__name__)
 
@@ -38,15 +46,51 @@ async def ingest(payload: IngestRequest, request: Request) -> IngestResponse:
     if not payload.url and not payload.name:
         raise HTTPException(status_code=400, detail="Provide either url or name")
     user_id = request.headers.get("x-user-id")
-    result = await run_ingest_flow(str(payload.url) if payload.url else None, payload.name, bool(payload.force), user_id)
-    return IngestResponse(tool_id=str(result["tool_id"]), status=str(result["status"]))
+    return await _resolve_and_enqueue(str(payload.url) if payload.url else None, payload.name, bool(payload.force), user_id)
+
+
+async def _resolve_and_enqueue(
+    url: Optional[str], name: Optional[str], force: bool, user_id: Optional[str],
+    ocr_text: Optional[str] = None, source_label: Optional[str] = None,
+) -> IngestResponse:
+    """
+    Resolve (or create) the tool inline so the caller gets a tool_id right away, then queue the
+    rest of the flow for the job worker. A tool with a fresh version is returned as is.
+    """
+    state: Dict[str, Any] = {"url": url, "name": name, "force": force, "user_id": user_id}
+    key = flight_key(url, name, force)
+    # Coalesced like the flow itself, so simultaneous submissions share one search + LLM pick
+    resolved, _ = await ingest_flights.do(
+        f"resolve:{key}" if key else None,
+        lambda: node_resolve_tool(state),  # type: ignore[arg-type]
+    )
+    tool_id = str(resolved["tool_id"])
+    if resolved.get("skip_processing"):
+        return IngestResponse(tool_id=tool_id, status=str(resolved.get("status")))
+    job_id, _ = await enqueue_ingest(
+        url, name, force, user_id, tool_id=tool_id, canonical_url=resolved.get("canonical_url"),
+        ocr_text=ocr_text, source_label=source_label,
+    )
+    return IngestResponse(tool_id=tool_id, status=str(resolved.get("status") or "pending_research"), job_id=job_id)
+
+
+@router.get("/jobs/{job_id}")
+async def get_job_status(job_id: str) -> Dict[str, Any]:
+    if not _valid_uuid_or_none(job_id):
+        raise HTTPException(status_code=400, detail="Invalid job id")
+    job = await get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
 
 
 @router.post("/chat", response_model=ChatResponse)
 async def chat(payload: ChatRequest) -> ChatResponse:
     # Embed the question and retrieve top-k similar chunks directly (no RPC)
-    question_vec = (await embed_texts([payload.question]))[0]
-    qvec_str = "[" + ",".join(str(x) for x in question_vec) + "]"
+    timings: Dict[str, float] = {}
+    t0 = time.perf_counter()
+    question_vec = (await embed_texts_cached([payload.question]))[0]
+    timings["embed_ms"] = (time.perf_counter() - t0) * 1000
     # Determine scope and caps
     scope = getattr(payload, "scope", "tool") or "tool"
     prefer_one_pager = bool(getattr(payload, "prefer_one_pager", False))
@@ -59,13 +103,26 @@ async def chat(payload: ChatRequest) -> ChatResponse:
     # Clamp to sane bounds
     k = max(0, min(12, requested_k))
 
+    # Tool-scoped chat can be served from the in-process index without touching Postgres
+    tool_index = None
+    if settings.vector_cache_enabled and scope == "tool" and payload.tool_id:
+        try:
+            tool_index = await vector_cache.get(payload.tool_id)
+        except Exception:
+            logger.warning("[api.chat] vector cache load failed; using database retrieval", exc_info=True)
+            tool_index = None
+
     # Fetch one_pager as additional structured context (only when tool scope and tool_id present)
     op_ctx = ""
     if scope == "tool" and payload.tool_id:
-        tool = await db.fetchrow("SELECT one_pager FROM tools WHERE id = $1::uuid", payload.tool_id)
-        if tool and tool["one_pager"]:
+        if tool_index is not None:
+            raw_op = tool_index.one_pager
+        else:
+            tool = await db.fetchrow("SELECT one_pager FROM tools WHERE id = $1::uuid", payload.tool_id)
+            raw_op = tool["one_pager"] if tool else None
+        if raw_op:
             try:
-                op = tool["one_pager"] if isinstance(tool["one_pager"], dict) else json.loads(str(tool["one_pager"]))
+                op = raw_op if isinstance(raw_op, dict) else json.loads(str(raw_op))
                 overview = op.get("overview") or ""
                 features = op.get("features") or []
                 pricing = op.get("pricing") or {}
@@ -79,34 +136,27 @@ async def chat(payload: ChatRequest) -> ChatResponse:
             except Exception:
                 op_ctx = ""
 
-    # Retrieve relevant chunks according to scope
+    # Retrieve relevant chunks according to scope (hybrid vector + full-text, fused by RRF)
+    t0 = time.perf_counter()
     if scope == "global":
-        rows = await db.fetch(
-            """
-            SELECT source_url, chunk_text
-            FROM documents
-            WHERE chunk_embedding IS NOT NULL
-            ORDER BY chunk_embedding <#> $1::vector
-            LIMIT 48
-            """,
-            qvec_str,
-        )
+        rows = await hybrid_search(payload.question, question_vec)
+    elif tool_index is not None:
+        rows = tool_index.search(payload.question, question_vec, settings.retrieval_candidates, settings.rrf_k)
     else:
         # Default to tool scope
-        rows = await db.fetch(
-            """
-            SELECT source_url, chunk_text
-            FROM documents
-            WHERE tool_id = $1::uuid AND chunk_embedding IS NOT NULL
-            ORDER BY chunk_embedding <#> $2::vector
-            LIMIT 48
-            """,
-            payload.tool_id,
-            qvec_str,
-        )
+        rows = await hybrid_search(payload.question, question_vec, tool_id=payload.tool_id)
+    timings["retrieve_ms"] = (time.perf_counter() - t0) * 1000
+    # Rerank the fused candidates with MMR for diversity; selected top-k lead, the rest keep fused order
+    t0 = time.perf_counter()
+    ranked = list(rows)
+    if rows and k > 0:
+        picked = mmr(question_vec, np.stack([r["chunk_embedding"] for r in rows]), k=k)
+        picked_set = set(picked)
+        ranked = [rows[i] for i in picked] + [r for i, r in enumerate(rows) if i not in picked_set]
+    timings["rerank_ms"] = (time.perf_counter() - t0) * 1000
     # Build snippets and citations; include only top-k in context
-    snippets: List[str] = [r["chunk_text"][:500] for r in rows][:k]
-    citations: List[Citation] = [Citation(source_url=r["source_url"], snippet=r["chunk_text"][:160]) for r in rows][: max(2, min(8, k if k > 0 else 2))]
+    snippets: List[str] = [r["chunk_text"][:500] for r in ranked][:k]
+    citations: List[Citation] = [Citation(source_url=r["source_url"], snippet=r["chunk_text"][:160]) for r in ranked][: max(2, min(8, k if k > 0 else 2))]
 
     # Simple answer via OpenAI with provided snippets
     from openai import AsyncOpenAI
@@ -123,12 +173,24 @@ async def chat(payload: ChatRequest) -> ChatResponse:
         "Prefer structured facts when available. Cite sources by number [1], [2] where relevant.\n\n"
         f"{context}\n\nQuestion: {payload.question}"
     )
-    completion = await client.chat.completions.create(
+    t0 = time.perf_counter()
+    completion = await chat_completion(
+        client,
         model=settings.model_primary,
         messages=[{"role": "user", "content": prompt}],
         temperature=0.2,
     )
+    timings["answer_ms"] = (time.perf_counter() - t0) * 1000
     answer = completion.choices[0].message.content or ""
+    logger.info(
+        "[api.chat] scope=%s cached=%s candidates=%d %s",
+        scope,
+        tool_index is not None,
+        len(rows),
+        " ".join(f"{name}={ms:.1f}" for name, ms in timings.items()),
+    )
+    for stage, ms in timings.items():
+        CHAT_STAGE_SECONDS.labels(stage.removesuffix("_ms")).observe(ms / 1000)
     # Return at least two citations if available
     return ChatResponse(answer=answer, citations=citations[: max(2, min(8, len(citations)))])
 
@@ -343,34 +405,95 @@ async def ingest_stream(url: Optional[str] = None, name: Optional[str] = None, f
 
         had_error = False
 
+        def apply(update: Optional[Dict[str, Any]]) -> None:
+            if not update:
+                return
+            update = dict(update)
+            # skipped_urls accumulates across branches (mirrors the graph's reducer)
+            skipped = update.pop("skipped_urls", None)
+            state.update(update)
+            if skipped:
+                state["skipped_urls"] = list(state.get("skipped_urls") or []) + list(skipped)
+
+        def finish_event(label: str) -> str:
+            return _sse_event("progress", {"node": label, "status": "finish", "state": {k: state.get(k) for k in ["tool_id", "status", "canonical_url"] if k in state}})
+
         async def run_node(label: str, fn):
             nonlocal had_error
             await asyncio.sleep(0)
             yield _sse_event("progress", {"node": label, "status": "start"})
             try:
-                update = await fn(state)  # type: ignore[misc]
-                if update:
-                    state.update(update)
-                yield _sse_event("progress", {"node": label, "status": "finish", "state": {k: state.get(k) for k in ["tool_id", "status", "canonical_url"] if k in state}})
+                apply(await fn(state))  # type: ignore[misc]
+                yield finish_event(label)
             except Exception as e:
                 yield _sse_event("error", {"node": label, "message": str(e)})
                 had_error = True
                 return
 
-        for label, fn in [
-            ("resolve_tool", node_resolve_tool),
-            ("ingest", node_ingest),
-            ("augment_sources", node_augment_sources),
-            ("research", node_research),
-            ("juror", node_juror),
-            ("dbwrite", node_dbwrite),
-        ]:
-            async for ev in run_node(label, fn):
-                yield ev.encode()
-            if had_error:
-                break
-
-        yield _sse_event("done", {"tool_id": state.get("tool_id"), "status": state.get("status", "pending_research")}).encode()
+        async def run_parallel(nodes):
+            # Same fan-out as the compiled graph: branches run concurrently, events in completion order
+            nonlocal had_error
+            for label, _ in nodes:
+                yield _sse_event("progress", {"node": label, "status": "start"})
+            snapshot = dict(state)
+
+            async def branch(label: str, fn):
+                try:
+                    return label, await fn(snapshot), None
+                except Exception as e:
+                    return label, None, e
+
+            for fut in asyncio.as_completed([branch(label, fn) for label, fn in nodes]):
+                label, update, err = await fut
+                if err is not None:
+                    yield _sse_event("error", {"node": label, "message": str(err)})
+                    had_error = True
+                    continue
+                apply(update)
+                yield finish_event(label)
+
+        steps = [
+            [("resolve_tool", node_resolve_tool)],
+            [("ingest", node_ingest), ("augment_sources", node_augment_sources), ("classify_intent", node_classify_intent)],
+            [("research", node_research)],
+            [("juror", node_juror)],
+            [("dbwrite", node_dbwrite)],
+        ]
+        events: asyncio.Queue[str] = asyncio.Queue()
+
+        async def run() -> Dict[str, Any]:
+            with FLOWS_IN_FLIGHT.track_inprogress():
+                for nodes in steps:
+                    runner = run_node(*nodes[0]) if len(nodes) == 1 else run_parallel(nodes)
+                    async for ev in runner:
+                        events.put_nowait(ev)
+                    if had_error:
+                        break
+            return {"tool_id": state.get("tool_id"), "status": state.get("status", "pending_research"), "skipped_urls": state.get("skipped_urls", [])}
+
+        # Coalesce with any in-flight ingest of the same tool (same as run_ingest_flow); a stream
+        # that joins another run only sees its final result
+        flight = asyncio.create_task(ingest_flights.do(flight_key(url, name, force), run))
+        while True:
+            next_event = asyncio.create_task(events.get())
+            await asyncio.wait({next_event, flight}, return_when=asyncio.FIRST_COMPLETED)
+            if next_event.done():
+                yield next_event.result().encode()
+                continue
+            next_event.cancel()
+            break
+        while not events.empty():
+            yield events.get_nowait().encode()
+        try:
+            result, shared = flight.result()
+        except Exception as e:
+            yield _sse_event("error", {"node": "ingest", "message": str(e)}).encode()
+            result, shared = {"tool_id": state.get("tool_id"), "status": state.get("status", "pending_research"), "skipped_urls": []}, False
+        if shared:
+            await link_user_to_latest(result.get("tool_id"), user_id)
+            yield _sse_event("progress", {"node": "coalesced", "status": "finish", "state": {"tool_id": result.get("tool_id"), "status": result.get("status")}}).encode()
+
+        yield _sse_event("done", {"tool_id": result.get("tool_id"), "status": result.get("status", "pending_research"), "skipped_urls": result.get("skipped_urls", [])}).encode()
 
     return StreamingResponse(gen(), media_type="text/event-stream")
 
@@ -378,7 +501,7 @@ async def ingest_stream(url: Optional[str] = None, name: Optional[str] = None, f
 @router.post("/ingest/image", response_model=IngestResponse)
 async def ingest_image(request: Request, file: UploadFile = File(...), hint: str | None = Form(default=None)) -> IngestResponse:
     """
-    Accept an image (screenshot), OCR it, extract a primary product name, and run the ingest flow
+    Accept an image (screenshot), OCR it, extract a primary product name, and queue the ingest flow
     with OCR text included so research can leverage it.
     """
     data = await file.read()
@@ -391,7 +514,6 @@ async def ingest_image(request: Request, file: UploadFile = File(...), hint: str
     mime = file.content_type or "image/png"
     from .vision import ocr_image_to_text
     from .research import extract_primary_product_name
-    from .flow import run_ingest_flow_with_ocr
 
     ocr_text = await ocr_image_to_text(data, mime)
     if not ocr_text:
@@ -412,8 +534,7 @@ async def ingest_image(request: Request, file: UploadFile = File(...), hint: str
             raise HTTPException(status_code=400, detail="Could not infer a valid product name from this screenshot")
         product_name = fb
     user_id = request.headers.get("x-user-id")
-    result = await run_ingest_flow_with_ocr(product_name, ocr_text, source_label="screenshot", user_id=user_id)
-    return IngestResponse(tool_id=str(result["tool_id"]), status=str(result["status"]))
+    return await _resolve_and_enqueue(None, product_name, False, user_id, ocr_text=ocr_text, source_label="screenshot")
 
 class LinkStartResponse(BaseModel):
     token: str
@@ -0,0 +1,115 @@
+import json
+import logging
+from typing import Any, Awaitable, Callable, Optional
+from .chunk import recursive_character_split
+from .config import settings
+from .db import db
+
+logger = logging.getLogger(__name__)
+
+# Node outputs not stored per run: chunks are re-split from clean_text, and clean_text itself is
+# only stored up to INLINE_TEXT_CHARS (else rebuilt from the documents ingest wrote)
+REHYDRATED_FIELDS = ("clean_text", "chunks")
+INLINE_TEXT_CHARS = 20_000
+
+NodeFn = Callable[[Any], Awaitable[dict[str, Any]]]
+
+
+class CheckpointStore:
+    """
+    Per-node flow checkpoints in the flow_checkpoints table, keyed by (run_id, node). A node that
+    already completed for a run returns its stored update instead of running again, so a retried
+    job resumes after the last completed node. Checkpoint I/O failures never fail the flow.
+    """
+
+    def __init__(self) -> None:
+        self.saved = 0
+        self.restored = 0
+
+    async def load(self, run_id: str, node: str) -> Optional[dict[str, Any]]:
+        try:
+            row = await db.fetchrow("SELECT state FROM flow_checkpoints WHERE run_id = $1 AND node = $2", run_id, node)
+        except Exception:
+            logger.warning("[checkpoints] load failed run=%s node=%s", run_id, node, exc_info=True)
+            return None
+        if not row:
+            return None
+        state = row["state"]
+        return json.loads(state) if isinstance(state, str) else dict(state)
+
+    async def save(self, run_id: str, node: str, update: dict[str, Any]) -> None:
+        stored = {k: v for k, v in update.items() if k not in REHYDRATED_FIELDS}
+        clean_text = update.get("clean_text")
+        if isinstance(clean_text, str) and len(clean_text) <= INLINE_TEXT_CHARS:
+            stored["clean_text"] = clean_text
+        try:
+            await db.execute(
+                """
+                INSERT INTO flow_checkpoints (run_id, node, state) VALUES ($1, $2, $3::jsonb)
+                ON CONFLICT (run_id, node) DO UPDATE SET state = EXCLUDED.state, created_at = now()
+                """,
+                run_id,
+                node,
+                json.dumps(stored, default=str),
+            )
+            self.saved += 1
+        except Exception:
+            logger.warning("[checkpoints] save failed run=%s node=%s", run_id, node, exc_info=True)
+
+    async def clear(self, run_id: str) -> None:
+        try:
+            await db.execute("DELETE FROM flow_checkpoints WHERE run_id = $1", run_id)
+        except Exception:
+            logger.warning("[checkpoints] clear failed run=%s", run_id, exc_info=True)
+
+    async def rehydrate(self, state: dict[str, Any], update: dict[str, Any]) -> dict[str, Any]:
+        """
+        Rebuild clean_text / chunks of a restored ingest: from the stored clean_text when it was
+        small enough to keep, else from the chunks ingest wrote under its source_urls (the page,
+        or each entry of a feed).
+        """
+        if isinstance(update.get("clean_text"), str):
+            return {**update, "chunks": recursive_character_split(update["clean_text"])}
+        source_urls = update.get("source_urls")
+        tool_id = update.get("tool_id") or state.get("tool_id")
+        if source_urls is None or not tool_id:
+            return update
+        rows = await db.fetch(
+            """
+            SELECT chunk_text FROM documents
+            WHERE tool_id = $1::uuid AND source_url = ANY($2::text[])
+            ORDER BY array_position($2::text[], source_url), chunk_index
+            """,
+            tool_id,
+            list(source_urls),
+        )
+        chunks = [r["chunk_text"] or "" for r in rows]
+        return {**update, "chunks": chunks, "clean_text": "\n\n".join(chunks)}
+
+    def wrap(self, node: str, fn: NodeFn) -> NodeFn:
+        """Checkpoint a graph node; a no-op for states without run_id."""
+
+        async def checkpointed(state: Any) -> dict[str, Any]:
+            run_id = state.get("run_id")
+            if not run_id or not settings.flow_checkpoints_enabled:
+                return await fn(state)
+            stored = await self.load(run_id, node)
+            if stored is not None:
+                self.restored += 1
+                logger.info("[checkpoints] run=%s node=%s restored", run_id, node)
+                try:
+                    return await self.rehydrate(state, stored)
+                except Exception:
+                    logger.warning("[checkpoints] rehydrate failed run=%s node=%s; re-running", run_id, node, exc_info=True)
+            update = await fn(state)
+            await self.save(run_id, node, update or {})
+            return update
+
+        checkpointed.__name__ = getattr(fn, "__name__", node)
+        return checkpointed
+
+    def stats(self) -> dict[str, int]:
+        return {"saved": self.saved, "restored": self.restored}
+
+
+checkpoints = CheckpointStore()
@@ -14,6 +14,113 @@ class Settings(BaseSettings):
     model_primary: str = Field(default="gpt-4o")
     model_light: str = Field(default="gpt-4o-mini")
     embeddings_model: str = Field(default="text-embedding-3-small")
+    # Embedding batcher: approximate token budget per request, max batches in flight, 429 retries
+    embeddings_batch_tokens: int = Field(default=16_000, alias="EMBEDDINGS_BATCH_TOKENS")
+    embeddings_concurrency: int = Field(default=4, alias="EMBEDDINGS_CONCURRENCY")
+    embeddings_max_retries: int = Field(default=5, alias="EMBEDDINGS_MAX_RETRIES")
+
+    # Chat retrieval: candidates per ranker (vector / full-text) and reciprocal rank fusion constant
+    retrieval_candidates: int = Field(default=48, alias="RETRIEVAL_CANDIDATES")
+    rrf_k: int = Field(default=60, alias="RRF_K")
+    # ANN search knobs applied to every pooled connection (ivfflat.probes / hnsw.ef_search) for
+    # cross-tool retrieval (tool-scoped retrieval scans exactly); ef_search caps HNSW results, so
+    # keep it >= retrieval_candidates
+    vector_index_probes: int = Field(default=10, alias="VECTOR_INDEX_PROBES")
+    hnsw_ef_search: int = Field(default=100, alias="HNSW_EF_SEARCH")
+    # Optional in-process per-tool retrieval cache (tool-scoped chat skips Postgres on hits)
+    vector_cache_enabled: bool = Field(default=False, alias="VECTOR_CACHE_ENABLED")
+    vector_cache_max_bytes: int = Field(default=256 * 1024 * 1024, alias="VECTOR_CACHE_MAX_BYTES")
+    vector_cache_ttl_seconds: float = Field(default=600.0, alias="VECTOR_CACHE_TTL_SECONDS")
+    # How often a cached index re-checks the tool's latest tool_versions id, so versions written by
+    # another process (the standalone job worker) are picked up without waiting for the TTL
+    vector_cache_recheck_seconds: float = Field(default=5.0, alias="VECTOR_CACHE_RECHECK_SECONDS")
+
+    # Shared outbound HTTP client (scraping, Telegram)
+    http2_enabled: bool = Field(default=True, alias="HTTP2_ENABLED")
+    http_max_connections: int = Field(default=100, alias="HTTP_MAX_CONNECTIONS")
+    http_max_keepalive_connections: int = Field(default=20, alias="HTTP_MAX_KEEPALIVE_CONNECTIONS")
+    http_keepalive_expiry_seconds: float = Field(default=30.0, alias="HTTP_KEEPALIVE_EXPIRY_SECONDS")
+    http_max_connections_per_host: int = Field(default=6, alias="HTTP_MAX_CONNECTIONS_PER_HOST")
+
+    # On-disk page cache for conditional GETs (ETag / Last-Modified); TTL applies to pages without validators
+    page_cache_enabled: bool = Field(default=True, alias="PAGE_CACHE_ENABLED")
+    page_cache_dir: str = Field(default=".cache/pages", alias="PAGE_CACHE_DIR")
+    page_cache_ttl_seconds: float = Field(default=6 * 3600, alias="PAGE_CACHE_TTL_SECONDS")
+
+    # Scraping: streamed download cap and HTML extraction engine (selectolax | lxml | html.parser)
+    scrape_max_bytes: int = Field(default=5 * 1024 * 1024, alias="SCRAPE_MAX_BYTES")
+    # PDFs are unreadable once cut off (the xref table is at the end), so they get their own cap
+    scrape_max_pdf_bytes: int = Field(default=30 * 1024 * 1024, alias="SCRAPE_MAX_PDF_BYTES")
+    html_extractor: str = Field(default="selectolax", alias="HTML_EXTRACTOR")
+    # Hedged fetch: start the reader fallback if the direct GET has not answered within the delay
+    # (or failed); the winning path is remembered per host for scrape_route_ttl_seconds
+    scrape_hedge_enabled: bool = Field(default=True, alias="SCRAPE_HEDGE_ENABLED")
+    scrape_hedge_delay_seconds: float = Field(default=3.0, alias="SCRAPE_HEDGE_DELAY_SECONDS")
+    scrape_route_ttl_seconds: float = Field(default=3600.0, alias="SCRAPE_ROUTE_TTL_SECONDS")
+    scrape_max_attempts: int = Field(default=2, alias="SCRAPE_MAX_ATTEMPTS")
+    # Politeness scheduler: per-domain token bucket, per-host and global fetch concurrency
+    scrape_domain_rate_per_second: float = Field(default=1.0, alias="SCRAPE_DOMAIN_RATE_PER_SECOND")
+    scrape_domain_burst: int = Field(default=3, alias="SCRAPE_DOMAIN_BURST")
+    scrape_host_concurrency: int = Field(default=2, alias="SCRAPE_HOST_CONCURRENCY")
+    scrape_global_concurrency: int = Field(default=16, alias="SCRAPE_GLOBAL_CONCURRENCY")
+    # Per-host / per-domain scrape state (semaphores, buckets, health, routes) unused this long is dropped
+    scrape_state_idle_seconds: float = Field(default=1800.0, alias="SCRAPE_STATE_IDLE_SECONDS")
+    # Per-host circuit breaker and negative cache for URLs that failed to fetch
+    scrape_circuit_enabled: bool = Field(default=True, alias="SCRAPE_CIRCUIT_ENABLED")
+    scrape_circuit_failure_threshold: int = Field(default=3, alias="SCRAPE_CIRCUIT_FAILURE_THRESHOLD")
+    scrape_circuit_open_seconds: float = Field(default=300.0, alias="SCRAPE_CIRCUIT_OPEN_SECONDS")
+    scrape_dead_url_ttl_seconds: float = Field(default=1800.0, alias="SCRAPE_DEAD_URL_TTL_SECONDS")
+
+    # YouTube transcripts: on-disk cache by video id (negative entries expire sooner), thread pool size
+    transcript_cache_enabled: bool = Field(default=True, alias="TRANSCRIPT_CACHE_ENABLED")
+    transcript_cache_dir: str = Field(default=".cache/transcripts", alias="TRANSCRIPT_CACHE_DIR")
+    transcript_cache_ttl_seconds: float = Field(default=30 * 86400, alias="TRANSCRIPT_CACHE_TTL_SECONDS")
+    transcript_negative_ttl_seconds: float = Field(default=86400, alias="TRANSCRIPT_NEGATIVE_TTL_SECONDS")
+    transcript_max_workers: int = Field(default=4, alias="TRANSCRIPT_MAX_WORKERS")
+
+    # Bounded crawl of the official site (sitemap or homepage links) during ingest; when enabled
+    # it replaces the site:<domain> search queries in augment_sources
+    site_crawl_enabled: bool = Field(default=True, alias="SITE_CRAWL_ENABLED")
+    site_crawl_max_pages: int = Field(default=8, alias="SITE_CRAWL_MAX_PAGES")
+    site_crawl_budget_seconds: float = Field(default=20.0, alias="SITE_CRAWL_BUDGET_SECONDS")
+    site_crawl_chunks_per_page: int = Field(default=6, alias="SITE_CRAWL_CHUNKS_PER_PAGE")
+
+    # Web search (Tavily): concurrent queries per fan-out and per-request timeout
+    search_concurrency: int = Field(default=4, alias="SEARCH_CONCURRENCY")
+    search_timeout_seconds: float = Field(default=30.0, alias="SEARCH_TIMEOUT_SECONDS")
+    # augment_sources: concurrent page fetches feeding the batched chunk/embed/insert stage
+    augment_fetch_concurrency: int = Field(default=6, alias="AUGMENT_FETCH_CONCURRENCY")
+    # Postgres search cache; TTL per query class (JSON object in the env var)
+    search_cache_enabled: bool = Field(default=True, alias="SEARCH_CACHE_ENABLED")
+    search_cache_ttl_seconds: dict[str, float] = Field(
+        default={
+            "resolve": 14 * 86400,
+            "claim": 3 * 86400,
+            "augment": 2 * 86400,
+            "social": 86400,
+            "news": 6 * 3600,
+            "default": 86400,
+        },
+        alias="SEARCH_CACHE_TTL_SECONDS",
+    )
+    # Expired rows are deleted (at most purge_batch per pass) after this fraction of cache writes
+    search_cache_purge_probability: float = Field(default=0.05, alias="SEARCH_CACHE_PURGE_PROBABILITY")
+    search_cache_purge_batch: int = Field(default=1000, alias="SEARCH_CACHE_PURGE_BATCH")
+
+    # Job queue (jobs table): worker loops per process, idle poll interval, retry backoff, and how long a
+    # running job may go without a heartbeat before another worker reclaims it
+    job_worker_enabled: bool = Field(default=True, alias="JOB_WORKER_ENABLED")
+    job_worker_concurrency: int = Field(default=2, alias="JOB_WORKER_CONCURRENCY")
+    job_poll_interval_seconds: float = Field(default=2.0, alias="JOB_POLL_INTERVAL_SECONDS")
+    job_max_attempts: int = Field(default=3, alias="JOB_MAX_ATTEMPTS")
+    job_retry_base_seconds: float = Field(default=30.0, alias="JOB_RETRY_BASE_SECONDS")
+    job_retry_max_seconds: float = Field(default=1800.0, alias="JOB_RETRY_MAX_SECONDS")
+    job_stale_after_seconds: float = Field(default=900.0, alias="JOB_STALE_AFTER_SECONDS")
+    job_shutdown_timeout_seconds: float = Field(default=10.0, alias="JOB_SHUTDOWN_TIMEOUT_SECONDS")
+    # Port for a standalone worker's Prometheus /metrics listener (the API serves /metrics itself)
+    worker_metrics_port: int | None = Field(default=None, alias="WORKER_METRICS_PORT")
+    # Per-node flow checkpoints for queued runs, so a retried job resumes after its last completed node
+    flow_checkpoints_enabled: bool = Field(default=True, alias="FLOW_CHECKPOINTS_ENABLED")
 
     # Telegram
     telegram_bot_token: SecretStr | None = Field(default=None, alias="TELEGRAM_BOT_TOKEN")
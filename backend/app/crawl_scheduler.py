@@ -0,0 +1,130 @@
+import asyncio
+import functools
+import ipaddress
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator
+from urllib.parse import urlparse
+from .config import settings
+from .idle_map import IdleMap
+from .metrics import SCRAPE_QUEUE_WAIT_SECONDS
+
+logger = logging.getLogger(__name__)
+
+
+@functools.lru_cache(maxsize=1)
+def _public_suffix_list() -> Any:
+    try:
+        from publicsuffixlist import PublicSuffixList
+    except ImportError:
+        logger.warning("[crawl_scheduler] publicsuffixlist not installed; politeness budgets are per host")
+        return None
+    return PublicSuffixList()
+
+
+def domain_of(url: str) -> str:
+    """
+    Registrable domain per the Public Suffix List (private suffixes included), so docs.x.com and
+    www.x.com share a budget while news.bbc.co.uk / x.co.uk and a.github.io / b.github.io do not.
+    IP addresses, bare suffixes and hosts without the list fall back to the full host.
+    """
+    host = (urlparse(url).hostname or "").lower().rstrip(".")
+    if not host or _is_ip(host):
+        return host
+    psl = _public_suffix_list()
+    return (psl.privatesuffix(host) if psl is not None else None) or host
+
+
+def _is_ip(host: str) -> bool:
+    try:
+        ipaddress.ip_address(host)
+    except ValueError:
+        return False
+    return True
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: int) -> None:
+        self.rate = max(rate, 1e-6)
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def take(self) -> None:
+        # Waiters queue on the lock, so tokens are handed out in arrival order
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class CrawlScheduler:
+    """
+    Central politeness gate for outbound page fetches. A fetch waits for a per-host
+    concurrency slot, then a token from its domain's bucket, then a global slot, so a
+    throttled domain never holds global capacity while it waits. Time spent queued is
+    tracked as the queue-wait metric (later_scrape_queue_wait_seconds).
+    """
+
+    def __init__(self) -> None:
+        self._global: asyncio.Semaphore | None = None
+        self._hosts: IdleMap[asyncio.Semaphore] = IdleMap(
+            lambda: asyncio.Semaphore(max(1, settings.scrape_host_concurrency)), lambda: settings.scrape_state_idle_seconds
+        )
+        # A bucket idle for burst/rate seconds is full again, so dropping it after that loses no state
+        self._buckets: IdleMap[TokenBucket] = IdleMap(
+            lambda: TokenBucket(settings.scrape_domain_rate_per_second, settings.scrape_domain_burst),
+            lambda: max(settings.scrape_state_idle_seconds, settings.scrape_domain_burst / max(settings.scrape_domain_rate_per_second, 1e-6)),
+        )
+        self.in_flight = 0
+        self.fetches = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def _global_semaphore(self) -> asyncio.Semaphore:
+        if self._global is None:
+            self._global = asyncio.Semaphore(max(1, settings.scrape_global_concurrency))
+        return self._global
+
+    @asynccontextmanager
+    async def slot(self, url: str) -> AsyncIterator[float]:
+        """Hold a politeness slot for one fetch of url; yields the seconds spent queued."""
+        queued = time.monotonic()
+        host, domain = (urlparse(url).hostname or "").lower(), domain_of(url)
+        # Entries are held while in use (queued included), so idle eviction never splits a host's queue
+        with self._hosts.hold(host) as host_sem, self._buckets.hold(domain) as bucket:
+            async with host_sem:
+                await bucket.take()
+                async with self._global_semaphore():
+                    waited = time.monotonic() - queued
+                    SCRAPE_QUEUE_WAIT_SECONDS.observe(waited)
+                    self.fetches += 1
+                    self.wait_total += waited
+                    self.wait_max = max(self.wait_max, waited)
+                    if waited > 1.0:
+                        logger.info("[crawl_scheduler] %s queued %.2fs", domain, waited)
+                    self.in_flight += 1
+                    try:
+                        yield waited
+                    finally:
+                        self.in_flight -= 1
+
+    def stats(self) -> dict[str, float]:
+        return {
+            "fetches": self.fetches,
+            "in_flight": self.in_flight,
+            "queue_wait_avg_ms": round(self.wait_total / self.fetches * 1000, 1) if self.fetches else 0.0,
+            "queue_wait_max_ms": round(self.wait_max * 1000, 1),
+            "domains": len(self._buckets),
+            "evicted": self._hosts.evicted + self._buckets.evicted,
+        }
+
+
+crawl_scheduler = CrawlScheduler()
@@ -1,6 +1,18 @@
 import asyncpg
 from typing import Any, Sequence
 from .config import settings
+from .metrics import observe_dependency
+from .pgvector import register_vector_codec
+
+
+async def _init_connection(conn: asyncpg.Connection) -> None:
+    if await register_vector_codec(conn):
+        # Session defaults for ANN recall/latency (cross-tool retrieval; tool-scoped scans are exact)
+        await conn.execute(
+            "SELECT set_config('ivfflat.probes', $1, false), set_config('hnsw.ef_search', $2, false)",
+            str(settings.vector_index_probes),
+            str(settings.hnsw_ef_search),
+        )
 
 
 class Database:
@@ -11,7 +23,7 @@ class Database:
         if self.pool is None:
             # Keep pool very small to avoid exhausting Supabase session pooler limits
             self.pool = await asyncpg.create_pool(
-                dsn=settings.database_url.get_secret_value(), min_size=1, max_size=2
+                dsn=settings.database_url.get_secret_value(), min_size=1, max_size=2, init=_init_connection
             )
 
     async def disconnect(self) -> None:
@@ -21,19 +33,23 @@ class Database:
 
     async def fetchrow(self, query: str, *args: Any) -> asyncpg.Record | None:
         assert self.pool is not None, "Database not connected"
-        return await self.pool.fetchrow(query, *args)
+        with observe_dependency("db", "fetchrow"):
+            return await self.pool.fetchrow(query, *args)
 
     async def fetch(self, query: str, *args: Any) -> Sequence[asyncpg.Record]:
         assert self.pool is not None, "Database not connected"
-        return await self.pool.fetch(query, *args)
+        with observe_dependency("db", "fetch"):
+            return await self.pool.fetch(query, *args)
 
     async def execute(self, query: str, *args: Any) -> str:
         assert self.pool is not None, "Database not connected"
-        return await self.pool.execute(query, *args)
+        with observe_dependency("db", "execute"):
+            return await self.pool.execute(query, *args)
 
     async def executemany(self, query: str, args: list[tuple[Any, ...]]) -> str:
         assert self.pool is not None, "Database not connected"
-        return await self.pool.executemany(query, args)
+        with observe_dependency("db", "executemany"):
+            return await self.pool.executemany(query, args)
 
 
 db = Database()
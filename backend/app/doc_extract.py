@@ -0,0 +1,199 @@
+import io
+import json
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Literal, Optional
+from .extract import MAX_TEXT_CHARS, clean_lines, html_to_text
+
+logger = logging.getLogger(__name__)
+
+DocKind = Literal["html", "pdf", "json", "feed", "text"]
+
+# Entries kept from one feed (newest first)
+MAX_FEED_ENTRIES = 50
+
+
+@dataclass
+class FeedEntry:
+    title: str
+    link: str
+    entry_id: str
+    published: Optional[str] = None  # ISO-8601
+    summary: str = ""
+
+    @property
+    def published_at(self) -> Optional[datetime]:
+        return datetime.fromisoformat(self.published) if self.published else None
+
+    def render(self) -> str:
+        head = f"{self.title} ({self.published[:10]})" if self.published else self.title
+        return "\n".join(x for x in (head, self.link, self.summary) if x)
+
+
+@dataclass
+class ExtractedDocument:
+    kind: DocKind
+    text: str
+    entries: list[FeedEntry] = field(default_factory=list)
+
+
+def sniff_kind(content_type: Optional[str], body: bytes) -> DocKind:
+    """Pick an extractor from the Content-Type, falling back to the leading bytes."""
+    ct = (content_type or "").split(";")[0].strip().lower()
+    head = body[:512].lstrip().lower()
+    if ct == "application/pdf" or head.startswith(b"%pdf-"):
+        return "pdf"
+    if ct in ("application/rss+xml", "application/atom+xml"):
+        return "feed"
+    if ct.endswith("/json") or ct.endswith("+json"):
+        return "json"
+    if ct in ("text/xml", "application/xml") or head.startswith(b"<?xml") or head.startswith(b"<rss") or head.startswith(b"<feed"):
+        # Generic XML may be a feed; check for the root element
+        if b"<rss" in head or b"<feed" in head or b"<rdf:rdf" in head:
+            return "feed"
+    if ct == "text/plain":
+        return "text"
+    if not ct and head[:1] in (b"{", b"["):
+        return "json"
+    return "html"
+
+
+def pdf_to_text(body: bytes, truncated: bool = False) -> str:
+    """
+    Page-by-page PDF text, stopping once MAX_TEXT_CHARS is reached (pypdf). A malformed or
+    cut-off PDF yields the pages read before the error (often none) rather than raising, so it
+    is not mistaken for a failed fetch.
+    """
+    try:
+        from pypdf import PdfReader
+    except ImportError:
+        logger.warning("[doc_extract] pypdf not installed; skipping PDF")
+        return ""
+    parts: list[str] = []
+    total = 0
+    try:
+        reader = PdfReader(io.BytesIO(body))
+        for page in reader.pages:
+            text = page.extract_text() or ""
+            parts.append(text)
+            total += len(text)
+            if total >= MAX_TEXT_CHARS:
+                break
+    except Exception as e:
+        # pypdf raises PdfReadError/PdfStreamError and assorted builtins on damaged files
+        logger.info("[doc_extract] PDF unreadable after %d pages (truncated=%s): %s: %s", len(parts), truncated, type(e).__name__, e)
+    return clean_lines("\n".join(parts))
+
+
+def json_to_text(body: bytes, encoding: Optional[str] = None) -> str:
+    """Flatten JSON into "path: value" lines so keys stay searchable next to their values."""
+    data = json.loads(body.decode(encoding or "utf-8", errors="replace"))
+    lines: list[str] = []
+    total = 0
+
+    def walk(node: Any, path: str) -> None:
+        nonlocal total
+        if total >= MAX_TEXT_CHARS:
+            return
+        if isinstance(node, dict):
+            for k, v in node.items():
+                walk(v, f"{path}.{k}" if path else str(k))
+        elif isinstance(node, list):
+            for i, v in enumerate(node):
+                walk(v, f"{path}[{i}]")
+        elif node is not None and node != "":
+            line = f"{path}: {node}" if path else str(node)
+            lines.append(line)
+            total += len(line) + 1
+
+    walk(data, "")
+    return clean_lines("\n".join(lines))
+
+
+def _parse_date(value: Optional[str]) -> Optional[str]:
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        dt = parsedate_to_datetime(value)  # RSS (RFC 822)
+    except (TypeError, ValueError):
+        try:
+            dt = datetime.fromisoformat(value.replace("Z", "+00:00"))  # Atom (RFC 3339)
+        except ValueError:
+            return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.isoformat()
+
+
+def _local(tag: Any) -> str:
+    return tag.rsplit("}", 1)[-1].lower() if isinstance(tag, str) else ""
+
+
+def parse_feed(body: bytes) -> list[FeedEntry]:
+    """
+    Stream RSS 2.0 / RSS 1.0 / Atom entries with lxml.iterparse, newest first. A body cut off at
+    the byte cap keeps the entries parsed so far.
+    """
+    from lxml import etree
+
+    entries: list[FeedEntry] = []
+    parser = etree.iterparse(io.BytesIO(body), events=("end",), recover=True, resolve_entities=False, no_network=True)
+    try:
+        for _, el in parser:
+            if _local(el.tag) not in ("item", "entry"):
+                continue
+            fields: dict[str, str] = {}
+            for child in el:
+                name = _local(child.tag)
+                if name == "link" and child.get("href"):
+                    if child.get("rel", "alternate") == "alternate":
+                        fields.setdefault("link", child.get("href") or "")
+                    continue
+                text = (child.text or "").strip()
+                if text:
+                    fields.setdefault(name, text)
+            summary = fields.get("summary") or fields.get("description") or fields.get("content") or ""
+            entry = FeedEntry(
+                title=fields.get("title", ""),
+                link=fields.get("link", ""),
+                entry_id=fields.get("guid") or fields.get("id") or fields.get("link", ""),
+                published=_parse_date(fields.get("published") or fields.get("pubdate") or fields.get("updated") or fields.get("date")),
+                # Summaries are often escaped HTML; flatten to one paragraph
+                summary=" ".join((html_to_text(summary) if "<" in summary else summary).split())[:4000],
+            )
+            entries.append(entry)
+            # Free parsed elements as we go; feeds can be large
+            el.clear()
+    except etree.XMLSyntaxError:
+        logger.info("[doc_extract] feed truncated or malformed after %d entries", len(entries))
+    oldest = datetime.min.replace(tzinfo=timezone.utc)
+    entries.sort(key=lambda e: e.published_at or oldest, reverse=True)
+    return entries[:MAX_FEED_ENTRIES]
+
+
+def feed_to_text(entries: list[FeedEntry]) -> str:
+    return clean_lines("\n\n".join(e.render() for e in entries))
+
+
+def extract_document(
+    content_type: Optional[str], body: bytes, encoding: Optional[str] = None, truncated: bool = False
+) -> ExtractedDocument:
+    """Dispatch a fetched body to the extractor for its sniffed kind."""
+    kind = sniff_kind(content_type, body)
+    if kind == "pdf":
+        return ExtractedDocument(kind, pdf_to_text(body, truncated))
+    if kind == "json":
+        try:
+            return ExtractedDocument(kind, json_to_text(body, encoding))
+        except ValueError:
+            kind = "text"
+    if kind == "feed":
+        entries = parse_feed(body)
+        return ExtractedDocument(kind, feed_to_text(entries), entries)
+    text = body.decode(encoding or "utf-8", errors="replace")
+    if kind == "text":
+        return ExtractedDocument(kind, clean_lines(text))
+    return ExtractedDocument("html", html_to_text(text))
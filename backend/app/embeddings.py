@@ -1,16 +1,146 @@
+import asyncio
+import hashlib
+import logging
+import re
 from typing import List
-from openai import AsyncOpenAI
+import numpy as np
+from openai import AsyncOpenAI, RateLimitError
+from tenacity import AsyncRetrying, retry_if_exception_type, stop_after_attempt, wait_exponential_jitter
 from .config import settings
+from .db import db
+from .metrics import observe_dependency, record_cache, record_usage
 
-BATCH_SIZE = 64
+logger = logging.getLogger(__name__)
 
+# OpenAI caps a single embeddings request at 2048 inputs
+MAX_BATCH_INPUTS = 2048
 
-async def embed_texts(texts: List[str]) -> list[list[float]]:
-    client = AsyncOpenAI(api_key=settings.openai_api_key.get_secret_value())
-    embeddings: list[list[float]] = []
-    for i in range(0, len(texts), BATCH_SIZE):
-        batch = texts[i : i + BATCH_SIZE]
-        resp = await client.embeddings.create(model=settings.embeddings_model, input=batch, timeout=30.0)
-        embeddings.extend([d.embedding for d in resp.data])  # type: ignore[attr-defined]
-    return embeddings
 
+def chunk_hash(text: str) -> str:
+    """
+    Content hash of a chunk after whitespace normalization; stored in documents.chunk_hash
+    and used as the embedding cache key.
+    """
+    normalized = re.sub(r"\s+", " ", text or "").strip()
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def estimate_tokens(text: str) -> int:
+    # ~4 chars per token for English text; good enough for sizing batches
+    return len(text) // 4 + 1
+
+
+class EmbeddingService:
+    """
+    Process-wide embedding client: one pooled AsyncOpenAI client, batches sized by an
+    approximate token budget, a bounded number of batches in flight, and backoff on 429s.
+    """
+
+    def __init__(self) -> None:
+        self._client: AsyncOpenAI | None = None
+        self._semaphore: asyncio.Semaphore | None = None
+
+    @property
+    def client(self) -> AsyncOpenAI:
+        if self._client is None:
+            self._client = AsyncOpenAI(api_key=settings.openai_api_key.get_secret_value())
+        return self._client
+
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(max(1, settings.embeddings_concurrency))
+        return self._semaphore
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+
+    @staticmethod
+    def make_batches(texts: List[str], token_budget: int) -> list[list[str]]:
+        batches: list[list[str]] = []
+        current: list[str] = []
+        used = 0
+        for t in texts:
+            cost = estimate_tokens(t)
+            if current and (used + cost > token_budget or len(current) >= MAX_BATCH_INPUTS):
+                batches.append(current)
+                current, used = [], 0
+            current.append(t)
+            used += cost
+        if current:
+            batches.append(current)
+        return batches
+
+    async def _embed_batch(self, batch: List[str]) -> list[np.ndarray]:
+        async with self.semaphore:
+            async for attempt in AsyncRetrying(
+                retry=retry_if_exception_type(RateLimitError),
+                stop=stop_after_attempt(max(1, settings.embeddings_max_retries)),
+                wait=wait_exponential_jitter(initial=1, max=20),
+                reraise=True,
+            ):
+                with attempt, observe_dependency("openai_embeddings", settings.embeddings_model):
+                    resp = await self.client.embeddings.create(model=settings.embeddings_model, input=batch, timeout=30.0)
+        record_usage(settings.embeddings_model, getattr(resp, "usage", None))
+        return [np.asarray(d.embedding, dtype=np.float32) for d in resp.data]  # type: ignore[attr-defined]
+
+    async def embed(self, texts: List[str]) -> list[np.ndarray]:
+        if not texts:
+            return []
+        batches = self.make_batches(texts, max(1, settings.embeddings_batch_tokens))
+        results = await asyncio.gather(*(self._embed_batch(b) for b in batches))
+        return [vec for batch in results for vec in batch]
+
+
+embedding_service = EmbeddingService()
+
+
+async def embed_texts(texts: List[str]) -> list[np.ndarray]:
+    return await embedding_service.embed(texts)
+
+
+async def embed_texts_cached(texts: List[str]) -> list[np.ndarray]:
+    """
+    Embed texts via the persistent embedding_cache table.
+    Duplicate chunks within the batch are embedded once; only cache misses reach OpenAI.
+    Cache read/write failures degrade to plain embedding.
+    """
+    if not texts:
+        return []
+    model = settings.embeddings_model
+    hashes = [chunk_hash(t) for t in texts]
+    unique: dict[str, str] = {}
+    for h, t in zip(hashes, texts):
+        unique.setdefault(h, t)
+
+    found: dict[str, np.ndarray] = {}
+    try:
+        rows = await db.fetch(
+            "SELECT content_hash, embedding FROM embedding_cache WHERE model = $1 AND content_hash = ANY($2::text[])",
+            model,
+            list(unique),
+        )
+        for r in rows:
+            found[r["content_hash"]] = r["embedding"]
+    except Exception:
+        logger.warning("[embeddings] cache lookup failed; embedding without cache", exc_info=True)
+        found = {}
+
+    missing = [h for h in unique if h not in found]
+    if missing:
+        vecs = await embed_texts([unique[h] for h in missing])
+        fresh = dict(zip(missing, vecs))
+        found.update(fresh)
+        try:
+            await db.executemany(
+                "INSERT INTO embedding_cache (content_hash, model, embedding) VALUES ($1, $2, $3) ON CONFLICT DO NOTHING",
+                [(h, model, v) for h, v in fresh.items()],
+            )
+        except Exception:
+            logger.warning("[embeddings] cache write failed", exc_info=True)
+    record_cache("embedding", "hit", len(unique) - len(missing))
+    record_cache("embedding", "miss", len(missing))
+    logger.info("[embeddings] texts=%d unique=%d cache_hits=%d embedded=%d", len(texts), len(unique), len(unique) - len(missing), len(missing))
+    return [found[h] for h in hashes]
@@ -0,0 +1,156 @@
+import logging
+import re
+from typing import Callable
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+MAX_TEXT_CHARS = 200_000  # cap to avoid overly large prompts
+
+# Never content: scripts/styles and embedded media
+NON_CONTENT_TAGS = ["script", "style", "noscript", "template", "svg", "iframe", "canvas"]
+# Page chrome dropped by the fast engines. Not <form>: ASP.NET WebForms pages wrap the whole body in one
+BOILERPLATE_TAGS = ["nav", "footer", "aside", "dialog"]
+# An engine whose text is below this share of the HTML size (on pages over MIN_HTML_FOR_RATIO bytes)
+# probably stripped the content itself; the next engine is tried and the longest text wins
+MIN_TEXT_RATIO = 0.005
+MIN_HTML_FOR_RATIO = 2_000
+# id/class tokens marking cookie banners and consent/newsletter overlays
+BOILERPLATE_KEYWORDS = ["cookie", "consent", "gdpr", "onetrust", "newsletter", "popup"]
+BOILERPLATE_ATTR_RE = re.compile(r"(^|[-_\s])(cookie|cookies|consent|gdpr|onetrust|newsletter|popup)([-_\s]|$)", re.I)
+# Substring prefilter so only candidate nodes reach Python; the regex then checks token boundaries
+_BOILERPLATE_CSS = ", ".join(f'[id*="{k}" i], [class*="{k}" i]' for k in BOILERPLATE_KEYWORDS)
+# Never drop these wholesale even if a class matches (e.g. <body class="cookie-consent-open">)
+_PROTECTED_TAGS = {"html", "body", "main", "article"}
+
+
+def clean_lines(text: str) -> str:
+    # collapse whitespace and drop very short lines; stop once the cap is reached
+    lines: list[str] = []
+    total = 0
+    for raw in text.splitlines():
+        ln = " ".join(raw.split())
+        if len(ln) < 3:
+            continue
+        lines.append(ln)
+        total += len(ln) + 1
+        if total >= MAX_TEXT_CHARS:
+            break
+    return "\n".join(lines)[:MAX_TEXT_CHARS]
+
+
+def _is_boilerplate(tag: str, attrs: str) -> bool:
+    return tag not in _PROTECTED_TAGS and bool(BOILERPLATE_ATTR_RE.search(attrs))
+
+
+def extract_selectolax(html: str) -> str:
+    from selectolax.lexbor import LexborHTMLParser
+
+    tree = LexborHTMLParser(html)
+    tree.strip_tags(NON_CONTENT_TAGS + BOILERPLATE_TAGS)
+    matched = [
+        node
+        for node in tree.css(_BOILERPLATE_CSS)
+        if _is_boilerplate(node.tag, f"{node.attributes.get('id') or ''} {node.attributes.get('class') or ''}")
+    ]
+    # Decompose outermost matches only; touching a node freed with its ancestor is unsafe in lexbor
+    matched_ids = {node.mem_id for node in matched}
+    for node in matched:
+        parent = node.parent
+        while parent is not None and parent.mem_id not in matched_ids:
+            parent = parent.parent
+        if parent is None:
+            node.decompose()
+    root = tree.body or tree.root
+    return clean_lines(root.text(separator="\n") if root is not None else "")
+
+
+def extract_lxml(html: str) -> str:
+    import lxml.html
+    from lxml import etree
+
+    if not html.strip():
+        return ""
+    doc = lxml.html.document_fromstring(html)
+    etree.strip_elements(doc, *(NON_CONTENT_TAGS + BOILERPLATE_TAGS), etree.Comment, with_tail=False)
+    # A plain iter() walk is several times faster here than an equivalent XPath predicate
+    matched = [
+        el
+        for el in doc.iter()
+        if isinstance(el.tag, str)
+        and (el.get("id") or el.get("class"))
+        and _is_boilerplate(el.tag, f"{el.get('id') or ''} {el.get('class') or ''}")
+    ]
+    for el in matched:
+        # Skip nodes already removed with a matched ancestor
+        if el.getparent() is not None and el.getroottree().getroot() is doc:
+            el.drop_tree()
+    body = doc.find("body")
+    root = body if body is not None else doc
+    return clean_lines("\n".join(root.itertext()))
+
+
+def extract_html_parser(html: str) -> str:
+    # Original pure-Python path; kept as the always-available fallback
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, "html.parser")
+    # remove non-content
+    for tag in soup(["script", "style", "noscript", "template"]):
+        tag.decompose()
+    return clean_lines(soup.get_text(separator="\n"))
+
+
+ENGINES: dict[str, Callable[[str], str]] = {
+    "selectolax": extract_selectolax,
+    "lxml": extract_lxml,
+    "html.parser": extract_html_parser,
+}
+
+
+def html_to_text(html: str, engine: str | None = None) -> str:
+    """
+    Extract visible, boilerplate-free text with the configured engine, falling back through
+    lxml and finally BeautifulSoup's html.parser when an engine is missing, fails, or returns
+    empty / suspiciously short text for the page.
+    """
+    preferred = engine or settings.html_extractor
+    order = [preferred] + [name for name in ENGINES if name != preferred]
+    best = ""
+    for name in order:
+        fn = ENGINES.get(name)
+        if fn is None:
+            continue
+        try:
+            text = fn(html)
+        except ImportError:
+            continue
+        except Exception:
+            logger.warning("[extract] engine=%s failed; falling back", name, exc_info=True)
+            continue
+        if len(text) > len(best):
+            best = text
+        if not _too_short(text, html):
+            return text
+        logger.info("[extract] engine=%s returned %d chars for %d bytes of HTML; falling back", name, len(text), len(html))
+    return best
+
+
+def _too_short(text: str, html: str) -> bool:
+    if not text:
+        return bool(html.strip())
+    return len(html) > MIN_HTML_FOR_RATIO and len(text) < len(html) * MIN_TEXT_RATIO
+
+
+def extract_links(html: str) -> list[str]:
+    """Raw href values of <a> tags, in document order (selectolax, else lxml)."""
+    try:
+        from selectolax.lexbor import LexborHTMLParser
+
+        return [href for node in LexborHTMLParser(html).css("a[href]") if (href := node.attributes.get("href"))]
+    except ImportError:
+        import lxml.html
+
+        if not html.strip():
+            return []
+        return [str(href) for href in lxml.html.document_fromstring(html).xpath("//a/@href")]
@@ -0,0 +1,159 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any, AsyncIterator
+from urllib.parse import urlparse
+import httpx
+from .config import settings
+from .idle_map import IdleMap
+from .metrics import observe_dependency
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Download:
+    """A streamed GET whose body may have been cut off at the byte cap."""
+
+    response: httpx.Response
+    body: bytes
+    truncated: bool
+
+    @property
+    def status_code(self) -> int:
+        return self.response.status_code
+
+    @property
+    def headers(self) -> httpx.Headers:
+        return self.response.headers
+
+    @property
+    def text(self) -> str:
+        return self.body.decode(self.response.charset_encoding or "utf-8", errors="replace")
+
+    def raise_for_status(self) -> None:
+        self.response.raise_for_status()
+
+
+class Fetcher:
+    """
+    Process-wide HTTP client shared by scraping and Telegram calls.
+    One pooled httpx.AsyncClient (HTTP/2, keep-alive) plus a per-host concurrency cap,
+    created in the FastAPI startup hook and closed on shutdown.
+    """
+
+    def __init__(self) -> None:
+        self._client: httpx.AsyncClient | None = None
+        self._host_semaphores: IdleMap[asyncio.Semaphore] = IdleMap(
+            lambda: asyncio.Semaphore(max(1, settings.http_max_connections_per_host)),
+            lambda: settings.scrape_state_idle_seconds,
+        )
+        self.requests = 0
+        self.failures = 0
+        self.new_connections = 0
+        self.tls_handshakes = 0
+
+    @staticmethod
+    def _build_client() -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            http2=settings.http2_enabled,
+            timeout=20,
+            limits=httpx.Limits(
+                max_connections=settings.http_max_connections,
+                max_keepalive_connections=settings.http_max_keepalive_connections,
+                keepalive_expiry=settings.http_keepalive_expiry_seconds,
+            ),
+        )
+
+    async def start(self) -> None:
+        if self._client is None:
+            self._client = self._build_client()
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        logger.info("[fetcher] closed %s", self.stats())
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            # Scripts and background tasks may run without the FastAPI startup hook
+            self._client = self._build_client()
+        return self._client
+
+    @asynccontextmanager
+    async def _host_slot(self, url: str) -> AsyncIterator[None]:
+        # Held (not evictable) while queued on or holding the semaphore; dropped once the host goes idle
+        with self._host_semaphores.hold((urlparse(url).hostname or "").lower()) as sem:
+            async with sem:
+                yield
+
+    async def _trace(self, event: str, info: dict[str, Any]) -> None:
+        # httpcore trace hook: a request that does not open a TCP connection reused a pooled one
+        if event == "connection.connect_tcp.complete":
+            self.new_connections += 1
+        elif event == "connection.start_tls.complete":
+            self.tls_handshakes += 1
+
+    async def request(self, method: str, url: str, **kwargs: Any) -> httpx.Response:
+        extensions = dict(kwargs.pop("extensions", None) or {})
+        extensions.setdefault("trace", self._trace)
+        async with self._host_slot(url):
+            try:
+                with observe_dependency("http_fetch", method):
+                    resp = await self.client.request(method, url, extensions=extensions, **kwargs)
+            except Exception:
+                self.failures += 1
+                raise
+        self.requests += 1
+        return resp
+
+    async def get_capped(self, url: str, max_bytes: int, pdf_max_bytes: int | None = None, **kwargs: Any) -> Download:
+        """
+        Stream a GET and stop reading once max_bytes have arrived, so oversized pages
+        never sit fully in memory. The connection is released when the stream closes.
+        pdf_max_bytes, if given, replaces the cap for responses served as application/pdf.
+        """
+        extensions = dict(kwargs.pop("extensions", None) or {})
+        extensions.setdefault("trace", self._trace)
+        parts: list[bytes] = []
+        size = 0
+        truncated = False
+        async with self._host_slot(url):
+            try:
+                with observe_dependency("http_fetch", "GET"):
+                    async with self.client.stream("GET", url, extensions=extensions, **kwargs) as resp:
+                        if pdf_max_bytes is not None and resp.headers.get("content-type", "").lower().startswith("application/pdf"):
+                            max_bytes = pdf_max_bytes
+                        async for chunk in resp.aiter_bytes():
+                            parts.append(chunk)
+                            size += len(chunk)
+                            if size >= max_bytes:
+                                truncated = True
+                                break
+            except Exception:
+                self.failures += 1
+                raise
+        self.requests += 1
+        return Download(response=resp, body=b"".join(parts)[:max_bytes], truncated=truncated)
+
+    async def get(self, url: str, **kwargs: Any) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs: Any) -> httpx.Response:
+        return await self.request("POST", url, **kwargs)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "requests": self.requests,
+            "failures": self.failures,
+            "new_connections": self.new_connections,
+            "tls_handshakes": self.tls_handshakes,
+            # Approximate: redirects and failed attempts can also open connections
+            "reused_connections": max(0, self.requests - self.new_connections),
+        }
+
+
+fetcher = Fetcher()
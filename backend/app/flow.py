@@ -1,43 +1,145 @@
-from typing import TypedDict, Any, Optional, List
+from typing import TypedDict, Any, Optional, List, Annotated
+import operator
+import asyncio
 from langgraph.graph import StateGraph, END
 from .canonical import canonicalize_url
-from .scrape import fetch_clean_text
-from .link_classify import fetch_text_for_url, classify_link
+from .host_health import FetchSkipped
+from .site_crawl import crawl_site
+from .link_classify import fetch_document, fetch_text_for_url, classify_link
+from .scrape import stale_document
+from .doc_extract import ExtractedDocument
 from .chunk import recursive_character_split
-from .embeddings import embed_texts
+from .embeddings import embed_texts_cached, chunk_hash
 from .research import synthesize_one_pager, pick_five_claims, resolve_official_site_via_llm, classify_screenshot_intent
 from .juror import verify_claims
 from .db import db
+from .vector_cache import vector_cache
 import json
 from langsmith import traceable
-from tavily import TavilyClient
+from .search import search_client
+from .checkpoints import checkpoints
+from .metrics import CHUNKS, FLOWS_IN_FLIGHT, observe_node
+from .singleflight import flight_key, ingest_flights
 from .config import settings
 import re
 from datetime import datetime, timezone, timedelta
 from .validators import is_plausible_product_name
 
 
+class InvalidIngestRequest(ValueError):
+    """The request itself is unusable (e.g. no URL and an implausible product name); retrying cannot help."""
+
+
 class FlowState(TypedDict, total=False):
     url: Optional[str]
     name: Optional[str]
     force: bool
     user_id: Optional[str]
+    # Checkpoint key (the job id); runs without one are not checkpointed
+    run_id: Optional[str]
     canonical_url: Optional[str]
     source_url: Optional[str]
+    # Sources whose chunks make up clean_text (the page, or each feed entry); see checkpoints.rehydrate
+    source_urls: List[str]
     tool_id: Optional[str]
     status: str
     ocr_text: Optional[str]
+    screenshot_intent: Optional[str]
     clean_text: str
     chunks: List[str]
-    embeddings: List[List[float]]
     one_pager: dict[str, Any]
     verdicts: list[tuple[str, bool, str]]
     augmented_urls: List[str]
     augmented_media: List[dict]
+    # URLs not fetched because they recently failed or their host's circuit is open
+    skipped_urls: Annotated[List[dict], operator.add]
     skip_processing: bool
 
 
+async def sync_source_chunks(tool_id: str, sources: dict[str, List[str]]) -> dict[str, int]:
+    """
+    Diff chunks per source_url against the stored chunk hashes and apply the minimum change:
+    unchanged chunks are skipped, new/changed ones are embedded and upserted, trailing ones deleted.
+    Each kind of write is a single batched statement across all sources.
+    """
+    stats = {"unchanged": 0, "upserted": 0, "deleted": 0}
+    if not sources:
+        return stats
+    rows = await db.fetch(
+        "SELECT source_url, chunk_index, chunk_hash FROM documents WHERE tool_id = $1::uuid AND source_url = ANY($2::text[])",
+        tool_id,
+        list(sources),
+    )
+    stored: dict[str, dict[int, Optional[str]]] = {}
+    for r in rows:
+        stored.setdefault(r["source_url"], {})[r["chunk_index"]] = r["chunk_hash"]
+
+    pending: list[tuple[str, int, str, str]] = []
+    trims: list[tuple[str, str, int]] = []
+    for src, chunks in sources.items():
+        existing = stored.get(src, {})
+        for idx, text in enumerate(chunks):
+            h = chunk_hash(text)
+            if existing.get(idx) == h:
+                stats["unchanged"] += 1
+            else:
+                pending.append((src, idx, h, text))
+        stale = sum(1 for i in existing if i >= len(chunks))
+        if stale:
+            trims.append((tool_id, src, len(chunks)))
+            stats["deleted"] += stale
+
+    if pending:
+        embeds = await embed_texts_cached([text for (_, _, _, text) in pending])
+        await db.executemany(
+            """
+            INSERT INTO documents (tool_id, source_url, chunk_index, chunk_hash, chunk_text, chunk_embedding, last_crawled)
+            VALUES ($1::uuid, $2, $3, $4, $5, $6::vector, now())
+            ON CONFLICT (tool_id, source_url, chunk_index) DO UPDATE
+            SET chunk_hash = EXCLUDED.chunk_hash,
+                chunk_text = EXCLUDED.chunk_text,
+                chunk_embedding = EXCLUDED.chunk_embedding,
+                last_crawled = EXCLUDED.last_crawled
+            """,
+            [(tool_id, src, idx, h, text, vec) for (src, idx, h, text), vec in zip(pending, embeds)],
+        )
+        stats["upserted"] = len(pending)
+    if trims:
+        await db.executemany(
+            "DELETE FROM documents WHERE tool_id = $1::uuid AND source_url = $2 AND chunk_index >= $3",
+            trims,
+        )
+    for outcome, n in stats.items():
+        CHUNKS.labels(outcome).inc(n)
+    return stats
+
+
+def feed_entry_sources(feed_url: str, doc: ExtractedDocument) -> dict[str, List[str]]:
+    """
+    One source per feed entry, keyed by its link. Every entry is synced (back-dated and late
+    entries included); sync_source_chunks only embeds entries whose text changed. The feed URL
+    itself maps to no chunks, so a page stored under it before it became a feed is removed.
+    """
+    sources = {e.link or f"{feed_url}#{e.entry_id}": recursive_character_split(e.render()) for e in doc.entries}
+    sources.setdefault(feed_url, [])
+    return sources
+
+
+async def _has_fresh_version(tool_id: str) -> bool:
+    """A latest version created within 6 hours lets non-forced ingests skip heavy processing."""
+    try:
+        ver = await db.fetchrow(
+            "SELECT created_at FROM tool_versions WHERE tool_id = $1::uuid AND is_latest = TRUE",
+            tool_id,
+        )
+    except Exception:
+        return False
+    created_at = ver["created_at"] if ver else None
+    return isinstance(created_at, datetime) and (datetime.now(timezone.utc) - created_at) < timedelta(hours=6)
+
+
 @traceable(name="resolve_tool")
+@observe_node("resolve_tool")
 async def resolve_tool(state: FlowState) -> FlowState:
     url = state.get("url")
     name = state.get("name")
@@ -48,6 +150,21 @@ async def resolve_tool(state: FlowState) -> FlowState:
     status = "pending_research"
     url_official: Optional[str] = None
 
+    if state.get("tool_id"):
+        # Resolved by the API before the job was queued (including any forced DELETE): reuse it
+        # rather than repeating the search + LLM pick, which could land on a different tool
+        tool_id = str(state["tool_id"])
+        canonical = state.get("canonical_url") or canonical
+        return {
+            "canonical_url": canonical,
+            "original_url": url,
+            "url_official": canonical,
+            "tool_id": tool_id,
+            "status": status,
+            # Another job may have finished this tool while this one was queued
+            "skip_processing": not force and await _has_fresh_version(tool_id),
+        }
+
     # If name only, attempt to discover official site using both search + LLM arbiter
     if not canonical and name:
         candidates_for_llm: list[str] = []
@@ -55,7 +172,6 @@ async def resolve_tool(state: FlowState) -> FlowState:
         # Gather candidates via Tavily, if available
         if settings.tavily_api_key:
             try:
-                client = TavilyClient(api_key=settings.tavily_api_key.get_secret_value())  # type: ignore[arg-type]
                 queries = [
                     f"{name} official site",
                     f"{name} homepage",
@@ -65,8 +181,8 @@ async def resolve_tool(state: FlowState) -> FlowState:
                     f"site:wikipedia.org {name}",
                 ]
                 seen_c = set()
-                for q in queries:
-                    res = client.search(query=q, max_results=8)
+                # All candidate searches run concurrently; results are merged in query order
+                for res in await search_client.search_many(queries, max_results=8, query_class="resolve"):
                     for item in res.get("results", []):
                         title = item.get("title") or ""
                         u = item.get("url") or ""
@@ -114,26 +230,15 @@ async def resolve_tool(state: FlowState) -> FlowState:
             tool_id = str(existing["id"])
             status = existing["status"]
             # If a recent version exists within 6 hours and not forced, skip heavy processing
-            try:
-                ver = await db.fetchrow(
-                    "SELECT created_at FROM tool_versions WHERE tool_id = $1::uuid AND is_latest = TRUE",
-                    tool_id,
-                )
-                if ver:
-                    created_at = ver["created_at"]
-                    if isinstance(created_at, datetime):
-                        now = datetime.now(timezone.utc)
-                        if (now - created_at) < timedelta(hours=6) and not force:
-                            return {
-                                "canonical_url": canonical,
-                                "original_url": url,
-                                "url_official": canonical,
-                                "tool_id": tool_id,
-                                "status": status,
-                                "skip_processing": True,
-                            }
-            except Exception:
-                pass
+            if not force and await _has_fresh_version(tool_id):
+                return {
+                    "canonical_url": canonical,
+                    "original_url": url,
+                    "url_official": canonical,
+                    "tool_id": tool_id,
+                    "status": status,
+                    "skip_processing": True,
+                }
             if force:
                 await db.execute("DELETE FROM documents WHERE tool_id = $1::uuid AND source_url = $2", tool_id, url or "")
         url_official = canonical or url_official
@@ -147,18 +252,28 @@ async def resolve_tool(state: FlowState) -> FlowState:
     if not tool_id:
         # Validate name before creating new tool to avoid junk records
         if not canonical and not (name and is_plausible_product_name(name)):
-            raise ValueError("Invalid product name; cannot create tool")
+            raise InvalidIngestRequest("Invalid product name; cannot create tool")
         # Create new
+        # Idempotent on canonical_url: a worker that lost the race picks up the winner's row
         row = await db.fetchrow(
             """
             INSERT INTO tools (name, canonical_url, one_pager, embedding, category_tags, watchlist, status)
             VALUES ($1, $2, '{}'::jsonb, NULL, ARRAY[]::text[], FALSE, 'pending_research')
-            RETURNING id
+            ON CONFLICT (canonical_url) DO UPDATE SET canonical_url = EXCLUDED.canonical_url
+            RETURNING id, status, (xmax = 0) AS created
             """,
             name or (canonical or "unknown"),
             canonical,
         )
         tool_id = str(row["id"])
+        if not row["created"]:
+            return {
+                "canonical_url": canonical,
+                "original_url": url,
+                "url_official": url_official or canonical,
+                "tool_id": tool_id,
+                "status": row["status"],
+            }
         # Seed aliases
         aliases: list[tuple[str, str, float]] = []
         try:
@@ -187,6 +302,7 @@ async def resolve_tool(state: FlowState) -> FlowState:
 
 
 @traceable(name="ingest")
+@observe_node("ingest")
 async def ingest(state: FlowState) -> FlowState:
     if state.get("skip_processing"):
         # Return a benign update to satisfy LangGraph invariants
@@ -206,33 +322,67 @@ async def ingest(state: FlowState) -> FlowState:
         except Exception:
             return False
     use_url = url if (url and is_valid_http(str(url))) else None
+    doc: Optional[ExtractedDocument] = None
+    base_text: Optional[str] = None
+    skipped: List[dict] = []
     if use_url:
-        base_text = await fetch_text_for_url(url)
+        try:
+            doc = await fetch_document(url, primary=True)
+        except FetchSkipped as e:
+            # Host circuit open: use the last cached copy of the page, else fall back like the no-URL path
+            print(f"[flow.ingest] primary url skipped reason={e.reason}; using cached copy or OCR/name")
+            skipped.append(e.as_dict())
+            doc = await stale_document(str(url))
+    if doc is not None and doc.text.strip():
+        base_text = doc.text
         # Prefer OCR text as leading context if provided (e.g., screenshots of docs/pricing)
         clean_text = (ocr_text + "\n\n" + base_text) if ocr_text else base_text
     else:
-        # No URL — rely on OCR text when available, otherwise fall back to the provided name
+        # No URL (or nothing usable from it) — rely on OCR text when available, otherwise the provided name
         clean_text = ocr_text or name
     chunks = recursive_character_split(clean_text)
-    embeddings = await embed_texts(chunks) if chunks else []
-    print(f"[flow.ingest] done chunks={len(chunks)} embeds={len(embeddings)}")
-
-    args: list[tuple] = []
-    for idx, (text, vec) in enumerate(zip(chunks, embeddings)):
-        vec_str = "[" + ",".join(str(x) for x in vec) + "]"
-        # Preserve a non-empty source_url for provenance; fallback to provided source label for screenshots
-        src = str(url or state.get("source_url") or "")
-        args.append((tool_id, src, idx, text, vec_str))
-    if args:
-        await db.executemany(
-            "INSERT INTO documents (tool_id, source_url, chunk_index, chunk_text, chunk_embedding) VALUES ($1::uuid, $2, $3, $4, $5::vector)",
-            args,
-        )
-
-    return {"clean_text": clean_text, "chunks": chunks, "embeddings": embeddings}
+    # Preserve a non-empty source_url for provenance; fallback to provided source label for screenshots
+    src = str(url or state.get("source_url") or "")
+    sources: dict[str, List[str]] = {src: chunks}
+    if use_url and base_text is None:
+        # Nothing usable fetched (skipped, or e.g. an unreadable PDF): keep the page's stored chunks
+        # rather than replacing them with the OCR/name stand-in
+        sources = {}
+    elif doc is not None and doc.kind == "feed" and not ocr_text:
+        # Changelog/blog feed: index entries individually instead of the whole feed as one source
+        sources = feed_entry_sources(src, doc)
+        print(f"[flow.ingest] feed entries={len(doc.entries)}")
+    text_sources = [key for key, key_chunks in sources.items() if key_chunks]
+    if use_url and settings.site_crawl_enabled:
+        # Pricing/docs/changelog pages of the official site, fetched directly instead of via site: searches
+        crawl = await crawl_site(str(use_url))
+        skipped += crawl.skipped
+        for page_url, text in crawl.pages.items():
+            page_chunks = recursive_character_split(text)[: settings.site_crawl_chunks_per_page]
+            if page_chunks and page_url not in sources:
+                sources[page_url] = page_chunks
+    stats = await sync_source_chunks(tool_id, sources)
+    print(f"[flow.ingest] done sources={len(sources)} chunks={len(chunks)} unchanged={stats['unchanged']} upserted={stats['upserted']} deleted={stats['deleted']}")
+
+    # source_urls lets a restored checkpoint rebuild a large clean_text from documents
+    return {"clean_text": clean_text, "chunks": chunks, "source_urls": text_sources, "skipped_urls": skipped}
+
+
+@traceable(name="classify_intent")
+@observe_node("classify_intent")
+async def classify_intent(state: FlowState) -> FlowState:
+    # Independent of ingest/augment: runs as a parallel branch so research does not wait on it
+    ocr_text = state.get("ocr_text") or ""
+    if state.get("skip_processing") or not ocr_text:
+        return {"screenshot_intent": None}
+    try:
+        return {"screenshot_intent": await classify_screenshot_intent(ocr_text)}
+    except Exception:
+        return {"screenshot_intent": None}
 
 
 @traceable(name="research")
+@observe_node("research")
 async def research(state: FlowState) -> FlowState:
     if state.get("skip_processing"):
         # Return a benign update to satisfy LangGraph invariants
@@ -282,13 +432,8 @@ async def research(state: FlowState) -> FlowState:
         bundle_parts.append(src)
         acc += len(src)
     combined_text = "\n\n".join(bundle_parts) if bundle_parts else clean_text
-    # If OCR present, classify intent to guide synthesis
-    screenshot_intent = None
-    try:
-        if ocr_text:
-            screenshot_intent = await classify_screenshot_intent(ocr_text)
-    except Exception:
-        screenshot_intent = None
+    # Screenshot intent (if OCR present) is classified by its own node in parallel with ingest
+    screenshot_intent = state.get("screenshot_intent")
     one_pager = await synthesize_one_pager(combined_text, ocr_text=ocr_text or None, screenshot_intent=screenshot_intent)
     # Normalize/sort recent updates by date descending for UI
     try:
@@ -306,6 +451,7 @@ async def research(state: FlowState) -> FlowState:
 
 
 @traceable(name="juror")
+@observe_node("juror")
 async def juror(state: FlowState) -> FlowState:
     if state.get("skip_processing"):
         # Return a benign update to satisfy LangGraph invariants
@@ -317,6 +463,7 @@ async def juror(state: FlowState) -> FlowState:
 
 
 @traceable(name="dbwrite")
+@observe_node("dbwrite")
 async def dbwrite(state: FlowState) -> FlowState:
     if state.get("skip_processing"):
         # Return a benign update to satisfy LangGraph invariants
@@ -376,6 +523,8 @@ async def dbwrite(state: FlowState) -> FlowState:
         json.dumps(one_pager),
     )
     version_id = str(version_row["id"])
+    # New version means new documents/one_pager; drop this tool's in-process retrieval index
+    vector_cache.invalidate(tool_id)
     # Link to user if provided
     user_id = state.get("user_id")
     if user_id:
@@ -462,10 +611,11 @@ async def dbwrite(state: FlowState) -> FlowState:
 
 
 builder = StateGraph(FlowState)
-builder.add_node("resolve_tool", resolve_tool)
-builder.add_node("ingest", ingest)
+builder.add_node("resolve_tool", checkpoints.wrap("resolve_tool", resolve_tool))
+builder.add_node("ingest", checkpoints.wrap("ingest", ingest))
 
 @traceable(name="augment_sources")
+@observe_node("augment_sources")
 async def augment_sources(state: FlowState) -> FlowState:
     if state.get("skip_processing"):
         return {"augmented_urls": [], "augmented_media": []}
@@ -477,7 +627,6 @@ async def augment_sources(state: FlowState) -> FlowState:
         # Explicitly record that no augmentation occurred
         return {"augmented_urls": []}
 
-    client = TavilyClient(api_key=settings.tavily_api_key.get_secret_value())  # type: ignore[arg-type]
     queries = []
     if name:
         queries.append(f"{name} official documentation")
@@ -491,7 +640,8 @@ async def augment_sources(state: FlowState) -> FlowState:
         queries.append(f'site:x.com "{name}"')
         queries.append(f'site:twitter.com "{name}"')
         queries.append(f'site:linkedin.com "{name}"')
-    if url:
+    if url and not settings.site_crawl_enabled:
+        # Covered by the site crawl in ingest when enabled
         from urllib.parse import urlparse
         host = urlparse(url).hostname or ""
         base = host.split(":")[0]
@@ -502,8 +652,8 @@ async def augment_sources(state: FlowState) -> FlowState:
     seen = set([url])
     augmented: List[str] = []
     augmented_media: List[dict] = []
+    skipped: List[dict] = []
     highlights_added = 0
-    docs_indexed = 0
     MAX_HIGHLIGHTS = 6
     MAX_DOCS = 12
     def platform_from_url(u: str) -> str:
@@ -545,95 +695,168 @@ async def augment_sources(state: FlowState) -> FlowState:
             return parts[0] if parts else ""
         except Exception:
             return ""
-    for q in queries:
-        if highlights_added >= MAX_HIGHLIGHTS and docs_indexed >= MAX_DOCS:
-            break
-        try:
-            res = client.search(query=q, max_results=5)
-            for item in res.get("results", []):
-                u = item.get("url")
-                if not u or u in seen:
-                    continue
-                p = platform_from_url(u)
-                title = item.get("title") or ""
-                meta = {"content": item.get("content") or ""}
-                s = score_item(title, u, meta)
-                # For Highlights: allow lower threshold and ensure at least two social items via fallback
-                if p in {"youtube","tiktok","x","linkedin"} and highlights_added < MAX_HIGHLIGHTS and (s >= 0.5 or (p in {"x","linkedin"} and highlights_added < 2) or (p == "youtube" and s >= 1.0)):
-                    # keep URL to add as media at dbwrite time; also index content for RAG
-                    seen.add(u)
-                    augmented.append(u)
-                    thumb = youtube_thumbnail(u) if p == "youtube" else ""
-                    augmented_media.append({
-                        "platform": p,
-                        "url": u,
-                        "title": title[:255],
-                        "author": "",
-                        "author_handle": author_from_url(u),
-                        "is_influencer": any(h in u for h in influencers),
-                        "metrics": {},
-                        "published_at": None,
-                        "thumbnail_url": thumb,
-                        "score": s,
-                    })
-                    highlights_added += 1
-                # For non-social docs, index content but do not add to augmented list (to keep Highlights social-focused)
-                # fetch, chunk, embed, insert (limit chunks per source)
-                # Skip support/help/community pages to avoid noise
-                if any(seg in (u or "").lower() for seg in ["support.", "/support", "/help", "community."]):
+    # Pipeline: search waves feed a queue of doc candidates; a bounded pool of fetch workers
+    # fetches and chunks them as they arrive; all docs are embedded and written in one batch.
+    docs: dict[str, List[str]] = {}
+    queue: asyncio.Queue[str] = asyncio.Queue()
+    outstanding = 0
+
+    async def fetch_worker() -> None:
+        nonlocal outstanding
+        while True:
+            u = await queue.get()
+            try:
+                if len(docs) >= MAX_DOCS:
                     continue
-                if docs_indexed >= MAX_DOCS:
+                try:
+                    clean = await fetch_text_for_url(u)
+                except FetchSkipped as e:
+                    skipped.append(e.as_dict())
                     continue
-                clean = await fetch_clean_text(u)
-                chunks = recursive_character_split(clean)
-                if not chunks:
+                except Exception:
                     continue
-                chunks = chunks[:6]
-                embeds = await embed_texts(chunks)
-                args: list[tuple] = []
-                for idx, (text, vec) in enumerate(zip(chunks, embeds)):
-                    vec_str = "[" + ",".join(str(x) for x in vec) + "]"
-                    args.append((tool_id, u, idx, text, vec_str))
-                await db.executemany(
-                    "INSERT INTO documents (tool_id, source_url, chunk_index, chunk_text, chunk_embedding) VALUES ($1::uuid, $2, $3, $4, $5::vector)",
-                    args,
-                )
-                seen.add(u)
-                docs_indexed += 1
-                if highlights_added >= MAX_HIGHLIGHTS and docs_indexed >= MAX_DOCS:
+                chunks = recursive_character_split(clean)[:6]
+                if chunks and len(docs) < MAX_DOCS:
+                    docs[u] = chunks
+            finally:
+                outstanding -= 1
+                queue.task_done()
+
+    workers = [asyncio.create_task(fetch_worker()) for _ in range(max(1, settings.augment_fetch_concurrency))]
+    try:
+        # Searches go out in concurrent waves of search_concurrency; no new wave once both quotas are met
+        wave = max(1, settings.search_concurrency)
+        for start in range(0, len(queries), wave):
+            if highlights_added >= MAX_HIGHLIGHTS and len(docs) + outstanding >= MAX_DOCS:
+                # Enough candidates in flight: let them settle before paying for more searches
+                await queue.join()
+                if len(docs) >= MAX_DOCS:
                     break
-        except Exception:
-            continue
+            for res in await search_client.search_many(queries[start:start + wave], max_results=5):
+                try:
+                    for item in res.get("results", []):
+                        u = item.get("url")
+                        if not u or u in seen:
+                            continue
+                        p = platform_from_url(u)
+                        title = item.get("title") or ""
+                        meta = {"content": item.get("content") or ""}
+                        s = score_item(title, u, meta)
+                        # For Highlights: allow lower threshold and ensure at least two social items via fallback
+                        if p in {"youtube","tiktok","x","linkedin"} and highlights_added < MAX_HIGHLIGHTS and (s >= 0.5 or (p in {"x","linkedin"} and highlights_added < 2) or (p == "youtube" and s >= 1.0)):
+                            # keep URL to add as media at dbwrite time; also index content for RAG
+                            augmented.append(u)
+                            thumb = youtube_thumbnail(u) if p == "youtube" else ""
+                            augmented_media.append({
+                                "platform": p,
+                                "url": u,
+                                "title": title[:255],
+                                "author": "",
+                                "author_handle": author_from_url(u),
+                                "is_influencer": any(h in u for h in influencers),
+                                "metrics": {},
+                                "published_at": None,
+                                "thumbnail_url": thumb,
+                                "score": s,
+                            })
+                            highlights_added += 1
+                        seen.add(u)
+                        # For non-social docs, index content but do not add to augmented list (to keep Highlights social-focused)
+                        # Skip support/help/community pages to avoid noise
+                        if any(seg in (u or "").lower() for seg in ["support.", "/support", "/help", "community."]):
+                            continue
+                        if len(docs) + outstanding >= MAX_DOCS + settings.augment_fetch_concurrency:
+                            # Enough candidates queued to cover some failed fetches
+                            continue
+                        outstanding += 1
+                        queue.put_nowait(u)
+                except Exception:
+                    continue
+        await queue.join()
+    finally:
+        for w in workers:
+            w.cancel()
+
+    if docs:
+        stats = await sync_source_chunks(tool_id, docs)
+        print(f"[flow.augment] docs={len(docs)} unchanged={stats['unchanged']} upserted={stats['upserted']} deleted={stats['deleted']}")
+    if skipped:
+        saved = sum(item["saved_seconds"] for item in skipped)
+        print(f"[flow.augment] skipped={len(skipped)} saved~{saved:.1f}s")
     # Return augmented URLs for traceability
-    return {"augmented_urls": augmented, "augmented_media": augmented_media}
-builder.add_node("research", research)
-builder.add_node("juror", juror)
-builder.add_node("dbwrite", dbwrite)
-builder.add_node("augment_sources", augment_sources)
+    return {"augmented_urls": augmented, "augmented_media": augmented_media, "skipped_urls": skipped}
+builder.add_node("research", checkpoints.wrap("research", research))
+builder.add_node("juror", checkpoints.wrap("juror", juror))
+builder.add_node("dbwrite", checkpoints.wrap("dbwrite", dbwrite))
+builder.add_node("augment_sources", checkpoints.wrap("augment_sources", augment_sources))
+builder.add_node("classify_intent", checkpoints.wrap("classify_intent", classify_intent))
 builder.set_entry_point("resolve_tool")
-builder.add_edge("resolve_tool", "ingest")
-builder.add_edge("ingest", "augment_sources")
-builder.add_edge("augment_sources", "research")
+# Once tool_id is known, the official page, search-driven sources and screenshot intent are
+# independent: run them as parallel branches and join before research
+PARALLEL_NODES = ["ingest", "augment_sources", "classify_intent"]
+for node in PARALLEL_NODES:
+    builder.add_edge("resolve_tool", node)
+builder.add_edge(PARALLEL_NODES, "research")
 builder.add_edge("research", "juror")
 builder.add_edge("juror", "dbwrite")
 builder.add_edge("dbwrite", END)
 graph = builder.compile()
 
 
+async def link_user_to_latest(tool_id: Optional[str], user_id: Optional[str]) -> None:
+    """Link a caller that joined another caller's run to the latest version (dbwrite links the leader)."""
+    if not tool_id or not user_id:
+        return
+    try:
+        await db.execute(
+            """
+            INSERT INTO user_tool_versions (user_id, tool_version_id)
+            SELECT $1::uuid, id FROM tool_versions WHERE tool_id = $2::uuid AND is_latest = TRUE
+            """,
+            user_id,
+            tool_id,
+        )
+    except Exception:
+        pass
+
+
+async def _run_coalesced(state: FlowState) -> dict[str, Any]:
+    """Run the graph at most once at a time per canonical URL / name (see singleflight)."""
+    key = flight_key(state.get("url"), state.get("name"), bool(state.get("force")), state.get("ocr_text"))
+
+    async def run() -> dict[str, Any]:
+        with FLOWS_IN_FLIGHT.track_inprogress():
+            result = await graph.ainvoke(state)
+        return {"tool_id": result.get("tool_id"), "status": result.get("status", "pending_research"), "skipped_urls": result.get("skipped_urls", [])}
+
+    result, shared = await ingest_flights.do(key, run)
+    if shared:
+        await link_user_to_latest(result.get("tool_id"), state.get("user_id"))
+    return dict(result)
+
+
 @traceable(name="run_ingest_flow")
-async def run_ingest_flow(url: Optional[str], name: Optional[str], force: bool, user_id: Optional[str] = None) -> dict[str, Any]:
-    state: FlowState = {"url": url, "name": name, "force": force, "user_id": user_id}
-    result = await graph.ainvoke(state)
-    return {"tool_id": result.get("tool_id"), "status": result.get("status", "pending_research")}
+async def run_ingest_flow(
+    url: Optional[str], name: Optional[str], force: bool, user_id: Optional[str] = None, run_id: Optional[str] = None,
+    tool_id: Optional[str] = None, canonical_url: Optional[str] = None,
+) -> dict[str, Any]:
+    state: FlowState = {"url": url, "name": name, "force": force, "user_id": user_id, "run_id": run_id}
+    if tool_id:
+        # Already resolved by the caller; resolve_tool reuses it
+        state.update({"tool_id": tool_id, "canonical_url": canonical_url})
+    return await _run_coalesced(state)
 
 
 @traceable(name="run_ingest_flow_with_ocr")
-async def run_ingest_flow_with_ocr(name: str, ocr_text: str, source_label: str = "screenshot", force: bool = False, user_id: Optional[str] = None) -> dict[str, Any]:
+async def run_ingest_flow_with_ocr(
+    name: str, ocr_text: str, source_label: str = "screenshot", force: bool = False, user_id: Optional[str] = None, run_id: Optional[str] = None,
+    tool_id: Optional[str] = None, canonical_url: Optional[str] = None,
+) -> dict[str, Any]:
     """
     Variant entrypoint used when OCR text is available (e.g., from screenshots).
     Passes OCR text into the flow and tags provenance via source_label.
     """
-    state: FlowState = {"url": None, "name": name, "force": force, "ocr_text": ocr_text, "source_url": source_label, "user_id": user_id}
-    result = await graph.ainvoke(state)
-    return {"tool_id": result.get("tool_id"), "status": result.get("status", "pending_research")}
-
+    state: FlowState = {"url": None, "name": name, "force": force, "ocr_text": ocr_text, "source_url": source_label, "user_id": user_id, "run_id": run_id}
+    if tool_id:
+        state.update({"tool_id": tool_id, "canonical_url": canonical_url})
+    return await _run_coalesced(state)
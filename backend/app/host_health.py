@@ -0,0 +1,128 @@
+import time
+from dataclasses import dataclass, field
+from typing import Optional
+from urllib.parse import urlparse
+from .config import settings
+from .idle_map import IdleMap
+
+
+class FetchSkipped(Exception):
+    """Raised instead of fetching when the URL is known dead or its host's circuit is open."""
+
+    def __init__(self, url: str, reason: str, saved_seconds: float) -> None:
+        super().__init__(f"{reason}: {url}")
+        self.url = url
+        self.reason = reason
+        self.saved_seconds = saved_seconds
+
+    def as_dict(self) -> dict:
+        return {"url": self.url, "reason": self.reason, "saved_seconds": round(self.saved_seconds, 2)}
+
+
+@dataclass
+class HostState:
+    consecutive_failures: int = 0
+    successes: int = 0
+    failures: int = 0
+    opened_at: Optional[float] = None
+    # Exponentially weighted latency of successful and failed fetches
+    ok_latency: float = 0.0
+    fail_latency: float = 0.0
+    probing: bool = False
+    dead_urls: dict[str, float] = field(default_factory=dict)
+
+
+def _ewma(prev: float, value: float, alpha: float = 0.3) -> float:
+    return value if prev == 0.0 else (1 - alpha) * prev + alpha * value
+
+
+class HostHealth:
+    """
+    Per-host failure/latency tracker for the scrape layer.
+
+    After scrape_circuit_failure_threshold consecutive failed fetches a host's circuit opens
+    and fetches are skipped for scrape_circuit_open_seconds; then one probe is let through
+    (half-open) and its outcome closes or re-opens the circuit. URLs that failed are
+    negatively cached for scrape_dead_url_ttl_seconds. Skips report the latency they saved,
+    estimated from the host's recent failure latency.
+    """
+
+    def __init__(self) -> None:
+        # Idle hosts are dropped, but never before their dead URLs and open circuit would have expired
+        self._hosts: IdleMap[HostState] = IdleMap(
+            HostState,
+            lambda: max(settings.scrape_state_idle_seconds, settings.scrape_dead_url_ttl_seconds, settings.scrape_circuit_open_seconds),
+        )
+        self.skipped = 0
+        self.saved_seconds = 0.0
+
+    @staticmethod
+    def _host(url: str) -> str:
+        return (urlparse(url).hostname or "").lower()
+
+    def _state(self, url: str) -> HostState:
+        return self._hosts.get(self._host(url))
+
+    def _skip(self, url: str, reason: str, state: HostState) -> FetchSkipped:
+        saved = state.fail_latency
+        self.skipped += 1
+        self.saved_seconds += saved
+        return FetchSkipped(url, reason, saved)
+
+    def check(self, url: str, check_dead_url: bool = True) -> None:
+        """
+        Raise FetchSkipped when the fetch should not be attempted. check_dead_url=False ignores
+        the URL's own negative cache (but not an open circuit), for URLs a caller cannot do without.
+        """
+        if not settings.scrape_circuit_enabled:
+            return
+        state = self._state(url)
+        now = time.monotonic()
+        dead_until = state.dead_urls.get(url)
+        if dead_until is not None and check_dead_url:
+            if now < dead_until:
+                raise self._skip(url, "dead_url", state)
+            state.dead_urls.pop(url, None)
+        if state.opened_at is None:
+            return
+        if now - state.opened_at < settings.scrape_circuit_open_seconds:
+            raise self._skip(url, "circuit_open", state)
+        # Half-open: let a single probe through and keep skipping others for another window
+        state.opened_at = now
+        state.probing = True
+
+    def record_success(self, url: str, latency: float) -> None:
+        state = self._state(url)
+        state.successes += 1
+        state.consecutive_failures = 0
+        state.opened_at = None
+        state.probing = False
+        state.ok_latency = _ewma(state.ok_latency, latency)
+        state.dead_urls.pop(url, None)
+
+    def record_failure(self, url: str, latency: float) -> None:
+        state = self._state(url)
+        now = time.monotonic()
+        state.failures += 1
+        state.consecutive_failures += 1
+        state.fail_latency = _ewma(state.fail_latency, latency)
+        # Prune expired entries so a host that keeps failing on new URLs does not grow without bound
+        state.dead_urls = {u: until for u, until in state.dead_urls.items() if until > now}
+        state.dead_urls[url] = now + settings.scrape_dead_url_ttl_seconds
+        if state.probing or state.consecutive_failures >= settings.scrape_circuit_failure_threshold:
+            state.opened_at = now
+        state.probing = False
+
+    def stats(self) -> dict:
+        open_hosts = sorted(h for h, s in self._hosts.items() if s.opened_at is not None)
+        return {
+            "hosts": len(self._hosts),
+            "evicted_hosts": self._hosts.evicted,
+            "open_circuits": open_hosts,
+            "dead_urls": sum(len(s.dead_urls) for s in self._hosts.values()),
+            "skipped": self.skipped,
+            "saved_seconds": round(self.saved_seconds, 2),
+        }
+
+
+host_health = HostHealth()
@@ -0,0 +1,86 @@
+import time
+from contextlib import contextmanager
+from typing import Callable, Generic, Iterator, Optional, TypeVar
+
+V = TypeVar("V")
+
+# Upper bound between eviction sweeps, so short idle windows do not sweep on every call
+MAX_SWEEP_INTERVAL_SECONDS = 60.0
+
+
+class IdleMap(Generic[V]):
+    """
+    Per-key state (per host / domain) created on demand and dropped once nobody holds it and it
+    has not been used for idle_seconds, so a long-running process does not keep an entry for every
+    host it ever contacted. Sweeps are amortized: at most one O(n) pass per sweep interval.
+    """
+
+    def __init__(self, factory: Callable[[], V], idle_seconds: Callable[[], float]) -> None:
+        self._factory = factory
+        # Callable so the window follows settings (and the values it is derived from)
+        self._idle_seconds = idle_seconds
+        self._entries: dict[str, V] = {}
+        self._last_used: dict[str, float] = {}
+        self._holders: dict[str, int] = {}
+        self._last_sweep = time.monotonic()
+        self.evicted = 0
+
+    def _sweep(self, now: float) -> None:
+        idle = self._idle_seconds()
+        if now - self._last_sweep < min(idle, MAX_SWEEP_INTERVAL_SECONDS):
+            return
+        self._last_sweep = now
+        for key, last in list(self._last_used.items()):
+            if now - last >= idle and not self._holders.get(key):
+                self.pop(key)
+                self.evicted += 1
+
+    def get(self, key: str) -> V:
+        """The entry for key, created if missing; marks it used."""
+        now = time.monotonic()
+        self._sweep(now)
+        value = self._entries.get(key)
+        if value is None:
+            value = self._factory()
+            self._entries[key] = value
+        self._last_used[key] = now
+        return value
+
+    def peek(self, key: str) -> Optional[V]:
+        """The entry for key if present, without creating or touching it."""
+        return self._entries.get(key)
+
+    def put(self, key: str, value: V) -> None:
+        now = time.monotonic()
+        self._sweep(now)
+        self._entries[key] = value
+        self._last_used[key] = now
+
+    def pop(self, key: str) -> Optional[V]:
+        self._last_used.pop(key, None)
+        return self._entries.pop(key, None)
+
+    @contextmanager
+    def hold(self, key: str) -> Iterator[V]:
+        """Use key's entry for the duration of the block (including time spent waiting on it); never evicted meanwhile."""
+        value = self.get(key)
+        self._holders[key] = self._holders.get(key, 0) + 1
+        try:
+            yield value
+        finally:
+            remaining = self._holders.get(key, 1) - 1
+            if remaining:
+                self._holders[key] = remaining
+            else:
+                self._holders.pop(key, None)
+            if key in self._entries:
+                self._last_used[key] = time.monotonic()
+
+    def items(self) -> list[tuple[str, V]]:
+        return list(self._entries.items())
+
+    def values(self) -> list[V]:
+        return list(self._entries.values())
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,252 @@
+import asyncio
+import json
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Optional
+from .config import settings
+from .db import db
+from .singleflight import flight_key
+
+logger = logging.getLogger(__name__)
+
+JOB_INGEST = "ingest"
+
+# Set when this process enqueues, so a local worker picks the job up without waiting for its poll
+_wakeup = asyncio.Event()
+
+
+@dataclass
+class Job:
+    id: str
+    job_type: str
+    tool_id: Optional[str]
+    payload: dict[str, Any]
+    attempts: int
+    max_attempts: int
+    subscribers: list[dict[str, Any]] = field(default_factory=list)
+
+    @classmethod
+    def from_row(cls, row: Any) -> "Job":
+        payload = row["payload"]
+        if isinstance(payload, str):
+            payload = json.loads(payload)
+        return cls(
+            id=str(row["id"]),
+            job_type=row["job_type"],
+            tool_id=str(row["tool_id"]) if row["tool_id"] else None,
+            payload=payload or {},
+            attempts=int(row["attempts"]),
+            max_attempts=int(row["max_attempts"]),
+            subscribers=list((payload or {}).get("subscribers") or []),
+        )
+
+
+async def wait_for_jobs(timeout: float) -> None:
+    """Sleep until a local enqueue or the poll interval, whichever comes first."""
+    try:
+        await asyncio.wait_for(_wakeup.wait(), timeout=timeout)
+    except asyncio.TimeoutError:
+        pass
+    _wakeup.clear()
+
+
+async def enqueue(
+    job_type: str,
+    payload: dict[str, Any],
+    tool_id: Optional[str] = None,
+    dedupe_key: Optional[str] = None,
+    delay_seconds: float = 0.0,
+) -> tuple[str, bool]:
+    """
+    Insert a queued job; returns (job_id, created). If a queued or running job with the same
+    dedupe_key exists, this request's subscribers (chat_id / user_id to notify and link on
+    completion) are appended to it instead and created is False; payload keys and tool_id the
+    existing job lacks are filled in from this request.
+    """
+    payload = {**payload, "subscribers": list(payload.get("subscribers") or [])}
+    row = await db.fetchrow(
+        """
+        INSERT INTO jobs (job_type, tool_id, payload, dedupe_key, run_at, max_attempts)
+        VALUES ($1, $2::uuid, $3::jsonb, $4, now() + make_interval(secs => $5), $6)
+        ON CONFLICT (dedupe_key) WHERE status IN ('queued', 'running') DO UPDATE
+        SET payload = jsonb_set(
+                EXCLUDED.payload || jobs.payload, '{subscribers}',
+                COALESCE(jobs.payload->'subscribers', '[]'::jsonb) || (EXCLUDED.payload->'subscribers')
+            ),
+            tool_id = COALESCE(jobs.tool_id, EXCLUDED.tool_id),
+            updated_at = now()
+        RETURNING id, (xmax = 0) AS created
+        """,
+        job_type,
+        tool_id,
+        json.dumps(payload),
+        dedupe_key,
+        float(delay_seconds),
+        max(1, settings.job_max_attempts),
+    )
+    job_id, created = str(row["id"]), bool(row["created"])
+    logger.info("[jobs] %s %s job=%s dedupe_key=%s", "enqueued" if created else "joined", job_type, job_id, dedupe_key)
+    _wakeup.set()
+    return job_id, created
+
+
+async def enqueue_ingest(
+    url: Optional[str],
+    name: Optional[str],
+    force: bool = False,
+    user_id: Optional[str] = None,
+    chat_id: Optional[int] = None,
+    tool_id: Optional[str] = None,
+    canonical_url: Optional[str] = None,
+    ocr_text: Optional[str] = None,
+    source_label: Optional[str] = None,
+) -> tuple[str, bool]:
+    """
+    Queue an ingest flow run, deduplicated per canonical URL / name like singleflight (a
+    screenshot's OCR text is part of the key, so it never merges into a job that would drop it).
+    tool_id / canonical_url, when the caller already resolved the tool, let the worker skip
+    resolve_tool's search and LLM pick.
+    """
+    dedupe_key = flight_key(url, name, force, ocr_text)
+    payload: dict[str, Any] = {"url": url, "name": name, "force": force, "user_id": user_id}
+    if canonical_url:
+        payload["canonical_url"] = canonical_url
+    if ocr_text:
+        payload["ocr_text"] = ocr_text
+        payload["source_label"] = source_label or "screenshot"
+    if chat_id or user_id:
+        payload["subscribers"] = [{"chat_id": chat_id, "user_id": user_id}]
+    return await enqueue(JOB_INGEST, payload, tool_id=tool_id, dedupe_key=f"{JOB_INGEST}:{dedupe_key}" if dedupe_key else None)
+
+
+async def claim(worker_id: str) -> Optional[Job]:
+    """
+    Claim the oldest due job (or a running one whose worker stopped heart-beating) with
+    FOR UPDATE SKIP LOCKED, so any number of workers can poll the same table.
+    """
+    row = await db.fetchrow(
+        """
+        WITH next AS (
+            SELECT id FROM jobs
+            WHERE (status = 'queued' AND (run_at IS NULL OR run_at <= now()))
+               OR (status = 'running' AND locked_at < now() - make_interval(secs => $2))
+            ORDER BY COALESCE(run_at, created_at)
+            LIMIT 1
+            FOR UPDATE SKIP LOCKED
+        )
+        UPDATE jobs j
+        SET status = 'running', locked_at = now(), locked_by = $1, attempts = j.attempts + 1, updated_at = now()
+        FROM next
+        WHERE j.id = next.id
+        RETURNING j.id, j.job_type, j.tool_id, j.payload, j.attempts, j.max_attempts
+        """,
+        worker_id,
+        float(settings.job_stale_after_seconds),
+    )
+    return Job.from_row(row) if row else None
+
+
+async def heartbeat(job_id: str, worker_id: str) -> None:
+    await db.execute(
+        "UPDATE jobs SET locked_at = now() WHERE id = $1::uuid AND locked_by = $2 AND status = 'running'",
+        job_id,
+        worker_id,
+    )
+
+
+async def complete(job_id: str, worker_id: str, tool_id: Optional[str], result: dict[str, Any]) -> Optional[Job]:
+    """
+    Mark a job succeeded; returns it with its current subscribers (some may have joined mid-run),
+    or None if worker_id no longer holds the lease (the job was reclaimed as stale meanwhile).
+    """
+    row = await db.fetchrow(
+        """
+        UPDATE jobs
+        SET status = 'succeeded', tool_id = COALESCE($3::uuid, tool_id), result = $4::jsonb,
+            error_message = NULL, locked_at = NULL, finished_at = now(), updated_at = now()
+        WHERE id = $1::uuid AND locked_by = $2 AND status = 'running'
+        RETURNING id, job_type, tool_id, payload, attempts, max_attempts
+        """,
+        job_id,
+        worker_id,
+        tool_id,
+        json.dumps(result, default=str),
+    )
+    if row is None:
+        logger.warning("[jobs] job=%s lease lost by %s; not marking succeeded", job_id, worker_id)
+        return None
+    return Job.from_row(row)
+
+
+async def fail(job: Job, worker_id: str, error: str, retry: bool) -> Optional[Job]:
+    """
+    Record a failed attempt: requeue with exponential backoff through run_at while attempts
+    remain (and the error is retryable), otherwise mark the job failed. Returns None without
+    touching the row if worker_id no longer holds the lease.
+    """
+    if retry and job.attempts < job.max_attempts:
+        delay = min(settings.job_retry_max_seconds, settings.job_retry_base_seconds * 2 ** (job.attempts - 1))
+        row = await db.fetchrow(
+            """
+            UPDATE jobs
+            SET status = 'queued', run_at = now() + make_interval(secs => $3), error_message = $4,
+                locked_at = NULL, locked_by = NULL, updated_at = now()
+            WHERE id = $1::uuid AND locked_by = $2 AND status = 'running'
+            RETURNING id, job_type, tool_id, payload, attempts, max_attempts, status
+            """,
+            job.id,
+            worker_id,
+            float(delay),
+            error[:2000],
+        )
+        if row is not None:
+            logger.info("[jobs] job=%s attempt %d/%d failed; retry in %.0fs", job.id, job.attempts, job.max_attempts, delay)
+    else:
+        row = await db.fetchrow(
+            """
+            UPDATE jobs
+            SET status = 'failed', error_message = $3, locked_at = NULL, finished_at = now(), updated_at = now()
+            WHERE id = $1::uuid AND locked_by = $2 AND status = 'running'
+            RETURNING id, job_type, tool_id, payload, attempts, max_attempts, status
+            """,
+            job.id,
+            worker_id,
+            error[:2000],
+        )
+        if row is not None:
+            logger.warning("[jobs] job=%s failed after %d attempts: %s", job.id, job.attempts, error[:200])
+    if row is None:
+        logger.warning("[jobs] job=%s lease lost by %s; not recording failure", job.id, worker_id)
+        return None
+    return Job.from_row(row)
+
+
+async def release(job_id: str, worker_id: str) -> None:
+    """Hand a job back to the queue without spending the attempt (worker shutting down)."""
+    await db.execute(
+        """
+        UPDATE jobs
+        SET status = 'queued', attempts = GREATEST(attempts - 1, 0), locked_at = NULL, locked_by = NULL, updated_at = now()
+        WHERE id = $1::uuid AND locked_by = $2 AND status = 'running'
+        """,
+        job_id,
+        worker_id,
+    )
+
+
+async def get_job(job_id: str) -> Optional[dict[str, Any]]:
+    row = await db.fetchrow(
+        """
+        SELECT id, job_type, tool_id, status, attempts, max_attempts, run_at, error_message, result, created_at, finished_at
+        FROM jobs WHERE id = $1::uuid
+        """,
+        job_id,
+    )
+    if not row:
+        return None
+    out = dict(row)
+    out["id"] = str(out["id"])
+    out["tool_id"] = str(out["tool_id"]) if out["tool_id"] else None
+    if isinstance(out.get("result"), str):
+        out["result"] = json.loads(out["result"])
+    return out
@@ -1,22 +1,18 @@
 from typing import List, Tuple
-from tavily import TavilyClient
-from .config import settings
+from .search import search_client
 
 
 async def verify_claims(claims: List[str]) -> List[Tuple[str, bool, str]]:
     """
     Returns list of (claim, verified, citation_url)
     """
-    # Simple synchronous Tavily client; wrap per-claim for MVP
-    client = TavilyClient(api_key=(settings.tavily_api_key.get_secret_value() if settings.tavily_api_key else ""))
+    # One search per claim, fanned out concurrently; a failed search leaves the claim unverified
+    claims = claims[:5]
+    if not search_client.enabled:
+        return [(c, False, "") for c in claims]
+    responses = await search_client.search_many(claims, max_results=3, query_class="claim")
     results: List[Tuple[str, bool, str]] = []
-    for c in claims:
-        try:
-            r = client.search(query=c, max_results=3)
-            url = r["results"][0]["url"] if r.get("results") else ""
-            results.append((c, True if url else False, url))
-        except Exception:
-            results.append((c, False, ""))
-    return results[:5]
-
-
+    for c, r in zip(claims, responses):
+        url = r["results"][0]["url"] if r.get("results") else ""
+        results.append((c, True if url else False, url))
+    return results
@@ -1,8 +1,9 @@
 from __future__ import annotations
 from typing import Literal
 from urllib.parse import urlparse, parse_qs
-import asyncio
-from .scrape import fetch_clean_text
+from .doc_extract import ExtractedDocument
+from .scrape import fetch_document as scrape_document
+from .transcripts import transcript_store
 
 LinkKind = Literal["video_youtube", "video_tiktok", "social", "podcast", "article_or_homepage"]
 
@@ -40,41 +41,31 @@ def _youtube_id(url: str) -> str:
 
 
 async def _youtube_transcript_text(video_id: str) -> str:
-    if not video_id:
-        return ""
-    try:
-        from youtube_transcript_api import YouTubeTranscriptApi
-    except Exception:
-        return ""
-    try:
-        # youtube-transcript-api is blocking; run in a thread
-        segments = await asyncio.to_thread(YouTubeTranscriptApi.get_transcript, video_id)
-        # Each segment: {"text": "...", "start": ..., "duration": ...}
-        lines = [seg.get("text") or "" for seg in segments if seg.get("text")]
-        text = "\n".join(lines)
-        return text[:200_000]
-    except Exception:
-        return ""
+    # Cached by video id (including "no transcript"); blocking API calls run on a bounded pool
+    return await transcript_store.get(video_id)
 
 
-async def fetch_text_for_url(url: str) -> str:
+async def fetch_document(url: str, primary: bool = False) -> ExtractedDocument:
     """
-    Fetch content for a URL based on its kind. Prefer transcripts for YouTube.
-    Fallback to generic clean-text scraper.
+    Fetch content for a URL based on its kind. Prefer transcripts for YouTube; everything else
+    goes through the scraper, which dispatches on Content-Type (HTML, PDF, JSON, RSS/Atom).
+    primary is passed to the scraper.
     """
     kind = classify_link(url)
     if kind == "video_youtube":
         vid = _youtube_id(url)
         tx = await _youtube_transcript_text(vid)
         if tx:
-            return tx
+            return ExtractedDocument("text", tx)
         # fallback to normal fetch
-        return await fetch_clean_text(url)
-    if kind == "podcast":
-        # For now, fetch the episode/show-notes page; transcripts can be added later via API
-        return await fetch_clean_text(url)
+    # podcast: for now, fetch the episode/show-notes page; transcripts can be added later via API
     # social and default: normal fetch (social may be low-signal; augmentation handles highlights)
-    return await fetch_clean_text(url)
-
+    return await scrape_document(url, primary=primary)
 
 
+async def fetch_text_for_url(url: str) -> str:
+    """
+    Fetch content for a URL based on its kind. Prefer transcripts for YouTube.
+    Fallback to generic clean-text scraper.
+    """
+    return (await fetch_document(url)).text
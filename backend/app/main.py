@@ -1,10 +1,23 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
+from .checkpoints import checkpoints
 from .config import settings
+from .crawl_scheduler import crawl_scheduler
 from .db import db
+from .embeddings import embedding_service
+from .fetcher import fetcher
+from .host_health import host_health
+from .metrics import bind_db_pool, render as render_metrics
+from .page_cache import page_cache
+from .scrape import routes as scrape_routes
+from .search import search_client
+from .singleflight import ingest_flights
+from .transcripts import transcript_store
+from .worker import job_worker
 from .api import router as api_router
 from .telegram import router as tg_router
 app = FastAPI(title="Later API", version="0.1.0")
+bind_db_pool(lambda: db.pool)
 
 app.add_middleware(
     CORSMiddleware,
@@ -18,10 +31,17 @@ app.add_middleware(
 @app.on_event("startup")
 async def on_startup() -> None:
     await db.connect()
+    await fetcher.start()
+    if settings.job_worker_enabled:
+        await job_worker.start()
 
 
 @app.on_event("shutdown")
 async def on_shutdown() -> None:
+    await job_worker.stop(timeout=settings.job_shutdown_timeout_seconds)
+    await fetcher.close()
+    transcript_store.close()
+    await embedding_service.close()
     await db.disconnect()
 
 
@@ -30,6 +50,36 @@ async def health() -> dict[str, str]:
     return {"status": "ok", "env": settings.environment}
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics() -> Response:
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
+
+@app.get("/health/fetcher")
+async def health_fetcher() -> dict[str, int]:
+    return fetcher.stats()
+
+
+@app.get("/health/scrape")
+async def health_scrape() -> dict[str, dict]:
+    return {
+        "routes": scrape_routes.stats(),
+        "page_cache": page_cache.stats(),
+        "hosts": host_health.stats(),
+        "scheduler": crawl_scheduler.stats(),
+        "transcripts": transcript_store.stats(),
+        "search": search_client.stats(),
+        "ingest_flights": ingest_flights.stats(),
+    }
+
+
+@app.get("/health/jobs")
+async def health_jobs() -> dict[str, dict]:
+    rows = await db.fetch("SELECT status, count(*) AS n FROM jobs GROUP BY status")
+    return {"worker": job_worker.stats(), "queue": {r["status"]: int(r["n"]) for r in rows}, "checkpoints": checkpoints.stats()}
+
+
 app.include_router(api_router, prefix="/v1")
 app.include_router(tg_router, prefix="/v1")
 
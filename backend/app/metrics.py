@@ -0,0 +1,119 @@
+import asyncio
+import functools
+import time
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Iterator, Optional
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+
+# Latency buckets in seconds: DB/cache lookups (ms) up to full LLM/crawl steps (minutes)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 40.0, 80.0, 160.0, 320.0)
+
+FLOW_NODE_SECONDS = Histogram(
+    "later_flow_node_seconds", "Ingest graph node latency", ["node", "outcome"], buckets=LATENCY_BUCKETS
+)
+DEPENDENCY_SECONDS = Histogram(
+    "later_dependency_seconds",
+    "External dependency call latency (openai_chat, openai_embeddings, tavily, http_fetch, db)",
+    ["dependency", "operation", "outcome"],
+    buckets=LATENCY_BUCKETS,
+)
+CHAT_STAGE_SECONDS = Histogram("later_chat_stage_seconds", "/chat stage latency", ["stage"], buckets=LATENCY_BUCKETS)
+# Unlabelled: fetched domains are unbounded, and per-domain waits are logged by the scheduler
+SCRAPE_QUEUE_WAIT_SECONDS = Histogram(
+    "later_scrape_queue_wait_seconds", "Time a fetch waited for a crawl scheduler slot", buckets=LATENCY_BUCKETS
+)
+CHUNKS = Counter("later_chunks_total", "Document chunks synced by ingest", ["outcome"])
+TOKENS = Counter("later_openai_tokens_total", "OpenAI tokens used", ["model", "kind"])
+CACHE_LOOKUPS = Counter("later_cache_lookups_total", "Cache lookups", ["cache", "result"])
+FLOWS_IN_FLIGHT = Gauge("later_flows_in_flight", "Ingest flows currently running in this process")
+DB_POOL_CONNECTIONS = Gauge("later_db_pool_connections", "Open connections in the asyncpg pool")
+DB_POOL_IDLE = Gauge("later_db_pool_idle_connections", "Idle connections in the asyncpg pool")
+DB_POOL_MAX = Gauge("later_db_pool_max_connections", "asyncpg pool max_size")
+
+
+@contextmanager
+def observe_dependency(dependency: str, operation: str = "") -> Iterator[None]:
+    """Time one call to an external dependency; outcome is "error" if the block raises."""
+    started = time.perf_counter()
+    outcome = "ok"
+    try:
+        yield
+    except asyncio.CancelledError:
+        # e.g. the losing side of a hedged fetch
+        outcome = "cancelled"
+        raise
+    except BaseException:
+        outcome = "error"
+        raise
+    finally:
+        DEPENDENCY_SECONDS.labels(dependency, operation, outcome).observe(time.perf_counter() - started)
+
+
+def observe_node(node: str) -> Callable[[Callable[..., Awaitable[Any]]], Callable[..., Awaitable[Any]]]:
+    """Decorator timing a graph node (used by both the compiled graph and the SSE runner)."""
+
+    def decorator(fn: Callable[..., Awaitable[Any]]) -> Callable[..., Awaitable[Any]]:
+        @functools.wraps(fn)
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
+            started = time.perf_counter()
+            outcome = "ok"
+            try:
+                return await fn(*args, **kwargs)
+            except asyncio.CancelledError:
+                outcome = "cancelled"
+                raise
+            except BaseException:
+                outcome = "error"
+                raise
+            finally:
+                FLOW_NODE_SECONDS.labels(node, outcome).observe(time.perf_counter() - started)
+
+        return wrapper
+
+    return decorator
+
+
+def record_usage(model: Optional[str], usage: Any) -> None:
+    """Count prompt/completion tokens from an OpenAI response's usage block."""
+    if usage is None:
+        return
+    model = model or "unknown"
+    prompt = getattr(usage, "prompt_tokens", None) or 0
+    completion = getattr(usage, "completion_tokens", None) or 0
+    if prompt:
+        TOKENS.labels(model, "prompt").inc(prompt)
+    if completion:
+        TOKENS.labels(model, "completion").inc(completion)
+
+
+async def chat_completion(client: Any, **kwargs: Any) -> Any:
+    """client.chat.completions.create with latency and token metrics."""
+    model = kwargs.get("model")
+    with observe_dependency("openai_chat", str(model or "")):
+        completion = await client.chat.completions.create(**kwargs)
+    record_usage(model, getattr(completion, "usage", None))
+    return completion
+
+
+def record_cache(cache: str, result: str, n: int = 1) -> None:
+    if n:
+        CACHE_LOOKUPS.labels(cache, result).inc(n)
+
+
+def bind_db_pool(pool_getter: Callable[[], Any]) -> None:
+    """Pool gauges are read at scrape time."""
+
+    def read(attr: str) -> Callable[[], float]:
+        def value() -> float:
+            pool = pool_getter()
+            return float(getattr(pool, attr)()) if pool is not None else 0.0
+
+        return value
+
+    DB_POOL_CONNECTIONS.set_function(read("get_size"))
+    DB_POOL_IDLE.set_function(read("get_idle_size"))
+    DB_POOL_MAX.set_function(read("get_max_size"))
+
+
+def render() -> tuple[bytes, str]:
+    return generate_latest(), CONTENT_TYPE_LATEST
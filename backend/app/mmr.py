@@ -1,4 +1,4 @@
-from typing import List, Tuple
+from typing import List, Optional, Sequence
 import numpy as np
 
 
@@ -7,35 +7,46 @@ def cosine_sim(a: np.ndarray, b: np.ndarray) -> float:
     return float(np.dot(a, b) / denom)
 
 
+def _normalize_rows(m: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(m, axis=-1, keepdims=True)
+    return m / np.maximum(norms, 1e-9)
+
+
 def mmr(
     query_vec: np.ndarray,
-    candidate_vectors: List[np.ndarray],
-    candidate_indices: List[int],
+    candidate_vectors: Sequence[np.ndarray] | np.ndarray,
+    candidate_indices: Optional[List[int]] = None,
     k: int = 8,
     lambda_mult: float = 0.7,
 ) -> List[int]:
-    selected: List[int] = []
-    candidate_set = set(candidate_indices)
-
-    # Precompute similarities to query
-    sim_to_query = {i: cosine_sim(query_vec, v) for i, v in zip(candidate_indices, candidate_vectors)}
-
-    while len(selected) < min(k, len(candidate_indices)):
-        best_i = None
-        best_score = -1e9
-        for i in candidate_set:
-            if not selected:
-                score = sim_to_query[i]
-            else:
-                redundancy = max(cosine_sim(candidate_vectors[candidate_indices.index(i)], candidate_vectors[candidate_indices.index(j)]) for j in selected)
-                score = lambda_mult * sim_to_query[i] - (1 - lambda_mult) * redundancy
-            if score > best_score:
-                best_score = score
-                best_i = i
-        if best_i is None:
-            break
-        selected.append(best_i)
-        candidate_set.remove(best_i)
-    return selected
-
+    """
+    Maximal marginal relevance over a normalized candidate matrix.
+    Max-redundancy against the selected set is updated incrementally with one
+    matrix-vector product per pick, so the cost is O(k·n·d) in NumPy.
+    Returns the chosen candidate_indices (positions into candidate_vectors when omitted) in pick order.
+    """
+    m = np.asarray(candidate_vectors, dtype=np.float32)
+    if m.ndim != 2 or m.shape[0] == 0 or k <= 0:
+        return []
+    n = m.shape[0]
+    m = _normalize_rows(m)
+    q = _normalize_rows(np.asarray(query_vec, dtype=np.float32))
+    sim_to_query = m @ q
 
+    selected: List[int] = []
+    available = np.ones(n, dtype=bool)
+    max_redundancy = np.zeros(n, dtype=np.float32)
+    for _ in range(min(k, n)):
+        if not selected:
+            scores = sim_to_query.copy()
+        else:
+            scores = lambda_mult * sim_to_query - (1 - lambda_mult) * max_redundancy
+        scores[~available] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        available[best] = False
+        np.maximum(max_redundancy, m @ m[best], out=max_redundancy)
+
+    if candidate_indices is None:
+        return selected
+    return [candidate_indices[i] for i in selected]
@@ -11,6 +11,8 @@ class IngestRequest(BaseModel):
 class IngestResponse(BaseModel):
     tool_id: str
     status: str
+    # Set when the flow was queued; poll GET /v1/jobs/{job_id}
+    job_id: Optional[str] = None
 
 
 class ChatRequest(BaseModel):
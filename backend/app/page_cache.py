@@ -0,0 +1,120 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Optional
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CachedPage:
+    url: str
+    text: str
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    fetched_at: float = 0.0
+    # Extractor that produced text (html | pdf | json | feed | text) and parsed feed entries
+    kind: str = "html"
+    entries: list[dict] = field(default_factory=list)
+
+    @property
+    def has_validators(self) -> bool:
+        return bool(self.etag or self.last_modified)
+
+    def is_fresh(self, ttl_seconds: float) -> bool:
+        return (time.time() - self.fetched_at) < ttl_seconds
+
+    def conditional_headers(self) -> dict[str, str]:
+        headers: dict[str, str] = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class PageCache:
+    """
+    On-disk cache of extracted page text with HTTP validators (ETag / Last-Modified).
+    Pages with validators are revalidated with a conditional GET; pages without them are
+    served from cache until page_cache_ttl_seconds expires. Failures never break a fetch.
+    """
+
+    def __init__(self, directory: str) -> None:
+        self.directory = Path(directory)
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+
+    def _path(self, url: str) -> Path:
+        digest = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return self.directory / digest[:2] / f"{digest}.json"
+
+    def _read(self, url: str) -> Optional[CachedPage]:
+        path = self._path(url)
+        if not path.exists():
+            return None
+        with path.open("r", encoding="utf-8") as f:
+            data = json.load(f)
+        page = CachedPage(**data)
+        # Guard against (unlikely) hash collisions
+        return page if page.url == url else None
+
+    def _write(self, page: CachedPage) -> None:
+        path = self._path(page.url)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        with tmp.open("w", encoding="utf-8") as f:
+            json.dump(asdict(page), f)
+        # Atomic replace so concurrent readers never see a partial file
+        os.replace(tmp, path)
+
+    async def get(self, url: str) -> Optional[CachedPage]:
+        if not settings.page_cache_enabled:
+            return None
+        try:
+            return await asyncio.to_thread(self._read, url)
+        except Exception:
+            logger.warning("[page_cache] read failed url=%s", url, exc_info=True)
+            return None
+
+    async def put(
+        self,
+        url: str,
+        text: str,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+        kind: str = "html",
+        entries: Optional[list[dict]] = None,
+    ) -> None:
+        if not settings.page_cache_enabled:
+            return
+        page = CachedPage(
+            url=url,
+            text=text,
+            etag=etag,
+            last_modified=last_modified,
+            fetched_at=time.time(),
+            kind=kind,
+            entries=entries or [],
+        )
+        try:
+            await asyncio.to_thread(self._write, page)
+        except Exception:
+            logger.warning("[page_cache] write failed url=%s", url, exc_info=True)
+
+    async def touch(self, page: CachedPage) -> None:
+        """Record a successful revalidation (304) so TTL-based freshness restarts."""
+        await self.put(page.url, page.text, page.etag, page.last_modified, page.kind, page.entries)
+
+    def stats(self) -> dict[str, int]:
+        return {"hits": self.hits, "revalidated": self.revalidated, "misses": self.misses}
+
+
+page_cache = PageCache(settings.page_cache_dir)
@@ -0,0 +1,33 @@
+import struct
+from typing import Any
+import asyncpg
+import numpy as np
+
+# pgvector binary wire format: uint16 dim, uint16 unused, then dim big-endian float32s
+_HEADER = struct.Struct(">HH")
+
+
+def encode_vector(value: Any) -> bytes:
+    arr = np.asarray(value, dtype=">f4")
+    if arr.ndim != 1:
+        raise ValueError(f"vector must be one-dimensional, got shape {arr.shape}")
+    return _HEADER.pack(arr.shape[0], 0) + arr.tobytes()
+
+
+def decode_vector(data: bytes) -> np.ndarray:
+    dim, _ = _HEADER.unpack_from(data)
+    return np.frombuffer(data, dtype=">f4", count=dim, offset=_HEADER.size).astype(np.float32)
+
+
+async def register_vector_codec(conn: asyncpg.Connection) -> bool:
+    """
+    Register the binary codec for pgvector's `vector` type on a connection.
+    Returns False when the extension is not installed so callers can continue without it.
+    """
+    schema = await conn.fetchval(
+        "SELECT n.nspname FROM pg_type t JOIN pg_namespace n ON n.oid = t.typnamespace WHERE t.typname = 'vector' LIMIT 1"
+    )
+    if not schema:
+        return False
+    await conn.set_type_codec("vector", schema=schema, encoder=encode_vector, decoder=decode_vector, format="binary")
+    return True
@@ -2,6 +2,7 @@ from datetime import datetime, timezone
 from typing import Any, Dict, List, Optional
 from openai import AsyncOpenAI
 from .config import settings
+from .metrics import chat_completion
 
 
 SYSTEM_PROMPT = (
@@ -52,7 +53,8 @@ async def synthesize_one_pager(
     if ocr_text:
         ocr_hint = "OCR excerpt (user-provided screenshot; prioritize if relevant):\n" + ocr_text[:4000] + "\n\n"
     today_str = datetime.now(timezone.utc).strftime("%Y-%m-%d")
-    completion = await client.chat.completions.create(
+    completion = await chat_completion(
+        client,
         model=settings.model_primary,
         response_format={"type": "json_object"},
         messages=[
@@ -99,7 +101,8 @@ async def resolve_pricing_via_llm(name: str, snippets: List[str]) -> Dict[str, s
         "- If no pricing is present, return {}. Do not hallucinate."
     )
     joined = "\n\n".join(snippets)[:12000]
-    completion = await client.chat.completions.create(
+    completion = await chat_completion(
+        client,
         model=settings.model_light,
         response_format={"type": "json_object"},
         messages=[
@@ -132,7 +135,8 @@ async def resolve_official_site_via_llm(name: str, candidates: List[str]) -> str
         'Respond in strict JSON: {"official_url": "https://example.com"}'
     )
     user = f"Product name: {name}\nCandidate references (may include noise):\n- " + "\n- ".join(candidates[:15])
-    completion = await client.chat.completions.create(
+    completion = await chat_completion(
+        client,
         model=settings.model_light,
         response_format={"type": "json_object"},
         messages=[
@@ -168,7 +172,8 @@ async def extract_primary_product_name(ocr_text: str, hint: str | None = None) -
         "- If uncertain, return an empty string."
     )
     user = (hint + "\n\n" if hint else "") + ocr_text[:8000]
-    completion = await client.chat.completions.create(
+    completion = await chat_completion(
+        client,
         model=settings.model_light,
         messages=[
             {"role": "system", "content": SYSTEM},
@@ -194,7 +199,8 @@ async def classify_screenshot_intent(ocr_text: str) -> str:
         "- new_features: release notes, new capabilities, 'introducing', 'now supports', 'vX.Y', 'changelog'.\n"
         "- general_intro: general descriptions or marketing copy with no clear instruction or new-feature emphasis."
     )
-    completion = await client.chat.completions.create(
+    completion = await chat_completion(
+        client,
         model=settings.model_light,
         messages=[
             {"role": "system", "content": SYSTEM},
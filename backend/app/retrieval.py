@@ -0,0 +1,72 @@
+from typing import Optional, Sequence
+import asyncpg
+import numpy as np
+from .config import settings
+from .db import db
+
+
+# Vector (cosine distance, matching the vector_cosine_ops index) and full-text candidate lists are fused with reciprocal rank fusion in a single statement:
+# score = 1/(rrf_k + vector_rank) + 1/(rrf_k + lexical_rank), missing ranks contribute 0.
+# {vec_source} is the row set the vector ranker orders: all documents (ANN index, recall tuned by
+# ivfflat.probes / hnsw.ef_search), or one tool's documents materialized first so the planner
+# scans them exactly instead of filtering the ANN index's top rows by tool_id afterwards, which
+# leaves small tools with few or no vector candidates.
+_HYBRID_SQL = """
+WITH {vec_cte}vec AS (
+    SELECT id, row_number() OVER (ORDER BY dist) AS rnk
+    FROM (
+        SELECT id, chunk_embedding <=> $1::vector AS dist
+        FROM {vec_source}
+        WHERE chunk_embedding IS NOT NULL
+        ORDER BY dist
+        LIMIT $3
+    ) v
+),
+lex AS (
+    SELECT id, row_number() OVER (ORDER BY rank DESC) AS rnk
+    FROM (
+        SELECT id, ts_rank_cd(chunk_tsv, q) AS rank
+        FROM documents, websearch_to_tsquery('english', $2) AS q
+        WHERE chunk_tsv @@ q {scope}
+        ORDER BY rank DESC
+        LIMIT $3
+    ) l
+),
+fused AS (
+    SELECT
+        COALESCE(vec.id, lex.id) AS id,
+        COALESCE(1.0 / ($4 + vec.rnk), 0) + COALESCE(1.0 / ($4 + lex.rnk), 0) AS score,
+        vec.rnk AS vec_rank,
+        lex.rnk AS lex_rank
+    FROM vec FULL OUTER JOIN lex ON vec.id = lex.id
+)
+SELECT d.id, d.source_url, d.chunk_text, d.chunk_embedding, f.score, f.vec_rank, f.lex_rank
+FROM fused f
+JOIN documents d ON d.id = f.id
+WHERE d.chunk_embedding IS NOT NULL
+ORDER BY f.score DESC, f.vec_rank NULLS LAST
+LIMIT $3
+"""
+
+_TOOL_DOCS_CTE = """tool_docs AS MATERIALIZED (
+    SELECT id, chunk_embedding FROM documents WHERE tool_id = $5::uuid
+),
+"""
+
+
+async def hybrid_search(
+    question: str,
+    question_vec: np.ndarray,
+    tool_id: Optional[str] = None,
+    limit: Optional[int] = None,
+) -> Sequence[asyncpg.Record]:
+    """
+    Hybrid retrieval: pgvector cosine similarity plus Postgres full-text ranking, fused with RRF.
+    Restricted to tool_id when given (exact vector scan), otherwise searches across all tools.
+    """
+    limit = limit or settings.retrieval_candidates
+    if tool_id:
+        sql = _HYBRID_SQL.format(vec_cte=_TOOL_DOCS_CTE, vec_source="tool_docs", scope="AND tool_id = $5::uuid")
+        return await db.fetch(sql, question_vec, question, limit, settings.rrf_k, tool_id)
+    sql = _HYBRID_SQL.format(vec_cte="", vec_source="documents", scope="")
+    return await db.fetch(sql, question_vec, question, limit, settings.rrf_k)
@@ -1,58 +1,244 @@
-import httpx
-import re
-from bs4 import BeautifulSoup
+import asyncio
+import time
+from dataclasses import asdict
+from typing import Optional
+from urllib.parse import urlparse
 from tenacity import retry, stop_after_attempt, wait_exponential_jitter
+from .config import settings
+from .crawl_scheduler import crawl_scheduler
+from .doc_extract import ExtractedDocument, FeedEntry, extract_document
+from .extract import html_to_text
+from .fetcher import fetcher
+from .host_health import FetchSkipped, host_health
+from .idle_map import IdleMap
+from .metrics import record_cache
+from .page_cache import CachedPage, page_cache
 
+HEADERS = {
+    # Use a common desktop UA to reduce 403/anti-bot blocks
+    "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/123.0.0.0 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8",
+    "Accept-Language": "en-US,en;q=0.9",
+}
 
-@retry(stop=stop_after_attempt(3), wait=wait_exponential_jitter(initial=0.5, max=4))
-async def fetch_clean_text(url: str) -> str:
-    # Fetch HTML then extract visible text
-    headers = {
-        # Use a common desktop UA to reduce 403/anti-bot blocks
-        "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/123.0.0.0 Safari/537.36",
-        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8",
-        "Accept-Language": "en-US,en;q=0.9",
-    }
+ROUTE_DIRECT = "direct"
+ROUTE_READER = "reader"
+
+
+def _reader_url(url: str) -> str:
+    # r.jina.ai plaintext proxy (helps with JS/protected sites)
+    p = urlparse(url)
+    scheme = p.scheme or "https"
+    target = f"https://r.jina.ai/{scheme}://{p.netloc}{p.path or ''}"
+    if p.query:
+        target = target + "?" + p.query
+    return target
+
+
+class RouteMemory:
+    """
+    Remembers per host which fetch path (direct GET or reader proxy) last produced the page,
+    so hosts that block direct requests go straight to the reader on later fetches.
+    """
+
+    def __init__(self) -> None:
+        # Entries expire after the route TTL anyway; the map also sweeps hosts that are never read again
+        self._routes: IdleMap[tuple[str, float]] = IdleMap(tuple, lambda: settings.scrape_route_ttl_seconds)
+        self.wins = {ROUTE_DIRECT: 0, ROUTE_READER: 0}
+        self.hedged = 0
+        self.shortcuts = 0
+
+    @staticmethod
+    def _host(url: str) -> str:
+        return (urlparse(url).hostname or "").lower()
+
+    def preferred(self, url: str) -> Optional[str]:
+        entry = self._routes.peek(self._host(url))
+        if entry is None:
+            return None
+        route, at = entry
+        if time.monotonic() - at > settings.scrape_route_ttl_seconds:
+            self._routes.pop(self._host(url))
+            return None
+        return route
+
+    def record(self, url: str, route: str) -> None:
+        self.wins[route] += 1
+        self._routes.put(self._host(url), (route, time.monotonic()))
+
+    def forget(self, url: str) -> None:
+        self._routes.pop(self._host(url))
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "direct_wins": self.wins[ROUTE_DIRECT],
+            "reader_wins": self.wins[ROUTE_READER],
+            "hedged": self.hedged,
+            "reader_shortcuts": self.shortcuts,
+            "hosts": len(self._routes),
+        }
+
+
+routes = RouteMemory()
+
+
+def _cached_document(page: CachedPage) -> ExtractedDocument:
+    return ExtractedDocument(page.kind, page.text, [FeedEntry(**e) for e in page.entries])  # type: ignore[arg-type]
+
+
+async def _store(url: str, doc: ExtractedDocument, etag: Optional[str] = None, last_modified: Optional[str] = None) -> None:
+    await page_cache.put(url, doc.text, etag, last_modified, doc.kind, [asdict(e) for e in doc.entries])
+
+
+async def _fetch_direct(url: str, cached: Optional[CachedPage]) -> ExtractedDocument:
+    headers = dict(HEADERS)
+    if cached is not None:
+        headers.update(cached.conditional_headers())
     print(f"[scrape] GET {url}")
-    async with httpx.AsyncClient(timeout=20) as client:
+    resp = None
+    try:
+        resp = await fetcher.get_capped(
+            url, settings.scrape_max_bytes, pdf_max_bytes=settings.scrape_max_pdf_bytes, headers=headers, follow_redirects=True, timeout=20
+        )
+        print(f"[scrape] GET {url} -> {resp.status_code} bytes={len(resp.body)} truncated={resp.truncated}")
+        if resp.status_code == 304 and cached is not None:
+            page_cache.revalidated += 1
+            record_cache("page", "revalidated")
+            await page_cache.touch(cached)
+            return _cached_document(cached)
+        resp.raise_for_status()
+    except Exception as e:
+        # Log a short body snippet for diagnostics
+        body_preview = ""
         try:
-            resp = await client.get(url, headers=headers, follow_redirects=True)
-            print(f"[scrape] GET {url} -> {resp.status_code}")
-            resp.raise_for_status()
-        except Exception as e:
-            # Log a short body snippet for diagnostics
-            body_preview = ""
+            body_preview = (resp.text or "")[:200] if resp is not None else ""
+        except Exception:
+            pass
+        print(f"[scrape] ERROR fetching {url}: {type(e).__name__} {str(e)} {body_preview}")
+        raise
+    page_cache.misses += 1
+    record_cache("page", "miss")
+    # Dispatch on Content-Type / sniffed bytes: HTML, PDF, JSON, RSS/Atom or plain text
+    doc = extract_document(resp.headers.get("content-type"), resp.body, resp.response.charset_encoding, resp.truncated)
+    if doc.kind != "html":
+        print(f"[scrape] {url} extracted as {doc.kind} chars={len(doc.text)} entries={len(doc.entries)}")
+    await _store(url, doc, resp.headers.get("etag"), resp.headers.get("last-modified"))
+    return doc
+
+
+async def _fetch_reader(url: str) -> ExtractedDocument:
+    target = _reader_url(url)
+    print(f"[scrape] FALLBACK GET {target}")
+    try:
+        fb = await fetcher.get_capped(target, settings.scrape_max_bytes, headers=HEADERS, follow_redirects=True, timeout=20)
+        print(f"[scrape] FALLBACK GET {target} -> {fb.status_code}")
+        fb.raise_for_status()
+    except Exception as e:
+        print(f"[scrape] FALLBACK ERROR {type(e).__name__} {str(e)}")
+        raise
+    page_cache.misses += 1
+    record_cache("page", "miss")
+    doc = ExtractedDocument("html", html_to_text(fb.text))
+    # Proxy responses carry no usable validators; rely on the TTL
+    await _store(url, doc)
+    return doc
+
+
+async def _fetch_hedged(url: str, cached: Optional[CachedPage]) -> tuple[str, ExtractedDocument]:
+    """
+    Start the direct GET; if it fails or has not answered within scrape_hedge_delay_seconds,
+    race the reader fallback against it and return (route, document) of the first success.
+    Both requests are cancelled and awaited on every exit (including the caller being cancelled),
+    so none outlives the politeness slot it was started under.
+    """
+    tasks: dict[asyncio.Task, str] = {}
+    try:
+        direct = asyncio.create_task(_fetch_direct(url, cached))
+        tasks[direct] = ROUTE_DIRECT
+        delay = settings.scrape_hedge_delay_seconds if settings.scrape_hedge_enabled else None
+        done, _ = await asyncio.wait({direct}, timeout=delay)
+        if direct in done and direct.exception() is None:
+            return ROUTE_DIRECT, direct.result()
+        if direct not in done:
+            routes.hedged += 1
+            print(f"[scrape] HEDGE {url} direct slower than {delay}s; starting fallback")
+
+        tasks[asyncio.create_task(_fetch_reader(url))] = ROUTE_READER
+        pending = set(tasks)
+        error: BaseException | None = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                exc = task.exception()
+                if exc is None:
+                    return tasks[task], task.result()
+                error = error or exc
+        assert error is not None
+        raise error
+    finally:
+        unfinished = [task for task in tasks if not task.done()]
+        for task in unfinished:
+            task.cancel()
+        if unfinished:
+            await asyncio.gather(*unfinished, return_exceptions=True)
+
+
+@retry(stop=stop_after_attempt(settings.scrape_max_attempts), wait=wait_exponential_jitter(initial=0.5, max=4))
+async def _fetch_with_retries(url: str, cached: Optional[CachedPage]) -> ExtractedDocument:
+    # Each attempt takes its own politeness slot so backoff sleeps do not hold one
+    async with crawl_scheduler.slot(url):
+        if routes.preferred(url) == ROUTE_READER:
+            # Host blocked or slow on direct GETs recently; skip straight to the reader
+            routes.shortcuts += 1
             try:
-                body_preview = (resp.text or "")[:200]  # type: ignore[name-defined]
+                doc = await _fetch_reader(url)
             except Exception:
-                pass
-            print(f"[scrape] ERROR fetching {url}: {type(e).__name__} {str(e)} {body_preview}")
-            # Fallback via r.jina.ai plaintext proxy (helps with JS/protected sites)
-            try:
-                from urllib.parse import urlparse, urlunparse
-                p = urlparse(url)
-                scheme = p.scheme or "https"
-                target = f"https://r.jina.ai/{scheme}://{p.netloc}{p.path or ''}"
-                if p.query:
-                    target = target + "?" + p.query
-                print(f"[scrape] FALLBACK GET {target}")
-                fb = await client.get(target, headers=headers, follow_redirects=True)
-                print(f"[scrape] FALLBACK GET {target} -> {fb.status_code}")
-                fb.raise_for_status()
-                html = fb.text
-            except Exception as e2:
-                print(f"[scrape] FALLBACK ERROR {type(e2).__name__} {str(e2)}")
+                # Re-learn the route on the next attempt
+                routes.forget(url)
                 raise
-        html = resp.text
-
-    soup = BeautifulSoup(html, "html.parser")
-    # remove non-content
-    for tag in soup(["script", "style", "noscript", "template"]):
-        tag.decompose()
-    text = soup.get_text(separator="\n")
-    # collapse whitespace and drop very short lines
-    lines = [re.sub(r"\s+", " ", ln).strip() for ln in text.splitlines()]
-    lines = [ln for ln in lines if len(ln) >= 3]
-    cleaned = "\n".join(lines)
-    return cleaned[:200_000]  # cap to avoid overly large prompts
+            routes.record(url, ROUTE_READER)
+            return doc
 
+        route, doc = await _fetch_hedged(url, cached)
+        routes.record(url, route)
+        return doc
+
+
+async def fetch_document(url: str, primary: bool = False) -> ExtractedDocument:
+    """
+    Fetch a URL and extract it according to its content type. Raises FetchSkipped without
+    touching the network when the URL recently failed or its host's circuit is open. A primary
+    URL (the page an ingest is about) is retried despite a recent failure of its own, so one
+    transient error does not fail every retry of the job for the dead-URL TTL.
+    """
+    # Serve from the page cache when possible: TTL for pages without validators, else conditional GET
+    cached = await page_cache.get(url)
+    if cached is not None and not cached.has_validators and cached.is_fresh(settings.page_cache_ttl_seconds):
+        page_cache.hits += 1
+        record_cache("page", "hit")
+        print(f"[scrape] CACHE {url}")
+        return _cached_document(cached)
+
+    try:
+        host_health.check(url, check_dead_url=not primary)
+    except FetchSkipped as e:
+        print(f"[scrape] SKIP {url} reason={e.reason} saved~{e.saved_seconds:.1f}s")
+        raise
+    started = time.monotonic()
+    try:
+        doc = await _fetch_with_retries(url, cached)
+    except Exception:
+        host_health.record_failure(url, time.monotonic() - started)
+        raise
+    host_health.record_success(url, time.monotonic() - started)
+    return doc
+
+
+async def stale_document(url: str) -> Optional[ExtractedDocument]:
+    """The page cache's last copy of url regardless of age, for when it cannot be fetched now."""
+    cached = await page_cache.get(url)
+    return _cached_document(cached) if cached is not None else None
+
+
+async def fetch_clean_text(url: str) -> str:
+    return (await fetch_document(url)).text
@@ -0,0 +1,258 @@
+import asyncio
+import hashlib
+import json
+import logging
+import random
+import re
+import time
+from collections import deque
+from typing import Any, Optional, Sequence
+from .config import settings
+from .db import db
+from .fetcher import fetcher
+from .metrics import observe_dependency, record_cache
+
+logger = logging.getLogger(__name__)
+
+TAVILY_SEARCH_URL = "https://api.tavily.com/search"
+# Per-query latencies kept for the percentile metrics
+LATENCY_WINDOW = 512
+
+
+class SearchError(Exception):
+    pass
+
+
+_SOCIAL_SITE_RE = re.compile(r"\bsite:(youtube\.com|x\.com|twitter\.com|linkedin\.com|tiktok\.com)\b")
+_NEWS_RE = re.compile(r"\b(news|latest|announce\w*|launch\w*|release[sd]?)\b")
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.lower().split())
+
+
+def classify_query(query: str, default: str = "augment") -> str:
+    """Query class that picks the cache TTL: news < social < augment/claim < resolve."""
+    q = normalize_query(query)
+    if _NEWS_RE.search(q):
+        return "news"
+    if _SOCIAL_SITE_RE.search(q):
+        return "social"
+    return default
+
+
+def cache_key(query: str, max_results: int, params: dict[str, Any]) -> str:
+    raw = json.dumps({"q": normalize_query(query), "max_results": max_results, **params}, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class SearchCache:
+    """
+    Read-through cache of search responses in the search_cache table. Entries expire per query
+    class (search_cache_ttl_seconds); lookups and writes are batched per fan-out. A small share
+    of writes also deletes expired rows, so the table does not grow with every query ever made.
+    Failures degrade to uncached searches.
+    """
+
+    def __init__(self) -> None:
+        self.hits: dict[str, int] = {}
+        self.misses: dict[str, int] = {}
+        self.purged = 0
+
+    def ttl(self, query_class: str) -> float:
+        ttls = settings.search_cache_ttl_seconds
+        return float(ttls.get(query_class, ttls.get("default", 86400)))
+
+    async def get_many(self, keys: list[str]) -> dict[str, dict[str, Any]]:
+        if not settings.search_cache_enabled or not keys:
+            return {}
+        try:
+            rows = await db.fetch(
+                "SELECT cache_key, response FROM search_cache WHERE cache_key = ANY($1::text[]) AND expires_at > now()",
+                keys,
+            )
+        except Exception:
+            logger.warning("[search] cache lookup failed; searching without cache", exc_info=True)
+            return {}
+        return {r["cache_key"]: json.loads(r["response"]) for r in rows}
+
+    async def put_many(self, entries: list[tuple[str, str, str, dict[str, Any]]]) -> None:
+        """entries: (cache_key, query, query_class, response)"""
+        if not settings.search_cache_enabled or not entries:
+            return
+        try:
+            await db.executemany(
+                """
+                INSERT INTO search_cache (cache_key, query, query_class, response, expires_at)
+                VALUES ($1, $2, $3, $4::jsonb, now() + make_interval(secs => $5))
+                ON CONFLICT (cache_key) DO UPDATE
+                SET response = EXCLUDED.response, query_class = EXCLUDED.query_class,
+                    created_at = now(), expires_at = EXCLUDED.expires_at
+                """,
+                [(k, q, cls, json.dumps(resp), self.ttl(cls)) for k, q, cls, resp in entries],
+            )
+        except Exception:
+            logger.warning("[search] cache write failed", exc_info=True)
+            return
+        if random.random() < settings.search_cache_purge_probability:
+            await self.purge_expired()
+
+    async def purge_expired(self) -> int:
+        """Delete up to search_cache_purge_batch expired rows (uses search_cache_expires_idx)."""
+        try:
+            status = await db.execute(
+                """
+                DELETE FROM search_cache
+                WHERE cache_key IN (
+                    SELECT cache_key FROM search_cache WHERE expires_at < now() LIMIT $1
+                )
+                """,
+                max(1, settings.search_cache_purge_batch),
+            )
+        except Exception:
+            logger.warning("[search] cache purge failed", exc_info=True)
+            return 0
+        # asyncpg status string, e.g. "DELETE 42"
+        deleted = int(status.split()[-1]) if status and status.split()[-1].isdigit() else 0
+        self.purged += deleted
+        if deleted:
+            logger.info("[search] purged %d expired cache rows", deleted)
+        return deleted
+
+    def record(self, query_class: str, hit: bool) -> None:
+        record_cache("search", "hit" if hit else "miss")
+        counter = self.hits if hit else self.misses
+        counter[query_class] = counter.get(query_class, 0) + 1
+
+    def stats(self) -> dict[str, Any]:
+        classes = sorted(set(self.hits) | set(self.misses))
+        out: dict[str, Any] = {}
+        for cls in classes:
+            h, m = self.hits.get(cls, 0), self.misses.get(cls, 0)
+            out[cls] = {"hits": h, "misses": m, "hit_ratio": round(h / (h + m), 3) if h + m else 0.0}
+        total_h, total_m = sum(self.hits.values()), sum(self.misses.values())
+        out["total"] = {"hits": total_h, "misses": total_m, "hit_ratio": round(total_h / (total_h + total_m), 3) if total_h + total_m else 0.0}
+        out["purged"] = self.purged
+        return out
+
+
+class SearchClient:
+    """
+    Async Tavily search over the shared pooled fetcher (the SDK's sync client blocks the event
+    loop, and its async client opens a new connection per call), behind the Postgres search cache.
+    search_many fans cache misses out concurrently, bounded by search_concurrency; per-query
+    latency is logged and aggregated.
+    """
+
+    def __init__(self) -> None:
+        self._semaphore: asyncio.Semaphore | None = None
+        self._latencies: deque[float] = deque(maxlen=LATENCY_WINDOW)
+        self.cache = SearchCache()
+        self.queries = 0
+        self.errors = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(settings.tavily_api_key)
+
+    def _sem(self) -> asyncio.Semaphore:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(max(1, settings.search_concurrency))
+        return self._semaphore
+
+    async def _search_remote(self, query: str, max_results: int, **kwargs: Any) -> dict[str, Any]:
+        """Same payload and response shape as TavilyClient.search."""
+        if not settings.tavily_api_key:
+            raise SearchError("TAVILY_API_KEY is not configured")
+        payload = {
+            "api_key": settings.tavily_api_key.get_secret_value(),
+            "query": query,
+            "search_depth": kwargs.pop("search_depth", "basic"),
+            "max_results": max_results,
+            **kwargs,
+        }
+        async with self._sem():
+            started = time.perf_counter()
+            try:
+                with observe_dependency("tavily", "search"):
+                    resp = await fetcher.post(
+                        TAVILY_SEARCH_URL,
+                        content=json.dumps(payload),
+                        headers={"Content-Type": "application/json"},
+                        timeout=settings.search_timeout_seconds,
+                    )
+                    if resp.status_code == 429:
+                        raise SearchError("Tavily rate limit exceeded")
+                    if resp.status_code == 401:
+                        raise SearchError("Tavily rejected the API key")
+                    resp.raise_for_status()
+                    data = resp.json()
+            except Exception:
+                self.errors += 1
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                logger.info("[search] q=%r failed after %.0fms", query[:80], elapsed_ms)
+                raise
+            finally:
+                self.queries += 1
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self._latencies.append(elapsed_ms)
+        logger.info("[search] q=%r results=%d ms=%.0f", query[:80], len(data.get("results") or []), elapsed_ms)
+        return data
+
+    async def _search_all(
+        self, queries: Sequence[str], max_results: int, query_class: Optional[str], raise_errors: bool, **kwargs: Any
+    ) -> list[dict[str, Any]]:
+        classes = [query_class or classify_query(q) for q in queries]
+        keys = [cache_key(q, max_results, kwargs) for q in queries]
+        cached = await self.cache.get_many(list(dict.fromkeys(keys)))
+        for cls, k in zip(classes, keys):
+            self.cache.record(cls, k in cached)
+
+        # Duplicate queries within one fan-out are searched once
+        todo = {k: (q, cls) for q, cls, k in zip(queries, classes, keys) if k not in cached}
+
+        async def one(q: str) -> Optional[dict[str, Any]]:
+            try:
+                return await self._search_remote(q, max_results=max_results, **dict(kwargs))
+            except Exception:
+                if raise_errors:
+                    raise
+                return None
+
+        fetched = dict(zip(todo, await asyncio.gather(*(one(q) for q, _ in todo.values()))))
+        # Only successful responses are cached
+        await self.cache.put_many([(k, todo[k][0], todo[k][1], resp) for k, resp in fetched.items() if resp is not None])
+        merged = {**cached, **fetched}
+        return [merged[k] or {"results": []} for k in keys]
+
+    async def search(self, query: str, max_results: int = 5, query_class: Optional[str] = None, **kwargs: Any) -> dict[str, Any]:
+        """Single cached search; raises on failure."""
+        return (await self._search_all([query], max_results, query_class, True, **kwargs))[0]
+
+    async def search_many(
+        self, queries: Sequence[str], max_results: int = 5, query_class: Optional[str] = None, **kwargs: Any
+    ) -> list[dict[str, Any]]:
+        """
+        Run queries concurrently and return their responses in query order. Cache hits skip the
+        network; a failed query yields {"results": []} (and is counted in errors) so one bad call
+        does not sink the fan-out. query_class overrides classify_query for the cache TTL.
+        """
+        return await self._search_all(queries, max_results, query_class, False, **kwargs)
+
+    def stats(self) -> dict[str, Any]:
+        lat = sorted(self._latencies)
+
+        def pct(p: float) -> float:
+            return round(lat[min(len(lat) - 1, int(p * len(lat)))], 1) if lat else 0.0
+
+        return {
+            "queries": self.queries,
+            "errors": self.errors,
+            "p50_ms": pct(0.5),
+            "p95_ms": pct(0.95),
+            "max_ms": round(lat[-1], 1) if lat else 0.0,
+            "cache": self.cache.stats(),
+        }
+
+
+search_client = SearchClient()
@@ -0,0 +1,70 @@
+import asyncio
+import hashlib
+import logging
+from typing import Any, Awaitable, Callable, Optional
+from .canonical import canonicalize_url
+
+logger = logging.getLogger(__name__)
+
+
+def ingest_key(url: Optional[str], name: Optional[str]) -> Optional[str]:
+    """Coalescing key for an ingest request: the canonical URL, else the normalized name."""
+    if url:
+        return "url:" + canonicalize_url(url)
+    if name and name.strip():
+        return "name:" + " ".join(name.lower().split())
+    return None
+
+
+def flight_key(url: Optional[str], name: Optional[str], force: bool, ocr_text: Optional[str] = None) -> Optional[str]:
+    """
+    Coalescing key for an ingest run. Forced and screenshot (OCR) runs get their own key, so
+    they never join a plain run and lose their force flag or OCR text.
+    """
+    key = ingest_key(url, name)
+    if not key:
+        return None
+    if force:
+        key += ":force"
+    if ocr_text:
+        key += ":ocr:" + hashlib.sha256(ocr_text.encode("utf-8")).hexdigest()[:16]
+    return key
+
+
+class SingleFlight:
+    """
+    Collapse concurrent ingests of the same tool in this process: the first caller for a key
+    runs the flow and later callers await its result. Across processes, queued ingests are
+    deduplicated by the jobs table's dedupe_key index and resolve_tool's tools INSERT is
+    idempotent on canonical_url, so no database connection is held for the length of a run.
+    """
+
+    def __init__(self) -> None:
+        self._inflight: dict[str, asyncio.Future] = {}
+        self.leaders = 0
+        self.coalesced = 0
+
+    async def do(self, key: Optional[str], fn: Callable[[], Awaitable[Any]]) -> tuple[Any, bool]:
+        """
+        Run fn once per in-flight key; returns (result, shared) where shared is True when this
+        caller joined a run started by someone else.
+        """
+        if not key:
+            return await fn(), False
+        fut = self._inflight.get(key)
+        if fut is not None:
+            self.coalesced += 1
+            logger.info("[singleflight] joining in-flight ingest %s", key)
+            return await asyncio.shield(fut), True
+        self.leaders += 1
+        fut = asyncio.ensure_future(fn())
+        self._inflight[key] = fut
+        fut.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # Shielded so a disconnecting caller does not cancel the run others are waiting on
+        return await asyncio.shield(fut), False
+
+    def stats(self) -> dict[str, int]:
+        return {"inflight": len(self._inflight), "leaders": self.leaders, "coalesced": self.coalesced}
+
+
+ingest_flights = SingleFlight()
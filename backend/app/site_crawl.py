@@ -0,0 +1,215 @@
+import asyncio
+import logging
+import re
+from dataclasses import dataclass, field
+from typing import Optional
+from urllib.parse import urljoin, urlparse
+from .canonical import canonicalize_url
+from .config import settings
+from .crawl_scheduler import crawl_scheduler
+from .extract import extract_links
+from .fetcher import fetcher
+from .host_health import FetchSkipped
+from .scrape import HEADERS, fetch_clean_text
+
+logger = logging.getLogger(__name__)
+
+# Path segment keywords and their weight when ranking in-site pages
+PATH_WEIGHTS = {
+    "pricing": 10.0,
+    "plans": 8.0,
+    "docs": 8.0,
+    "documentation": 8.0,
+    "changelog": 7.0,
+    "releases": 6.0,
+    "release-notes": 6.0,
+    "whats-new": 6.0,
+    "blog": 5.0,
+    "features": 4.0,
+    "product": 3.0,
+    "integrations": 3.0,
+    "api": 3.0,
+    "security": 2.0,
+    "about": 2.0,
+}
+# Low-signal or noisy sections (mirrors the support/help/community skip in augment_sources)
+SKIP_SEGMENTS = {
+    "support", "help", "community", "login", "signin", "sign-in", "signup", "sign-up", "register",
+    "careers", "jobs", "legal", "privacy", "terms", "cookies", "cdn-cgi", "tag", "tags", "author",
+}
+SKIP_EXTENSIONS = (".pdf", ".png", ".jpg", ".jpeg", ".gif", ".svg", ".webp", ".zip", ".xml", ".css", ".js", ".mp4", ".json")
+# Non-English locale prefixes such as /de/ or /fr-fr/
+_LOCALE_RE = re.compile(r"^[a-z]{2}([-_][a-z]{2})?$")
+_LOC_RE = re.compile(r"<loc>\s*([^<\s]+)\s*</loc>", re.I)
+# Pages of one section kept at most, so a blog does not crowd out pricing/docs
+MAX_PER_SECTION = 2
+
+
+@dataclass
+class SiteCrawl:
+    pages: dict[str, str] = field(default_factory=dict)
+    skipped: list[dict] = field(default_factory=list)
+    discovered: int = 0
+    source: str = ""
+
+
+def _same_site(host: str, base_host: str) -> bool:
+    # Same host or a subdomain of it (docs.example.com for example.com), ignoring "www."
+    base = base_host[4:] if base_host.startswith("www.") else base_host
+    return host == base or host.endswith("." + base)
+
+
+def score_path(url: str) -> float:
+    """Rank a same-site URL by how likely it is to describe pricing, docs or changes; 0 = skip."""
+    p = urlparse(url)
+    path = (p.path or "/").lower()
+    if path.endswith(SKIP_EXTENSIONS):
+        return 0.0
+    segments = [s for s in path.strip("/").split("/") if s]
+    if segments and _LOCALE_RE.match(segments[0]) and segments[0] not in {"en", "en-us", "en_us"}:
+        return 0.0
+    if any(s in SKIP_SEGMENTS for s in segments):
+        return 0.0
+    weight = 0.0
+    for s in segments:
+        for key, w in PATH_WEIGHTS.items():
+            if s == key or s.startswith(key + "-") or s.endswith("-" + key):
+                weight = max(weight, w)
+    # Subdomains such as docs.example.com count as their section
+    sub = (p.hostname or "").split(".")[0]
+    weight = max(weight, PATH_WEIGHTS.get(sub, 0.0))
+    if weight == 0.0:
+        return 0.0
+    # Prefer section landing pages over deep leaves; query strings are usually filters/pagination
+    return weight - 0.75 * max(0, len(segments) - 1) - (1.0 if p.query else 0.0)
+
+
+def rank_pages(urls: list[str], base_url: str, limit: int) -> list[str]:
+    base = canonicalize_url(base_url)
+    scored: list[tuple[float, str]] = []
+    seen: set[str] = {base}
+    for u in urls:
+        c = canonicalize_url(u)
+        if c in seen:
+            continue
+        seen.add(c)
+        s = score_path(c)
+        if s > 0:
+            scored.append((s, c))
+    scored.sort(key=lambda x: -x[0])
+    picked: list[str] = []
+    per_section: dict[str, int] = {}
+    for _, u in scored:
+        p = urlparse(u)
+        section = f"{p.hostname}/{(p.path or '/').strip('/').split('/')[0]}"
+        if per_section.get(section, 0) >= MAX_PER_SECTION:
+            continue
+        per_section[section] = per_section.get(section, 0) + 1
+        picked.append(u)
+        if len(picked) >= limit:
+            break
+    return picked
+
+
+async def _get_text(url: str) -> Optional[str]:
+    async with crawl_scheduler.slot(url):
+        resp = await fetcher.get_capped(url, settings.scrape_max_bytes, headers=HEADERS, follow_redirects=True, timeout=10)
+    if resp.status_code != 200:
+        return None
+    return resp.text
+
+
+async def _sitemap_urls(base_url: str) -> list[str]:
+    p = urlparse(base_url)
+    origin = f"{p.scheme or 'https'}://{p.netloc}"
+    sitemaps: list[str] = []
+    try:
+        robots = await _get_text(origin + "/robots.txt")
+        for line in (robots or "").splitlines():
+            if line.lower().startswith("sitemap:"):
+                sitemaps.append(line.split(":", 1)[1].strip())
+    except Exception:
+        pass
+    if not sitemaps:
+        sitemaps = [origin + "/sitemap.xml"]
+    urls: list[str] = []
+    # Follow one level of sitemap indexes; a handful of child sitemaps is plenty for ranking
+    queue = sitemaps[:3]
+    fetched = 0
+    while queue and fetched < 6:
+        sm = queue.pop(0)
+        fetched += 1
+        try:
+            body = await _get_text(sm)
+        except Exception:
+            continue
+        if not body or "<loc>" not in body.lower():
+            continue
+        locs = _LOC_RE.findall(body)
+        if "<sitemapindex" in body.lower():
+            # Prefer child sitemaps that look like docs/pricing/pages over e.g. blog post archives
+            locs.sort(key=lambda u: 0 if any(k in u.lower() for k in ("page", "doc", "pricing", "main")) else 1)
+            queue.extend(locs[:5])
+        else:
+            urls.extend(locs)
+    return urls
+
+
+async def _homepage_links(base_url: str) -> list[str]:
+    html = await _get_text(base_url)
+    if not html:
+        return []
+    return [urljoin(base_url, href) for href in extract_links(html)]
+
+
+async def discover_pages(base_url: str) -> tuple[list[str], str]:
+    """Same-site candidate URLs from the sitemap, else from the homepage's links."""
+    base_host = (urlparse(base_url).hostname or "").lower()
+    for source, finder in (("sitemap", _sitemap_urls), ("links", _homepage_links)):
+        try:
+            found = await finder(base_url)
+        except Exception as e:
+            logger.info("[site_crawl] %s discovery failed for %s: %s", source, base_url, e)
+            continue
+        same = [u for u in found if u.startswith("http") and _same_site((urlparse(u).hostname or "").lower(), base_host)]
+        if same:
+            return same, source
+    return [], ""
+
+
+async def crawl_site(base_url: str, max_pages: Optional[int] = None, budget_seconds: Optional[float] = None) -> SiteCrawl:
+    """
+    Discover and fetch up to max_pages high-value pages (pricing, docs, changelog, blog) of the
+    site at base_url concurrently. Pages still pending when the time budget runs out are dropped.
+    """
+    limit = max_pages or settings.site_crawl_max_pages
+    budget = budget_seconds or settings.site_crawl_budget_seconds
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + budget
+    result = SiteCrawl()
+    try:
+        candidates, result.source = await asyncio.wait_for(discover_pages(base_url), timeout=budget / 2)
+    except asyncio.TimeoutError:
+        logger.info("[site_crawl] discovery timed out for %s", base_url)
+        return result
+    result.discovered = len(candidates)
+    picked = rank_pages(candidates, base_url, limit)
+    if not picked:
+        return result
+
+    tasks = {asyncio.create_task(fetch_clean_text(u)): u for u in picked}
+    done, pending = await asyncio.wait(tasks, timeout=max(0.0, deadline - loop.time()))
+    for task in pending:
+        task.cancel()
+    for task in done:
+        u = tasks[task]
+        exc = task.exception()
+        if isinstance(exc, FetchSkipped):
+            result.skipped.append(exc.as_dict())
+        elif exc is None and task.result():
+            result.pages[u] = task.result()
+    logger.info(
+        "[site_crawl] %s source=%s discovered=%d picked=%d fetched=%d timed_out=%d",
+        base_url, result.source, result.discovered, len(picked), len(result.pages), len(pending),
+    )
+    return result
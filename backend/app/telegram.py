@@ -2,12 +2,12 @@ from fastapi import APIRouter, HTTPException, Path
 from typing import Any, Optional
 from .config import settings
 import asyncio
-import httpx
-from .flow import run_ingest_flow, run_ingest_flow_with_ocr
+from .jobs import enqueue_ingest
 from .canonical import canonicalize_url
 from .vision import ocr_image_to_text
 from .research import extract_primary_product_name
 from .db import db
+from .fetcher import fetcher
 from .validators import is_plausible_product_name
 import logging
 import html
@@ -29,6 +29,29 @@ def _web_link_for_tool(tool_id: str) -> str:
 router = APIRouter()
 
 
+async def notify_ingest_done(chat_id: int, tool_id: str) -> None:
+    link = _web_link_for_tool(str(tool_id))
+    if link:
+        safe = html.escape(link, quote=True)
+        await _send_message(
+            chat_id,
+            f'Done. You can check it <a href="{safe}">here</a>.',
+            parse_mode="HTML",
+            disable_web_page_preview=True,
+        )
+    else:
+        await _send_message(chat_id, "Done.")
+
+
+async def notify_ingest_failed(chat_id: int, error: str) -> None:
+    msg = "Sorry, the research failed. Please try again later."
+    # Provide minimal diagnostic to help fix issues in non-production
+    if settings.environment != "production" and error:
+        detail = error if len(error) <= 180 else error[:180] + "…"
+        msg += f"\nError: {detail}"
+    await _send_message(chat_id, msg)
+
+
 def _extract_text_and_url(message: dict[str, Any]) -> tuple[str, Optional[str]]:
     """
     Return (raw_text, url_if_any)
@@ -58,16 +81,15 @@ async def _send_message(chat_id: int, text: str, parse_mode: Optional[str] = Non
         return
     token = settings.telegram_bot_token.get_secret_value()
     api = f"https://api.telegram.org/bot{token}/sendMessage"
-    async with httpx.AsyncClient(timeout=15) as client:
-        try:
-            payload: dict[str, Any] = {"chat_id": chat_id, "text": text}
-            if parse_mode:
-                payload["parse_mode"] = parse_mode
-            if disable_web_page_preview:
-                payload["disable_web_page_preview"] = True
-            await client.post(api, json=payload)
-        except Exception:
-            return
+    try:
+        payload: dict[str, Any] = {"chat_id": chat_id, "text": text}
+        if parse_mode:
+            payload["parse_mode"] = parse_mode
+        if disable_web_page_preview:
+            payload["disable_web_page_preview"] = True
+        await fetcher.post(api, json=payload, timeout=15)
+    except Exception:
+        return
 
 
 @router.post("/telegram/webhook/{token}")
@@ -141,54 +163,36 @@ async def telegram_webhook(update: dict[str, Any], token: str = Path(...)) -> di
         if file_id and settings.telegram_bot_token:
             token = settings.telegram_bot_token.get_secret_value()
             api_base = f"https://api.telegram.org/bot{token}"
-            async with httpx.AsyncClient(timeout=30) as client:
-                try:
-                    logger.info("[telegram] getFile chat_id=%s file_id=%s", chat_id, file_id)
-                    gf = await client.get(f"{api_base}/getFile", params={"file_id": file_id})
-                    file_path = gf.json().get("result", {}).get("file_path")
-                    if file_path:
-                        dl_url = f"https://api.telegram.org/file/bot{token}/{file_path}"
-                        dl = await client.get(dl_url)
-                        logger.info(
-                            "[telegram] dl_file chat_id=%s path=%s status=%s ct=%s size=%s",
-                            chat_id, file_path, dl.status_code, dl.headers.get("content-type"), len(dl.content),
-                        )
-                        img_bytes = dl.content
-                        await _send_message(chat_id, "Analyzing screenshot…")
-                        ocr_text = await ocr_image_to_text(img_bytes, mime_type=dl.headers.get("content-type") or "image/jpeg")
-                        logger.info("[telegram] ocr_len=%d", len(ocr_text or ""))
-                        prod = await extract_primary_product_name(ocr_text)
-                        logger.info("[telegram] extracted_name='%s' plausible=%s", (prod or "")[:120], is_plausible_product_name(prod or ""))
-                        if not prod or not is_plausible_product_name(prod):
-                            await _send_message(chat_id, "I couldn't detect a valid product name in that screenshot. Please try again with a clearer image or send a link/name.")
-                            return {"ok": "ocr_failed"}
-                        await _send_message(chat_id, f"Scouting: {prod}\nStarting deep research…")
-                        async def _process_image():
-                            try:
-                                # Look up linked user_id
-                                uid_row = await db.fetchrow("SELECT linked_user_id FROM telegram_users WHERE chat_id = $1", chat_id)
-                                uid = str(uid_row["linked_user_id"]) if uid_row and uid_row["linked_user_id"] else None
-                                result = await run_ingest_flow_with_ocr(prod, ocr_text, source_label="telegram:screenshot", user_id=uid)
-                                tool_id = result.get("tool_id")
-                                link = _web_link_for_tool(str(tool_id))
-                                if link:
-                                    safe = html.escape(link, quote=True)
-                                    await _send_message(
-                                        chat_id,
-                                        f'Done. You can check it <a href="{safe}">here</a>.',
-                                        parse_mode="HTML",
-                                        disable_web_page_preview=True,
-                                    )
-                                else:
-                                    await _send_message(chat_id, "Done.")
-                            except Exception:
-                                await _send_message(chat_id, "Sorry, the research failed. Please try again later.")
-                        asyncio.create_task(_process_image())
-                        return {"ok": "accepted"}
-                except Exception:
-                    logger.exception("[telegram] error processing photo chat_id=%s", chat_id)
-                    await _send_message(chat_id, "Sorry, I couldn't process that image.")
-                    return {"ok": "error"}
+            try:
+                logger.info("[telegram] getFile chat_id=%s file_id=%s", chat_id, file_id)
+                gf = await fetcher.get(f"{api_base}/getFile", params={"file_id": file_id}, timeout=30)
+                file_path = gf.json().get("result", {}).get("file_path")
+                if file_path:
+                    dl_url = f"https://api.telegram.org/file/bot{token}/{file_path}"
+                    dl = await fetcher.get(dl_url, timeout=30)
+                    logger.info(
+                        "[telegram] dl_file chat_id=%s path=%s status=%s ct=%s size=%s",
+                        chat_id, file_path, dl.status_code, dl.headers.get("content-type"), len(dl.content),
+                    )
+                    img_bytes = dl.content
+                    await _send_message(chat_id, "Analyzing screenshot…")
+                    ocr_text = await ocr_image_to_text(img_bytes, mime_type=dl.headers.get("content-type") or "image/jpeg")
+                    logger.info("[telegram] ocr_len=%d", len(ocr_text or ""))
+                    prod = await extract_primary_product_name(ocr_text)
+                    logger.info("[telegram] extracted_name='%s' plausible=%s", (prod or "")[:120], is_plausible_product_name(prod or ""))
+                    if not prod or not is_plausible_product_name(prod):
+                        await _send_message(chat_id, "I couldn't detect a valid product name in that screenshot. Please try again with a clearer image or send a link/name.")
+                        return {"ok": "ocr_failed"}
+                    await _send_message(chat_id, f"Scouting: {prod}\nStarting deep research…")
+                    uid_row = await db.fetchrow("SELECT linked_user_id FROM telegram_users WHERE chat_id = $1", chat_id)
+                    uid = str(uid_row["linked_user_id"]) if uid_row and uid_row["linked_user_id"] else None
+                    # The worker runs the flow and reports back to this chat
+                    await enqueue_ingest(None, prod, user_id=uid, chat_id=chat_id, ocr_text=ocr_text, source_label="telegram:screenshot")
+                    return {"ok": "accepted"}
+            except Exception:
+                logger.exception("[telegram] error processing photo chat_id=%s", chat_id)
+                await _send_message(chat_id, "Sorry, I couldn't process that image.")
+                return {"ok": "error"}
 
     text, url = _extract_text_and_url(message)
     name: Optional[str] = None
@@ -210,37 +214,9 @@ async def telegram_webhook(update: dict[str, Any], token: str = Path(...)) -> di
         asyncio.create_task(_send_message(chat_id, "Please send a tool name or URL to begin."))
         return {"ok": "ack"}
 
-    async def _process():
-        try:
-            uid_row = await db.fetchrow("SELECT linked_user_id FROM telegram_users WHERE chat_id = $1", chat_id)
-            uid = str(uid_row["linked_user_id"]) if uid_row and uid_row["linked_user_id"] else None
-            result = await run_ingest_flow(url, name, False, uid)
-            tool_id = result.get("tool_id")
-            link = _web_link_for_tool(str(tool_id))
-            if link:
-                safe = html.escape(link, quote=True)
-                await _send_message(
-                    chat_id,
-                    f'Done. You can check it <a href="{safe}">here</a>.',
-                    parse_mode="HTML",
-                    disable_web_page_preview=True,
-                )
-            else:
-                await _send_message(chat_id, "Done.")
-        except Exception as e:
-            # Provide minimal diagnostic to help fix issues in non-production
-            msg = "Sorry, the research failed. Please try again later."
-            try:
-                if settings.environment != "production":
-                    detail = str(e)
-                    if len(detail) > 180:
-                        detail = detail[:180] + "…"
-                    msg += f"\nError: {detail}"
-            except Exception:
-                pass
-            await _send_message(chat_id, msg)
-
-    asyncio.create_task(_process())
+    uid_row = await db.fetchrow("SELECT linked_user_id FROM telegram_users WHERE chat_id = $1", chat_id)
+    uid = str(uid_row["linked_user_id"]) if uid_row and uid_row["linked_user_id"] else None
+    await enqueue_ingest(url, name, user_id=uid, chat_id=chat_id)
     return {"ok": "accepted"}
 
 
@@ -0,0 +1,159 @@
+import asyncio
+import json
+import logging
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Optional
+from .config import settings
+from .crawl_scheduler import crawl_scheduler
+from .metrics import record_cache
+
+logger = logging.getLogger(__name__)
+
+MAX_TRANSCRIPT_CHARS = 200_000
+_VIDEO_ID_RE = re.compile(r"^[A-Za-z0-9_-]{6,20}$")
+
+
+@dataclass
+class CachedTranscript:
+    video_id: str
+    text: str
+    fetched_at: float
+    # True when YouTube reported no transcript (disabled, none found, video unavailable)
+    missing: bool = False
+
+
+def _no_transcript_errors() -> tuple[type[BaseException], ...]:
+    try:
+        from youtube_transcript_api import (
+            InvalidVideoId,
+            NoTranscriptAvailable,
+            NoTranscriptFound,
+            TranscriptsDisabled,
+            VideoUnavailable,
+        )
+    except Exception:
+        return ()
+    return (InvalidVideoId, NoTranscriptAvailable, NoTranscriptFound, TranscriptsDisabled, VideoUnavailable)
+
+
+class TranscriptStore:
+    """
+    YouTube transcripts keyed by video id: an on-disk cache (positive and negative entries)
+    in front of youtube-transcript-api, which is blocking and runs on a bounded thread pool.
+    Concurrent requests for the same video share one fetch.
+    """
+
+    def __init__(self, directory: str) -> None:
+        self.directory = Path(directory)
+        self._executor: ThreadPoolExecutor | None = None
+        self._inflight: dict[str, asyncio.Future] = {}
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+
+    def _pool(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=max(1, settings.transcript_max_workers),
+                thread_name_prefix="transcripts",
+            )
+        return self._executor
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def _path(self, video_id: str) -> Path:
+        return self.directory / f"{video_id}.json"
+
+    def _read(self, video_id: str) -> Optional[CachedTranscript]:
+        path = self._path(video_id)
+        if not path.exists():
+            return None
+        with path.open("r", encoding="utf-8") as f:
+            return CachedTranscript(**json.load(f))
+
+    def _write(self, entry: CachedTranscript) -> None:
+        path = self._path(entry.video_id)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        with tmp.open("w", encoding="utf-8") as f:
+            json.dump(asdict(entry), f)
+        os.replace(tmp, path)
+
+    def _fresh(self, entry: CachedTranscript) -> bool:
+        ttl = settings.transcript_negative_ttl_seconds if entry.missing else settings.transcript_cache_ttl_seconds
+        return (time.time() - entry.fetched_at) < ttl
+
+    @staticmethod
+    def _fetch_blocking(video_id: str) -> str:
+        from youtube_transcript_api import YouTubeTranscriptApi
+
+        segments = YouTubeTranscriptApi.get_transcript(video_id)
+        # Each segment: {"text": "...", "start": ..., "duration": ...}
+        lines = [seg.get("text") or "" for seg in segments if seg.get("text")]
+        return "\n".join(lines)[:MAX_TRANSCRIPT_CHARS]
+
+    async def _load(self, video_id: str) -> str:
+        if settings.transcript_cache_enabled:
+            try:
+                cached = await asyncio.to_thread(self._read, video_id)
+            except Exception:
+                logger.warning("[transcripts] cache read failed video_id=%s", video_id, exc_info=True)
+                cached = None
+            if cached is not None and self._fresh(cached):
+                if cached.missing:
+                    self.negative_hits += 1
+                    record_cache("transcript", "negative_hit")
+                else:
+                    self.hits += 1
+                    record_cache("transcript", "hit")
+                return cached.text
+
+        self.misses += 1
+        record_cache("transcript", "miss")
+        loop = asyncio.get_running_loop()
+        missing = False
+        try:
+            async with crawl_scheduler.slot(f"https://www.youtube.com/watch?v={video_id}"):
+                text = await loop.run_in_executor(self._pool(), self._fetch_blocking, video_id)
+        except ImportError:
+            return ""
+        except _no_transcript_errors():
+            text, missing = "", True
+        except Exception as e:
+            # Rate limits and network errors are not cached; the next call retries
+            logger.info("[transcripts] fetch failed video_id=%s: %s", video_id, type(e).__name__)
+            return ""
+
+        if settings.transcript_cache_enabled:
+            entry = CachedTranscript(video_id=video_id, text=text, fetched_at=time.time(), missing=missing)
+            try:
+                await asyncio.to_thread(self._write, entry)
+            except Exception:
+                logger.warning("[transcripts] cache write failed video_id=%s", video_id, exc_info=True)
+        return text
+
+    async def get(self, video_id: str) -> str:
+        """Transcript text for a video, or "" when it has none (or it could not be fetched)."""
+        if not video_id or not _VIDEO_ID_RE.match(video_id):
+            return ""
+        fut = self._inflight.get(video_id)
+        if fut is not None:
+            return await asyncio.shield(fut)
+        fut = asyncio.ensure_future(self._load(video_id))
+        self._inflight[video_id] = fut
+        fut.add_done_callback(lambda _: self._inflight.pop(video_id, None))
+        return await asyncio.shield(fut)
+
+    def stats(self) -> dict[str, int]:
+        return {"hits": self.hits, "negative_hits": self.negative_hits, "misses": self.misses, "inflight": len(self._inflight)}
+
+
+transcript_store = TranscriptStore(settings.transcript_cache_dir)
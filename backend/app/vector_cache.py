@@ -0,0 +1,256 @@
+import asyncio
+import json
+import logging
+import math
+import re
+import time
+from collections import Counter, OrderedDict
+from dataclasses import dataclass, field
+from functools import cached_property
+from typing import Any
+import numpy as np
+from .config import settings
+from .metrics import record_cache
+from .db import db
+
+logger = logging.getLogger(__name__)
+
+_TOKEN_RE = re.compile(r"[a-z0-9$][a-z0-9$._\-/]*")
+_STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "how", "in", "is", "it",
+    "of", "on", "or", "that", "the", "this", "to", "what", "when", "which", "with", "does", "do",
+}
+
+
+def _tokenize(text: str) -> list[str]:
+    return [t.strip("._-/") for t in _TOKEN_RE.findall((text or "").lower()) if t not in _STOPWORDS]
+
+
+@dataclass
+class ToolIndex:
+    """In-memory retrieval index for one tool: normalized embedding matrix plus BM25 postings."""
+
+    tool_id: str
+    one_pager: Any
+    # Latest tool_versions id when loaded; compared on get to catch writes from other processes
+    version_id: Any
+    source_urls: list[str]
+    chunk_texts: list[str]
+    matrix: np.ndarray  # (n, d) float32, L2-normalized rows
+    postings: dict[str, list[tuple[int, int]]] = field(default_factory=dict)
+    doc_lens: np.ndarray = field(default_factory=lambda: np.zeros(0, dtype=np.float32))
+    loaded_at: float = field(default_factory=time.monotonic)
+    checked_at: float = field(default_factory=time.monotonic)
+
+    @classmethod
+    def build(cls, tool_id: str, one_pager: Any, rows: list[Any], version_id: Any = None) -> "ToolIndex":
+        vectors = [r["chunk_embedding"] for r in rows]
+        if vectors:
+            matrix = np.stack(vectors).astype(np.float32)
+            matrix /= np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-9)
+        else:
+            matrix = np.zeros((0, 0), dtype=np.float32)
+        postings: dict[str, list[tuple[int, int]]] = {}
+        doc_lens = np.zeros(len(rows), dtype=np.float32)
+        for i, r in enumerate(rows):
+            tokens = _tokenize(r["chunk_text"])
+            doc_lens[i] = len(tokens)
+            for term, tf in Counter(tokens).items():
+                postings.setdefault(term, []).append((i, tf))
+        return cls(
+            tool_id=tool_id,
+            one_pager=one_pager,
+            version_id=version_id,
+            source_urls=[r["source_url"] for r in rows],
+            chunk_texts=[r["chunk_text"] for r in rows],
+            matrix=matrix,
+            postings=postings,
+            doc_lens=doc_lens,
+        )
+
+    @cached_property
+    def nbytes(self) -> int:
+        text_bytes = sum(len(t) for t in self.chunk_texts) + sum(len(u) for u in self.source_urls)
+        # Rough posting-list overhead: two ints per (doc, term) pair plus dict/list slots
+        posting_bytes = sum(len(p) for p in self.postings.values()) * 64
+        return int(self.matrix.nbytes + self.doc_lens.nbytes + text_bytes + posting_bytes)
+
+    def _vector_ranking(self, question_vec: np.ndarray, limit: int) -> np.ndarray:
+        q = np.asarray(question_vec, dtype=np.float32)
+        q = q / max(float(np.linalg.norm(q)), 1e-9)
+        sims = self.matrix @ q
+        if len(sims) <= limit:
+            return np.argsort(-sims)
+        top = np.argpartition(-sims, limit)[:limit]
+        return top[np.argsort(-sims[top])]
+
+    def _lexical_ranking(self, question: str, limit: int, k1: float = 1.2, b: float = 0.75) -> np.ndarray:
+        n = len(self.chunk_texts)
+        terms = set(_tokenize(question))
+        if not n or not terms:
+            return np.zeros(0, dtype=np.int64)
+        avg_len = float(self.doc_lens.mean()) or 1.0
+        scores = np.zeros(n, dtype=np.float32)
+        for term in terms:
+            posting = self.postings.get(term)
+            if not posting:
+                continue
+            idf = math.log(1 + (n - len(posting) + 0.5) / (len(posting) + 0.5))
+            idx = np.fromiter((p[0] for p in posting), dtype=np.int64, count=len(posting))
+            tf = np.fromiter((p[1] for p in posting), dtype=np.float32, count=len(posting))
+            norm = k1 * (1 - b + b * self.doc_lens[idx] / avg_len)
+            scores[idx] += idf * tf * (k1 + 1) / (tf + norm)
+        hits = np.flatnonzero(scores > 0)
+        return hits[np.argsort(-scores[hits])][:limit]
+
+    def search(self, question: str, question_vec: np.ndarray, limit: int, rrf_k: int) -> list[dict[str, Any]]:
+        """Vector + BM25 candidates fused with reciprocal rank fusion, mirroring retrieval.hybrid_search."""
+        if not len(self.chunk_texts):
+            return []
+        fused: dict[int, float] = {}
+        for ranking in (self._vector_ranking(question_vec, limit), self._lexical_ranking(question, limit)):
+            for rank, i in enumerate(ranking, start=1):
+                fused[int(i)] = fused.get(int(i), 0.0) + 1.0 / (rrf_k + rank)
+        order = sorted(fused, key=lambda i: fused[i], reverse=True)[:limit]
+        return [
+            {
+                "source_url": self.source_urls[i],
+                "chunk_text": self.chunk_texts[i],
+                "chunk_embedding": self.matrix[i],
+                "score": fused[i],
+            }
+            for i in order
+        ]
+
+
+class ToolVectorCache:
+    """
+    LRU cache of per-tool retrieval indexes bounded by an approximate memory budget.
+    Entries are invalidated when dbwrite creates a new tool_versions row in this process; at most
+    every vector_cache_recheck_seconds a hit also compares the tool's latest version id, so versions
+    written by other processes (the job worker) are seen too. Entries expire after a TTL.
+    """
+
+    def __init__(self) -> None:
+        self._entries: "OrderedDict[str, ToolIndex]" = OrderedDict()
+        self._bytes = 0
+        self._loading: dict[str, asyncio.Future] = {}
+        self._generation: dict[str, int] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def invalidate(self, tool_id: str) -> None:
+        self._generation[tool_id] = self._generation.get(tool_id, 0) + 1
+        entry = self._entries.pop(tool_id, None)
+        if entry is not None:
+            self._bytes -= entry.nbytes
+
+    def _insert(self, entry: ToolIndex) -> None:
+        size = entry.nbytes
+        if size > settings.vector_cache_max_bytes:
+            return
+        previous = self._entries.pop(entry.tool_id, None)
+        if previous is not None:
+            self._bytes -= previous.nbytes
+        while self._entries and self._bytes + size > settings.vector_cache_max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= evicted.nbytes
+            self.evictions += 1
+        self._entries[entry.tool_id] = entry
+        self._bytes += size
+
+    @staticmethod
+    async def _latest_version(tool_id: str) -> Any:
+        row = await db.fetchrow("SELECT id FROM tool_versions WHERE tool_id = $1::uuid AND is_latest = TRUE", tool_id)
+        return row["id"] if row else None
+
+    async def _is_current(self, entry: ToolIndex) -> bool:
+        now = time.monotonic()
+        if now - entry.loaded_at >= settings.vector_cache_ttl_seconds:
+            return False
+        if now - entry.checked_at < settings.vector_cache_recheck_seconds:
+            return True
+        if await self._latest_version(entry.tool_id) != entry.version_id:
+            return False
+        entry.checked_at = now
+        return True
+
+    async def _load(self, tool_id: str) -> ToolIndex:
+        tool = await db.fetchrow(
+            """
+            SELECT one_pager, (SELECT id FROM tool_versions v WHERE v.tool_id = t.id AND v.is_latest = TRUE) AS version_id
+            FROM tools t WHERE id = $1::uuid
+            """,
+            tool_id,
+        )
+        rows = await db.fetch(
+            """
+            SELECT source_url, chunk_text, chunk_embedding
+            FROM documents
+            WHERE tool_id = $1::uuid AND chunk_embedding IS NOT NULL
+            """,
+            tool_id,
+        )
+        one_pager = tool["one_pager"] if tool else None
+        if one_pager and not isinstance(one_pager, dict):
+            try:
+                one_pager = json.loads(str(one_pager))
+            except Exception:
+                one_pager = None
+        return ToolIndex.build(tool_id, one_pager, list(rows), tool["version_id"] if tool else None)
+
+    async def get(self, tool_id: str) -> ToolIndex:
+        entry = self._entries.get(tool_id)
+        if entry is not None and await self._is_current(entry):
+            self._entries.move_to_end(tool_id)
+            self.hits += 1
+            record_cache("vector", "hit")
+            return entry
+        if entry is not None and self._entries.get(tool_id) is entry:
+            self.invalidate(tool_id)
+        self.misses += 1
+        record_cache("vector", "miss")
+        pending = self._loading.get(tool_id)
+        if pending is not None:
+            try:
+                return await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                if not pending.cancelled():
+                    raise
+                # The caller doing the load was cancelled, not this one: load again
+                return await self.get(tool_id)
+        generation = self._generation.get(tool_id, 0)
+        fut: asyncio.Future = asyncio.get_running_loop().create_future()
+        self._loading[tool_id] = fut
+        try:
+            entry = await self._load(tool_id)
+            logger.info("[vector_cache] loaded tool_id=%s chunks=%d bytes=%d", tool_id, len(entry.chunk_texts), entry.nbytes)
+            # Skip caching if dbwrite invalidated this tool while we were loading
+            if self._generation.get(tool_id, 0) == generation:
+                self._insert(entry)
+            fut.set_result(entry)
+            return entry
+        except asyncio.CancelledError:
+            # Waiters see a cancelled future and retry their own load rather than a cancellation
+            fut.cancel()
+            raise
+        except BaseException as e:
+            fut.set_exception(e)
+            # Mark retrieved so a future without followers does not log "exception never retrieved"
+            fut.exception()
+            raise
+        finally:
+            self._loading.pop(tool_id, None)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "tools": len(self._entries),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+vector_cache = ToolVectorCache()
@@ -4,6 +4,7 @@ import logging
 from typing import Optional
 from openai import AsyncOpenAI
 from .config import settings
+from .metrics import chat_completion
 
 
 logger = logging.getLogger(__name__)
@@ -61,7 +62,8 @@ async def ocr_image_to_text(image_bytes: bytes, mime_type: Optional[str] = None)
 
     try:
         client = AsyncOpenAI(api_key=settings.openai_api_key.get_secret_value())
-        completion = await client.chat.completions.create(
+        completion = await chat_completion(
+            client,
             model=settings.model_primary,
             messages=[
                 {
@@ -0,0 +1,217 @@
+# Job queue worker. Runs inside the API process when JOB_WORKER_ENABLED is set, or standalone
+# (any number of processes / nodes against the same database) with: python -m app.worker
+import asyncio
+import logging
+import os
+import signal
+import socket
+from typing import Any, Awaitable, Callable, Optional
+from .checkpoints import checkpoints
+from .config import settings
+from .db import db
+from .embeddings import embedding_service
+from .fetcher import fetcher
+from .flow import InvalidIngestRequest, link_user_to_latest, run_ingest_flow, run_ingest_flow_with_ocr
+from .jobs import JOB_INGEST, Job, claim, complete, fail, heartbeat, release, wait_for_jobs
+from .metrics import bind_db_pool
+from .telegram import notify_ingest_done, notify_ingest_failed
+from .transcripts import transcript_store
+
+logger = logging.getLogger(__name__)
+
+
+async def run_ingest_job(job: Job) -> dict[str, Any]:
+    p = job.payload
+    # The API resolved the tool before queueing; the flow reuses it instead of searching again
+    resolved = {"tool_id": job.tool_id, "canonical_url": p.get("canonical_url")}
+    if p.get("ocr_text"):
+        return await run_ingest_flow_with_ocr(
+            p.get("name") or "", p["ocr_text"], source_label=p.get("source_label") or "screenshot",
+            force=bool(p.get("force")), user_id=p.get("user_id"), run_id=job.id, **resolved,
+        )
+    # run_id = job id: a retry resumes from the nodes the failed attempt checkpointed
+    return await run_ingest_flow(p.get("url"), p.get("name"), bool(p.get("force")), p.get("user_id"), run_id=job.id, **resolved)
+
+
+HANDLERS: dict[str, Callable[[Job], Awaitable[dict[str, Any]]]] = {
+    JOB_INGEST: run_ingest_job,
+}
+# Errors raised deliberately because the job will fail the same way on retry; anything else
+# (including ValueError subclasses such as JSONDecodeError from a truncated response) is retried
+PERMANENT_ERRORS: tuple[type[BaseException], ...] = (InvalidIngestRequest,)
+
+
+class JobWorker:
+    """
+    Polls the jobs table with job_worker_concurrency loops, each running one job at a time.
+    Running jobs are heart-beaten so other workers only reclaim them after a crash.
+    """
+
+    def __init__(self) -> None:
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self._tasks: list[asyncio.Task] = []
+        self._stopping = False
+        self.running = 0
+        self.succeeded = 0
+        self.failed = 0
+        self.retried = 0
+        self.lost_leases = 0
+
+    async def start(self) -> None:
+        if self._tasks:
+            return
+        self._stopping = False
+        n = max(1, settings.job_worker_concurrency)
+        self._tasks = [asyncio.create_task(self._loop()) for _ in range(n)]
+        logger.info("[worker] %s started with concurrency=%d", self.worker_id, n)
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """Stop claiming; jobs still running after the timeout are cancelled and handed back."""
+        self._stopping = True
+        if not self._tasks:
+            return
+        _, pending = await asyncio.wait(self._tasks, timeout=timeout)
+        for t in pending:
+            t.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _loop(self) -> None:
+        while not self._stopping:
+            try:
+                job = await claim(self.worker_id)
+            except Exception:
+                logger.warning("[worker] claim failed", exc_info=True)
+                job = None
+            if job is None:
+                await wait_for_jobs(settings.job_poll_interval_seconds)
+                continue
+            await self._run(job)
+
+    async def _heartbeat(self, job: Job) -> None:
+        interval = max(1.0, settings.job_stale_after_seconds / 3)
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await heartbeat(job.id, self.worker_id)
+            except Exception:
+                logger.warning("[worker] heartbeat failed job=%s", job.id, exc_info=True)
+
+    async def _run(self, job: Job) -> None:
+        handler = HANDLERS.get(job.job_type)
+        if handler is None or job.attempts > job.max_attempts:
+            # Unknown type, or reclaimed after crashing its worker on every attempt
+            reason = f"unknown job_type {job.job_type}" if handler is None else "attempts exhausted"
+            failed = await fail(job, self.worker_id, reason, retry=False)
+            if failed is None:
+                self.lost_leases += 1
+            else:
+                await self._finish_failed(failed, reason)
+            return
+        logger.info("[worker] job=%s type=%s attempt %d/%d", job.id, job.job_type, job.attempts, job.max_attempts)
+        beat = asyncio.create_task(self._heartbeat(job))
+        self.running += 1
+        try:
+            result = await handler(job)
+        except asyncio.CancelledError:
+            await asyncio.shield(release(job.id, self.worker_id))
+            raise
+        except Exception as e:
+            logger.exception("[worker] job=%s failed", job.id)
+            try:
+                updated = await fail(job, self.worker_id, f"{type(e).__name__}: {e}", retry=not isinstance(e, PERMANENT_ERRORS))
+            except Exception:
+                logger.warning("[worker] could not record failure job=%s", job.id, exc_info=True)
+                return
+            if updated is None:
+                # Reclaimed by another worker meanwhile; the row, checkpoints and notifications are its to handle
+                self.lost_leases += 1
+                return
+            if updated.attempts < updated.max_attempts and not isinstance(e, PERMANENT_ERRORS):
+                self.retried += 1
+            else:
+                await checkpoints.clear(job.id)
+                await self._finish_failed(updated, str(e))
+            return
+        finally:
+            self.running -= 1
+            beat.cancel()
+        try:
+            done = await complete(job.id, self.worker_id, result.get("tool_id"), result)
+        except Exception:
+            logger.warning("[worker] could not mark job=%s succeeded", job.id, exc_info=True)
+            return
+        if done is None:
+            self.lost_leases += 1
+            return
+        self.succeeded += 1
+        await checkpoints.clear(job.id)
+        await self._notify_done(done, result)
+
+    async def _notify_done(self, job: Job, result: dict[str, Any]) -> None:
+        tool_id = result.get("tool_id")
+        for sub in job.subscribers:
+            # The flow links payload["user_id"]; users whose requests were merged into this job are linked here
+            user_id = sub.get("user_id")
+            if user_id and user_id != job.payload.get("user_id"):
+                await link_user_to_latest(tool_id, user_id)
+            if sub.get("chat_id"):
+                try:
+                    await notify_ingest_done(int(sub["chat_id"]), str(tool_id))
+                except Exception:
+                    logger.warning("[worker] telegram notify failed job=%s", job.id, exc_info=True)
+
+    async def _finish_failed(self, job: Job, error: str) -> None:
+        self.failed += 1
+        for sub in job.subscribers:
+            if sub.get("chat_id"):
+                try:
+                    await notify_ingest_failed(int(sub["chat_id"]), error)
+                except Exception:
+                    logger.warning("[worker] telegram notify failed job=%s", job.id, exc_info=True)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "worker_id": self.worker_id,
+            "loops": len(self._tasks),
+            "running": self.running,
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "retried": self.retried,
+            "lost_leases": self.lost_leases,
+        }
+
+
+job_worker = JobWorker()
+
+
+async def main(stop: Optional[asyncio.Event] = None) -> None:
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s %(message)s")
+    stop = stop or asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except NotImplementedError:
+            pass
+    if settings.worker_metrics_port:
+        from prometheus_client import start_http_server
+
+        start_http_server(settings.worker_metrics_port)
+    bind_db_pool(lambda: db.pool)
+    await db.connect()
+    await fetcher.start()
+    await job_worker.start()
+    try:
+        await stop.wait()
+    finally:
+        logger.info("[worker] shutting down")
+        await job_worker.stop(timeout=settings.job_shutdown_timeout_seconds)
+        await fetcher.close()
+        transcript_store.close()
+        await embedding_service.close()
+        await db.disconnect()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Benchmark HTML extraction engines over a fixture corpus of real-world pages.
+
+1) Optionally download the default corpus (docs, pricing and changelog pages) into the fixture dir
+2) Run every available engine over every *.html file and report parse time, output size
+   and peak Python heap (tracemalloc; C-level parser memory is not included)
+
+Usage:
+  python backend/scripts/bench_extract.py --download
+  python backend/scripts/bench_extract.py --dir path/to/html --repeat 5
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+import urllib.request
+from pathlib import Path
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+os.environ.setdefault("OPENAI_API_KEY", "bench")
+os.environ.setdefault("DATABASE_URL", "postgresql://bench")
+from app.extract import ENGINES  # noqa: E402
+
+DEFAULT_DIR = Path(__file__).parent / "fixtures" / "html"
+CORPUS = [
+    "https://docs.python.org/3/library/asyncio-task.html",
+    "https://docs.stripe.com/api/charges",
+    "https://stripe.com/pricing",
+    "https://www.postgresql.org/docs/current/textsearch-controls.html",
+    "https://github.com/pgvector/pgvector",
+    "https://fastapi.tiangolo.com/tutorial/first-steps/",
+    "https://openai.com/api/pricing/",
+    "https://www.notion.com/pricing",
+    "https://developer.mozilla.org/en-US/docs/Web/HTTP/Headers/ETag",
+    "https://en.wikipedia.org/wiki/Reciprocal_rank_fusion",
+    "https://vercel.com/changelog",
+    "https://www.python-httpx.org/advanced/clients/",
+]
+
+
+def download(target: Path) -> None:
+    target.mkdir(parents=True, exist_ok=True)
+    headers = {"User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/123.0.0.0 Safari/537.36"}
+    for i, url in enumerate(CORPUS):
+        path = target / f"{i:02d}.html"
+        if path.exists():
+            continue
+        try:
+            req = urllib.request.Request(url, headers=headers)
+            with urllib.request.urlopen(req, timeout=30) as resp:
+                path.write_bytes(resp.read())
+            print(f"[download] {url} -> {path.name}")
+        except Exception as e:
+            print(f"[download] FAILED {url}: {type(e).__name__} {e}")
+
+
+def bench(directory: Path, repeat: int) -> None:
+    pages = [(p.name, p.read_bytes().decode("utf-8", errors="replace")) for p in sorted(directory.glob("*.html"))]
+    if not pages:
+        print(f"No *.html fixtures in {directory}; run with --download or --dir")
+        sys.exit(1)
+    total_mb = sum(len(h) for _, h in pages) / 1e6
+    print(f"corpus: {len(pages)} pages, {total_mb:.1f} MB, repeat={repeat}")
+    print(f"{'engine':<12s} {'ms/page':>9s} {'MB/s':>8s} {'chars/page':>11s} {'peak heap MB':>13s}")
+    for name, fn in ENGINES.items():
+        try:
+            fn("<html><body><p>probe</p></body></html>")
+        except ImportError:
+            print(f"{name:<12s} {'(not installed)':>9s}")
+            continue
+        chars = 0
+        t0 = time.perf_counter()
+        for _ in range(repeat):
+            for _, html in pages:
+                chars += len(fn(html))
+        elapsed = time.perf_counter() - t0
+        tracemalloc.start()
+        for _, html in pages:
+            fn(html)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        runs = repeat * len(pages)
+        print(
+            f"{name:<12s} {elapsed / runs * 1000:>9.2f} {total_mb * repeat / elapsed:>8.1f} "
+            f"{chars / runs:>11.0f} {peak / 1e6:>13.1f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dir", type=Path, default=DEFAULT_DIR)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--download", action="store_true", help="fetch the default corpus into --dir first")
+    args = parser.parse_args()
+    if args.download:
+        download(args.dir)
+    bench(args.dir, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
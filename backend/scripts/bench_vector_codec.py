@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: text-formatted pgvector literals vs the binary asyncpg codec.
+
+1) CPU: encode/decode N x DIM vectors both ways and report per-vector cost and wire bytes
+2) DB (optional, when DATABASE_URL is set): insert/select N rows into a temp table both ways
+
+Usage:
+  python backend/scripts/bench_vector_codec.py [N] [DIM]
+  DATABASE_URL=postgresql://... python backend/scripts/bench_vector_codec.py 200 1536
+"""
+import asyncio
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from app.pgvector import encode_vector, decode_vector, register_vector_codec  # noqa: E402
+
+
+def text_encode(vec) -> str:
+    # Path previously used by flow.ingest / augment_sources / api.chat
+    return "[" + ",".join(str(x) for x in vec) + "]"
+
+
+def text_decode(s: str) -> list[float]:
+    return [float(x) for x in s.strip("[]").split(",")]
+
+
+def timed(fn, items) -> tuple[float, list]:
+    t0 = time.perf_counter()
+    out = [fn(x) for x in items]
+    return time.perf_counter() - t0, out
+
+
+def bench_cpu(n: int, dim: int) -> None:
+    rng = np.random.default_rng(0)
+    arrays = [v for v in rng.standard_normal((n, dim)).astype(np.float32)]
+    # Embeddings used to arrive from OpenAI as Python float lists
+    lists = [v.tolist() for v in arrays]
+
+    t_txt_enc, texts = timed(text_encode, lists)
+    t_bin_enc, blobs = timed(encode_vector, arrays)
+    t_txt_dec, _ = timed(text_decode, texts)
+    t_bin_dec, _ = timed(decode_vector, blobs)
+
+    txt_bytes = sum(len(t.encode()) for t in texts) / n
+    bin_bytes = sum(len(b) for b in blobs) / n
+    print(f"[cpu] n={n} dim={dim}")
+    print(f"  encode  text={t_txt_enc / n * 1e6:9.1f} us/vec  binary={t_bin_enc / n * 1e6:9.1f} us/vec  ({t_txt_enc / max(t_bin_enc, 1e-12):.1f}x)")
+    print(f"  decode  text={t_txt_dec / n * 1e6:9.1f} us/vec  binary={t_bin_dec / n * 1e6:9.1f} us/vec  ({t_txt_dec / max(t_bin_dec, 1e-12):.1f}x)")
+    print(f"  wire    text={txt_bytes:9.0f} B/vec   binary={bin_bytes:9.0f} B/vec   ({txt_bytes / bin_bytes:.1f}x)")
+
+
+async def bench_db(dsn: str, n: int, dim: int) -> None:
+    import asyncpg
+
+    rng = np.random.default_rng(1)
+    arrays = [v for v in rng.standard_normal((n, dim)).astype(np.float32)]
+    lists = [v.tolist() for v in arrays]
+
+    text_conn = await asyncpg.connect(dsn)
+    bin_conn = await asyncpg.connect(dsn)
+    try:
+        if not await register_vector_codec(bin_conn):
+            print("[db] pgvector extension not installed; skipping")
+            return
+        results: dict[str, tuple[float, float]] = {}
+        for label, conn in (("text", text_conn), ("binary", bin_conn)):
+            await conn.execute(f"CREATE TEMP TABLE bench_vec (id INT, v VECTOR({dim}))")
+            t0 = time.perf_counter()
+            # Client-side formatting is part of the measured path, as it was in the app
+            if label == "text":
+                rows = [(i, text_encode(v)) for i, v in enumerate(lists)]
+            else:
+                rows = [(i, v) for i, v in enumerate(arrays)]
+            await conn.executemany("INSERT INTO bench_vec (id, v) VALUES ($1, $2::vector)", rows)
+            t_ins = time.perf_counter() - t0
+            t0 = time.perf_counter()
+            if label == "text":
+                fetched = await conn.fetch("SELECT id, v::text AS v FROM bench_vec")
+                _ = [text_decode(r["v"]) for r in fetched]
+            else:
+                fetched = await conn.fetch("SELECT id, v FROM bench_vec")
+                _ = [r["v"] for r in fetched]
+            t_sel = time.perf_counter() - t0
+            results[label] = (t_ins, t_sel)
+        print(f"[db] n={n} dim={dim}")
+        for label, (t_ins, t_sel) in results.items():
+            print(f"  {label:6s} insert={t_ins * 1000:8.1f} ms  select={t_sel * 1000:8.1f} ms")
+    finally:
+        await text_conn.close()
+        await bin_conn.close()
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    dim = int(sys.argv[2]) if len(sys.argv) > 2 else 1536
+    bench_cpu(n, dim)
+    dsn = os.environ.get("DATABASE_URL")
+    if dsn:
+        asyncio.run(bench_db(dsn.replace("postgresql+asyncpg://", "postgresql://"), n, dim))
+
+
+if __name__ == "__main__":
+    main()
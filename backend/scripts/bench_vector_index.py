@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Recall/latency benchmark for pgvector ANN indexes over a synthetic corpus.
+
+1) Load N clustered, L2-normalized vectors into a scratch table (binary COPY)
+2) Build an IVFFLAT or HNSW index with vector_cosine_ops
+3) Compute exact top-k for Q random queries (index scans disabled)
+4) For each ivfflat.probes / hnsw.ef_search value, report recall@k and p50/p95 latency
+
+Needs a Postgres with pgvector and several GB of disk/RAM at the default 1M x 1536.
+
+Usage:
+  DATABASE_URL=postgresql://... python backend/scripts/bench_vector_index.py --index ivfflat
+  DATABASE_URL=postgresql://... python backend/scripts/bench_vector_index.py --index hnsw --n 200000 --values 64,100,200,400
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from app.pgvector import register_vector_codec  # noqa: E402
+
+TABLE = "bench_vectors"
+
+
+def synthetic_batch(rng: np.random.Generator, centers: np.ndarray, size: int) -> np.ndarray:
+    # Clustered data is closer to real embeddings than uniform noise, which makes ANN look too good/bad
+    picks = rng.integers(0, len(centers), size=size)
+    vecs = centers[picks] + 0.35 * rng.standard_normal((size, centers.shape[1])).astype(np.float32)
+    vecs /= np.linalg.norm(vecs, axis=1, keepdims=True)
+    return vecs.astype(np.float32)
+
+
+async def load_corpus(conn, n: int, dim: int, seed: int, batch: int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((max(16, n // 2000), dim)).astype(np.float32)
+    await conn.execute(f"DROP TABLE IF EXISTS {TABLE}")
+    await conn.execute(f"CREATE TABLE {TABLE} (id BIGINT PRIMARY KEY, embedding VECTOR({dim}) NOT NULL)")
+    t0 = time.perf_counter()
+    for start in range(0, n, batch):
+        size = min(batch, n - start)
+        vecs = synthetic_batch(rng, centers, size)
+        await conn.copy_records_to_table(TABLE, records=[(start + i, v) for i, v in enumerate(vecs)], columns=["id", "embedding"])
+        print(f"\r[load] {start + size}/{n}", end="", flush=True)
+    print(f"\n[load] done in {time.perf_counter() - t0:.1f}s")
+    return centers
+
+
+async def build_index(conn, kind: str, n: int, m: int, ef_construction: int) -> None:
+    await conn.execute(f"DROP INDEX IF EXISTS {TABLE}_ann")
+    await conn.execute("SET maintenance_work_mem = '2GB'")
+    t0 = time.perf_counter()
+    if kind == "hnsw":
+        await conn.execute(
+            f"CREATE INDEX {TABLE}_ann ON {TABLE} USING hnsw (embedding vector_cosine_ops) WITH (m = {m}, ef_construction = {ef_construction})"
+        )
+    else:
+        # pgvector guidance: lists ~ rows/1000 up to 1M rows, sqrt(rows) beyond
+        lists = max(10, n // 1000 if n <= 1_000_000 else int(n ** 0.5))
+        await conn.execute(f"CREATE INDEX {TABLE}_ann ON {TABLE} USING ivfflat (embedding vector_cosine_ops) WITH (lists = {lists})")
+    await conn.execute(f"ANALYZE {TABLE}")
+    print(f"[index] {kind} built in {time.perf_counter() - t0:.1f}s")
+
+
+async def exact_top_k(conn, queries: np.ndarray, k: int) -> list[set[int]]:
+    truth: list[set[int]] = []
+    async with conn.transaction():
+        await conn.execute("SET LOCAL enable_indexscan = off")
+        await conn.execute("SET LOCAL enable_bitmapscan = off")
+        for q in queries:
+            rows = await conn.fetch(f"SELECT id FROM {TABLE} ORDER BY embedding <=> $1 LIMIT $2", q, k)
+            truth.append({r["id"] for r in rows})
+    return truth
+
+
+async def measure(conn, kind: str, value: int, queries: np.ndarray, truth: list[set[int]], k: int) -> tuple[float, float, float]:
+    guc = "hnsw.ef_search" if kind == "hnsw" else "ivfflat.probes"
+    latencies: list[float] = []
+    recalls: list[float] = []
+    async with conn.transaction():
+        await conn.execute(f"SELECT set_config('{guc}', $1, true)", str(value))
+        for q, expected in zip(queries, truth):
+            t0 = time.perf_counter()
+            rows = await conn.fetch(f"SELECT id FROM {TABLE} ORDER BY embedding <=> $1 LIMIT $2", q, k)
+            latencies.append((time.perf_counter() - t0) * 1000)
+            recalls.append(len({r["id"] for r in rows} & expected) / max(1, len(expected)))
+    lat = np.array(latencies)
+    return float(np.mean(recalls)), float(np.percentile(lat, 50)), float(np.percentile(lat, 95))
+
+
+async def run(args: argparse.Namespace) -> None:
+    import asyncpg
+
+    dsn = os.environ.get("DATABASE_URL", "").replace("postgresql+asyncpg://", "postgresql://")
+    if not dsn:
+        print("DATABASE_URL is required")
+        sys.exit(1)
+    conn = await asyncpg.connect(dsn)
+    try:
+        if not await register_vector_codec(conn):
+            print("pgvector extension not installed")
+            sys.exit(1)
+        if args.skip_load:
+            rng = np.random.default_rng(args.seed)
+            centers = rng.standard_normal((max(16, args.n // 2000), args.dim)).astype(np.float32)
+        else:
+            centers = await load_corpus(conn, args.n, args.dim, args.seed, args.batch)
+            await build_index(conn, args.index, args.n, args.m, args.ef_construction)
+        queries = synthetic_batch(np.random.default_rng(args.seed + 1), centers, args.queries)
+        t0 = time.perf_counter()
+        truth = await exact_top_k(conn, queries, args.k)
+        exact_ms = (time.perf_counter() - t0) * 1000 / len(queries)
+        print(f"[exact] seq scan {exact_ms:.1f} ms/query")
+        label = "ef_search" if args.index == "hnsw" else "probes"
+        print(f"{label:>10s} {'recall@' + str(args.k):>10s} {'p50 ms':>9s} {'p95 ms':>9s}")
+        for value in [int(v) for v in args.values.split(",")]:
+            recall, p50, p95 = await measure(conn, args.index, value, queries, truth, args.k)
+            print(f"{value:>10d} {recall:>10.3f} {p50:>9.2f} {p95:>9.2f}")
+        if not args.keep:
+            await conn.execute(f"DROP TABLE IF EXISTS {TABLE}")
+    finally:
+        await conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--n", type=int, default=1_000_000)
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=48)
+    parser.add_argument("--index", choices=["ivfflat", "hnsw"], default="ivfflat")
+    parser.add_argument("--values", default=None, help="comma-separated probes (ivfflat) or ef_search (hnsw) values")
+    parser.add_argument("--m", type=int, default=16)
+    parser.add_argument("--ef-construction", type=int, default=64)
+    parser.add_argument("--batch", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--skip-load", action="store_true", help="reuse an existing corpus and index")
+    parser.add_argument("--keep", action="store_true", help="keep the scratch table after the run")
+    args = parser.parse_args()
+    if args.values is None:
+        args.values = "64,100,200,400" if args.index == "hnsw" else "1,5,10,20,40"
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,7 @@
+import os
+import sys
+
+# Settings require these; tests never reach a real database or OpenAI
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ.setdefault("DATABASE_URL", "postgresql://test")
@@ -0,0 +1,26 @@
+import pytest
+
+from app.crawl_scheduler import domain_of
+
+
+@pytest.mark.parametrize(
+    "url, domain",
+    [
+        ("https://docs.stripe.com/api", "stripe.com"),
+        ("https://www.stripe.com/", "stripe.com"),
+        ("https://news.bbc.co.uk/sport", "bbc.co.uk"),
+        ("https://www.gov.uk/", "www.gov.uk"),
+        ("https://shop.example.com.au/", "example.com.au"),
+        ("https://alice.github.io/blog", "alice.github.io"),
+        ("https://STRIPE.COM./pricing", "stripe.com"),
+        ("http://127.0.0.1:8000/", "127.0.0.1"),
+        ("http://localhost/", "localhost"),
+    ],
+)
+def test_domain_of_is_registrable_domain(url, domain):
+    assert domain_of(url) == domain
+
+
+def test_unrelated_sites_under_multi_part_suffixes_do_not_share_a_budget():
+    assert domain_of("https://news.bbc.co.uk/") != domain_of("https://www.itv.co.uk/")
+    assert domain_of("https://alice.github.io/") != domain_of("https://bob.github.io/")
@@ -0,0 +1,87 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app import idle_map
+from app.crawl_scheduler import CrawlScheduler
+from app.host_health import HostHealth
+from app.idle_map import IdleMap
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    c = Clock()
+    # Only the map's clock; the event loop and token buckets keep real time
+    monkeypatch.setattr(idle_map, "time", SimpleNamespace(monotonic=c))
+    return c
+
+
+def test_idle_entries_are_evicted(clock):
+    m: IdleMap[list] = IdleMap(list, lambda: 100.0)
+    m.get("a.com")
+    clock.now += 50
+    m.get("b.com")
+    clock.now += 60
+    m.get("c.com")
+    assert sorted(k for k, _ in m.items()) == ["b.com", "c.com"]
+    assert m.evicted == 1
+
+
+def test_held_entries_survive_the_idle_window(clock):
+    m: IdleMap[list] = IdleMap(list, lambda: 100.0)
+    with m.hold("a.com") as held:
+        clock.now += 500
+        m.get("b.com")
+        assert m.peek("a.com") is held
+    # Release counts as use, so the entry is idle from here
+    clock.now += 50
+    m.get("c.com")
+    assert m.peek("a.com") is held
+
+
+def test_recreated_entry_is_fresh(clock):
+    m: IdleMap[list] = IdleMap(list, lambda: 10.0)
+    m.get("a.com").append(1)
+    clock.now += 20
+    m.get("b.com")
+    assert m.get("a.com") == []
+
+
+def test_crawl_scheduler_drops_idle_hosts_and_domains(clock):
+    scheduler = CrawlScheduler()
+
+    async def fetch(url: str) -> None:
+        async with scheduler.slot(url):
+            pass
+
+    async def run() -> None:
+        for i in range(20):
+            await fetch(f"https://www.site{i}.org/")
+        clock.now += 10_000
+        await fetch("https://example.com/")
+
+    asyncio.run(run())
+    assert scheduler.stats()["evicted"] == 40
+    assert len(scheduler._hosts) == 1
+    assert scheduler.stats()["domains"] == 1
+
+
+def test_host_health_keeps_open_circuits_past_the_idle_window(clock, monkeypatch):
+    from app.config import settings
+
+    monkeypatch.setattr(settings, "scrape_state_idle_seconds", 10.0)
+    health = HostHealth()
+    for _ in range(settings.scrape_circuit_failure_threshold):
+        health.record_failure("https://down.example.com/a", 1.0)
+    clock.now += 60
+    health.record_success("https://up.example.com/", 0.1)
+    assert "down.example.com" in health.stats()["open_circuits"]
@@ -0,0 +1,83 @@
+import asyncio
+
+from app import jobs, worker
+from app.jobs import Job
+
+JOB_ID = "00000000-0000-0000-0000-000000000001"
+
+
+class FakeJobsTable:
+    """One jobs row; UPDATEs apply only when their WHERE clause's lease check matches, like Postgres would."""
+
+    def __init__(self, locked_by: str, status: str = "running") -> None:
+        self.row = {
+            "id": JOB_ID, "job_type": jobs.JOB_INGEST, "tool_id": None, "payload": {"subscribers": [{"chat_id": 1}]},
+            "attempts": 1, "max_attempts": 3, "status": status, "locked_by": locked_by,
+        }
+        self.executed: list[str] = []
+
+    async def fetchrow(self, query: str, *args):
+        assert "locked_by = $2 AND status = 'running'" in query
+        if args[0] != self.row["id"] or args[1] != self.row["locked_by"] or self.row["status"] != "running":
+            return None
+        if "'succeeded'" in query:
+            self.row["status"] = "succeeded"
+        elif "'queued'" in query:
+            self.row["status"], self.row["locked_by"] = "queued", None
+        else:
+            self.row["status"] = "failed"
+        return dict(self.row)
+
+    async def execute(self, query: str, *args) -> str:
+        self.executed.append(query)
+        return "OK"
+
+
+def _job() -> Job:
+    return Job(id=JOB_ID, job_type=jobs.JOB_INGEST, tool_id=None, payload={}, attempts=1, max_attempts=3)
+
+
+def test_complete_and_fail_require_the_lease(monkeypatch):
+    table = FakeJobsTable(locked_by="other:2")
+    monkeypatch.setattr(jobs, "db", table)
+
+    async def main():
+        assert await jobs.complete(JOB_ID, "me:1", None, {}) is None
+        assert await jobs.fail(_job(), "me:1", "boom", retry=True) is None
+        assert await jobs.fail(_job(), "me:1", "boom", retry=False) is None
+
+    asyncio.run(main())
+    assert table.row["status"] == "running" and table.row["locked_by"] == "other:2"
+
+
+def test_complete_with_the_lease_succeeds(monkeypatch):
+    table = FakeJobsTable(locked_by="me:1")
+    monkeypatch.setattr(jobs, "db", table)
+    done = asyncio.run(jobs.complete(JOB_ID, "me:1", None, {}))
+    assert done is not None and table.row["status"] == "succeeded"
+
+
+def test_worker_that_lost_its_lease_does_not_notify_or_clear_checkpoints(monkeypatch):
+    table = FakeJobsTable(locked_by="other:2")
+    monkeypatch.setattr(jobs, "db", table)
+    notified: list[int] = []
+    cleared: list[str] = []
+
+    async def handler(job):
+        return {"tool_id": None}
+
+    async def notify(chat_id, *args):
+        notified.append(chat_id)
+
+    async def clear(run_id):
+        cleared.append(run_id)
+
+    monkeypatch.setitem(worker.HANDLERS, jobs.JOB_INGEST, handler)
+    monkeypatch.setattr(worker, "notify_ingest_done", notify)
+    monkeypatch.setattr(worker, "notify_ingest_failed", notify)
+    monkeypatch.setattr(worker.checkpoints, "clear", clear)
+    w = worker.JobWorker()
+    w.worker_id = "me:1"
+    asyncio.run(w._run(_job()))
+    assert w.succeeded == 0 and w.lost_leases == 1
+    assert notified == [] and cleared == []
@@ -0,0 +1,64 @@
+import asyncio
+
+from app import scrape
+from app.config import settings
+from app.doc_extract import ExtractedDocument
+
+
+def test_cancelling_caller_during_hedge_delay_cancels_direct_fetch(monkeypatch):
+    started = asyncio.Event()
+    outcome: dict[str, bool] = {}
+
+    async def slow_direct(url, cached):
+        started.set()
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            outcome["cancelled"] = True
+            raise
+        outcome["completed"] = True
+        return ExtractedDocument("html", "late")
+
+    monkeypatch.setattr(scrape, "_fetch_direct", slow_direct)
+    monkeypatch.setattr(settings, "scrape_hedge_enabled", True)
+    monkeypatch.setattr(settings, "scrape_hedge_delay_seconds", 5.0)
+
+    async def main():
+        caller = asyncio.create_task(scrape._fetch_hedged("https://example.com/", None))
+        await started.wait()
+        caller.cancel()
+        try:
+            await caller
+        except asyncio.CancelledError:
+            pass
+        # Nothing left running once the caller has returned
+        await asyncio.sleep(0)
+        return [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+
+    leftover = asyncio.run(main())
+    assert outcome == {"cancelled": True}
+    assert leftover == []
+
+
+def test_hedge_cancels_losing_route(monkeypatch):
+    outcome: dict[str, bool] = {}
+
+    async def slow_direct(url, cached):
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            outcome["direct_cancelled"] = True
+            raise
+        return ExtractedDocument("html", "direct")
+
+    async def reader(url):
+        return ExtractedDocument("html", "reader")
+
+    monkeypatch.setattr(scrape, "_fetch_direct", slow_direct)
+    monkeypatch.setattr(scrape, "_fetch_reader", reader)
+    monkeypatch.setattr(settings, "scrape_hedge_enabled", True)
+    monkeypatch.setattr(settings, "scrape_hedge_delay_seconds", 0.01)
+
+    route, doc = asyncio.run(scrape._fetch_hedged("https://example.com/", None))
+    assert (route, doc.text) == (scrape.ROUTE_READER, "reader")
+    assert outcome == {"direct_cancelled": True}
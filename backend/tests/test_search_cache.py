@@ -0,0 +1,43 @@
+import asyncio
+
+from app import search
+from app.config import settings
+from app.search import SearchCache
+
+
+class FakeDB:
+    def __init__(self, purge_status: str = "DELETE 7") -> None:
+        self.purge_status = purge_status
+        self.executed: list[tuple[str, tuple]] = []
+
+    async def executemany(self, query: str, args: list) -> str:
+        return "INSERT 0 1"
+
+    async def execute(self, query: str, *args) -> str:
+        self.executed.append((query, args))
+        return self.purge_status
+
+
+ENTRY = ("key", "acme pricing", "augment", {"results": []})
+
+
+def test_write_purges_expired_rows_when_sampled(monkeypatch):
+    fake = FakeDB()
+    monkeypatch.setattr(search, "db", fake)
+    monkeypatch.setattr(settings, "search_cache_purge_probability", 1.0)
+    monkeypatch.setattr(settings, "search_cache_purge_batch", 500)
+    cache = SearchCache()
+    asyncio.run(cache.put_many([ENTRY]))
+    assert len(fake.executed) == 1
+    query, args = fake.executed[0]
+    assert "DELETE FROM search_cache" in query and "expires_at < now()" in query
+    assert args == (500,)
+    assert cache.stats()["purged"] == 7
+
+
+def test_write_skips_purge_when_not_sampled(monkeypatch):
+    fake = FakeDB()
+    monkeypatch.setattr(search, "db", fake)
+    monkeypatch.setattr(settings, "search_cache_purge_probability", 0.0)
+    asyncio.run(SearchCache().put_many([ENTRY]))
+    assert fake.executed == []
@@ -0,0 +1,12 @@
+-- Content-addressed embedding cache
+-- Keyed on the hash of the normalized chunk text plus the embedding model name, so unchanged
+-- chunks are never re-embedded on re-ingest or watchlist refresh.
+CREATE TABLE IF NOT EXISTS embedding_cache (
+    content_hash TEXT NOT NULL,
+    model TEXT NOT NULL,
+    embedding VECTOR(1536) NOT NULL,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    PRIMARY KEY (content_hash, model)
+);
+
+CREATE INDEX IF NOT EXISTS documents_chunk_hash_idx ON documents(tool_id, chunk_hash);
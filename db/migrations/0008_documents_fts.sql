@@ -0,0 +1,7 @@
+-- Full-text search over chunk text for hybrid (lexical + vector) retrieval
+-- Generated tsvector keeps itself in sync with chunk_text; GIN index serves @@ queries.
+ALTER TABLE documents
+    ADD COLUMN IF NOT EXISTS chunk_tsv TSVECTOR
+    GENERATED ALWAYS AS (to_tsvector('english', coalesce(chunk_text, ''))) STORED;
+
+CREATE INDEX IF NOT EXISTS documents_chunk_tsv_gin ON documents USING GIN (chunk_tsv);
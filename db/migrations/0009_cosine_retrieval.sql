@@ -0,0 +1,23 @@
+-- Align similarity queries with the IVFFLAT index from 0002 (vector_cosine_ops).
+-- Queries now order by cosine distance (<=>); inner-product ordering (<#>) could not use that index.
+CREATE OR REPLACE FUNCTION top_k_similar_documents(p_tool_id UUID, p_query TEXT, p_k INT)
+RETURNS TABLE(source_url TEXT, chunk_text TEXT, chunk_embedding VECTOR(1536))
+LANGUAGE SQL STABLE AS $$
+    WITH q AS (
+        SELECT
+            embedding
+        FROM tools
+        WHERE id = p_tool_id
+    ),
+    c AS (
+        SELECT d.source_url, d.chunk_text, d.chunk_embedding
+        FROM documents d
+        WHERE d.tool_id = p_tool_id AND d.chunk_embedding IS NOT NULL
+        ORDER BY (d.chunk_embedding <=> (SELECT embedding FROM q LIMIT 1)) ASC
+        LIMIT p_k
+    )
+    SELECT * FROM c;
+$$;
+
+-- Tool-scoped retrieval filters on tool_id first; keep that lookup indexed
+CREATE INDEX IF NOT EXISTS documents_tool_idx ON documents(tool_id);
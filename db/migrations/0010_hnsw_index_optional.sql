@@ -0,0 +1,8 @@
+-- OPTIONAL: replace the IVFFLAT index with HNSW (pgvector >= 0.5.0).
+-- HNSW gives better recall/latency without a training step and does not degrade as rows are added,
+-- at the cost of slower builds and more memory. Tune recall at query time with HNSW_EF_SEARCH.
+-- Apply only if you want HNSW; the app works with either index (see VECTOR_INDEX_PROBES / HNSW_EF_SEARCH).
+CREATE INDEX IF NOT EXISTS documents_chunk_embedding_hnsw
+ON documents USING hnsw (chunk_embedding vector_cosine_ops) WITH (m = 16, ef_construction = 64);
+
+DROP INDEX IF EXISTS documents_chunk_embedding_ivfflat;
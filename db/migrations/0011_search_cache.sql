@@ -0,0 +1,13 @@
+-- Persistent web-search cache shared by resolve_tool, augment_sources and the juror
+-- Keyed on a hash of the normalized query plus request parameters; expires_at is set from the
+-- TTL of the query class (resolution queries live long, news queries short).
+CREATE TABLE IF NOT EXISTS search_cache (
+    cache_key TEXT PRIMARY KEY,
+    query TEXT NOT NULL,
+    query_class TEXT NOT NULL,
+    response JSONB NOT NULL,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    expires_at TIMESTAMPTZ NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS search_cache_expires_idx ON search_cache(expires_at);
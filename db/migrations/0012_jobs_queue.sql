@@ -0,0 +1,15 @@
+-- Durable job queue on the jobs table (0001)
+-- Workers claim due jobs with FOR UPDATE SKIP LOCKED, stamp locked_at/locked_by while running
+-- (refreshed as a heartbeat, so a crashed worker's job is reclaimed once it goes stale) and
+-- reschedule failures through run_at until max_attempts. At most one queued/running job exists
+-- per dedupe_key; later enqueues attach to it.
+ALTER TABLE jobs ADD COLUMN IF NOT EXISTS max_attempts INT NOT NULL DEFAULT 3;
+ALTER TABLE jobs ADD COLUMN IF NOT EXISTS locked_at TIMESTAMPTZ;
+ALTER TABLE jobs ADD COLUMN IF NOT EXISTS locked_by TEXT;
+ALTER TABLE jobs ADD COLUMN IF NOT EXISTS result JSONB;
+ALTER TABLE jobs ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ NOT NULL DEFAULT now();
+ALTER TABLE jobs ADD COLUMN IF NOT EXISTS finished_at TIMESTAMPTZ;
+
+CREATE INDEX IF NOT EXISTS jobs_due_idx ON jobs ((COALESCE(run_at, created_at))) WHERE status = 'queued';
+CREATE INDEX IF NOT EXISTS jobs_running_idx ON jobs (locked_at) WHERE status = 'running';
+CREATE UNIQUE INDEX IF NOT EXISTS jobs_dedupe_active_idx ON jobs (dedupe_key) WHERE status IN ('queued', 'running');
@@ -0,0 +1,13 @@
+-- Per-node checkpoints of the ingest flow, keyed by run (the job id)
+-- Each row holds the state update a node returned, minus large fields (chunks, and clean_text
+-- beyond a size limit) that are rehydrated on restore; a retried job replays completed nodes
+-- from here and resumes at the first node without a checkpoint.
+CREATE TABLE IF NOT EXISTS flow_checkpoints (
+    run_id TEXT NOT NULL,
+    node TEXT NOT NULL,
+    state JSONB NOT NULL,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    PRIMARY KEY (run_id, node)
+);
+
+CREATE INDEX IF NOT EXISTS flow_checkpoints_created_idx ON flow_checkpoints(created_at);